@@ -0,0 +1,89 @@
+"""
+订阅源解析基准：在大体积 RSS 样例上对比
+- stream   : parse_stream 流式解析，取够 N 条即停止读取
+- stream-all: parse_stream 解析全部条目 (不提前停止时的解析成本)
+- feedparser: 读入完整响应后 feedparser.parse (未安装时跳过)
+报告耗时、读取的字节数和 tracemalloc 峰值内存。
+
+用法: python -m benchmarks.bench_feed_parser --items 5000 --summary-bytes 2000 --max-entries 5
+"""
+import argparse
+import time
+import tracemalloc
+
+from core.stream_parser import parse_stream
+
+CHUNK_SIZE = 64 * 1024
+
+
+def build_large_rss(n_items, summary_bytes):
+    filler = ("Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * (summary_bytes // 56 + 1))[:summary_bytes]
+    items = "".join(
+        f"<item><title>Story {i}: AI market update</title>"
+        f"<link>https://example.com/story/{i}</link>"
+        f"<description><![CDATA[<p>{filler}</p>]]></description>"
+        f"<pubDate>Mon, 06 Jan 2025 {i % 24:02d}:{i % 60:02d}:00 GMT</pubDate>"
+        f"<guid>https://example.com/story/{i}</guid></item>"
+        for i in range(n_items)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        f'<rss version="2.0"><channel><title>Large feed</title>{items}</channel></rss>'
+    ).encode("utf-8")
+
+
+def chunked(body, counter):
+    """模拟 response.iter_content，并统计实际读取的字节数"""
+    for i in range(0, len(body), CHUNK_SIZE):
+        chunk = body[i:i + CHUNK_SIZE]
+        counter[0] += len(chunk)
+        yield chunk
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--summary-bytes", type=int, default=2000)
+    parser.add_argument("--max-entries", type=int, default=5)
+    args = parser.parse_args()
+
+    body = build_large_rss(args.items, args.summary_bytes)
+    print(f"fixture: {args.items} items, {len(body) / 1e6:.1f}MB, keep first {args.max_entries}")
+
+    counter = [0]
+    entries, elapsed, peak = measure(lambda: parse_stream(chunked(body, counter), args.max_entries))
+    print(f"stream     : {elapsed * 1000:8.1f}ms  read {counter[0] / 1e6:6.2f}MB  "
+          f"peak {peak / 1e6:6.2f}MB  entries={len(entries)}")
+
+    entries, elapsed, peak = measure(lambda: parse_stream(chunked(body, [0]), args.items))
+    print(f"stream-all : {elapsed * 1000:8.1f}ms  read {len(body) / 1e6:6.2f}MB  "
+          f"peak {peak / 1e6:6.2f}MB  entries={len(entries)}")
+
+    try:
+        import feedparser
+    except ImportError:
+        print("feedparser : not installed, skipped")
+        return
+
+    def full_parse():
+        # 原路径：先读完整个响应，再构建所有条目
+        data = b"".join(chunked(body, [0]))
+        return feedparser.parse(data).entries[:args.max_entries]
+
+    entries, elapsed, peak = measure(full_parse)
+    print(f"feedparser : {elapsed * 1000:8.1f}ms  read {len(body) / 1e6:6.2f}MB  "
+          f"peak {peak / 1e6:6.2f}MB  entries={len(entries)}")
+
+
+if __name__ == "__main__":
+    main()
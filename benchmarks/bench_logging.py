@@ -0,0 +1,55 @@
+"""
+日志开销基准：对比同步写文件与队列模式下，调用方线程上每次 logger.info 的耗时。
+队列模式额外报告监听线程把积压全部写完所需的时间。
+
+用法: python -m benchmarks.bench_logging --calls 50000 --threads 4
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from utils.logger import configure_logging, correlation, logger, shutdown_logging
+
+
+def run_once(mode, fmt, calls, threads, log_file):
+    configure_logging({"mode": mode, "format": fmt, "console": False, "file": log_file,
+                       "max_bytes": 50 * 1024 * 1024})
+    per_thread = calls // threads
+
+    def worker(n):
+        with correlation(f"item-{n}"):
+            for i in range(per_thread):
+                logger.info("processed item %d of %d", i, per_thread)
+
+    start = time.perf_counter()
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    caller = time.perf_counter() - start
+    shutdown_logging()  # 队列模式下等待监听线程写完
+    total = time.perf_counter() - start
+    return caller, total, per_thread * threads
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=50000)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("sync", "queue"):
+            for fmt in ("text", "json"):
+                log_file = os.path.join(tmp, f"{mode}-{fmt}.log")
+                caller, total, n = run_once(mode, fmt, args.calls, args.threads, log_file)
+                print(f"{mode:<6} {fmt:<5}: {caller / n * 1e6:6.2f}us/call on caller  "
+                      f"(drained in {total:.2f}s, {os.path.getsize(log_file) / 1e6:.1f}MB)")
+    configure_logging()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+端到端离线基准：本地 RSS 源 + OpenAI / X / Telegram 假服务，
+驱动 Ingestor -> Processor -> MediaStudio -> PublishManager，
+输出吞吐 (items/sec)、各阶段 p50/p95/p99 延迟和峰值 RSS 到 JSON 文件，方便在版本之间 diff。
+
+用法: python -m benchmarks.bench_pipeline --feeds 20 --items-per-feed 10 --concurrency 8 \
+          --llm-delay 0.2 --image-delay 0.5 --output bench_results.json
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fake_services import FakeServices, redirect_session
+from benchmarks.feed_server import FeedServer
+
+STAGES = ("ingest", "process", "image", "publish", "item")
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    # nearest-rank
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def summarize(values):
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "mean": round(sum(values) / len(values), 6),
+        "p50": round(percentile(values, 50), 6),
+        "p95": round(percentile(values, 95), 6),
+        "p99": round(percentile(values, 99), 6),
+        "max": round(max(values), 6),
+    }
+
+
+def peak_rss_mb():
+    """进程峰值内存 (MB)。resource 只在 Unix 上有；Windows 上装了 psutil 时用峰值工作集，否则返回 None"""
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        peak = getattr(psutil.Process().memory_info(), "peak_wset", None)
+        return round(peak / (1024 * 1024), 1) if peak is not None else None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 单位为 KB，macOS 为字节
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_config(args, feed_urls, services, workdir):
+    """与 config/config.yaml 同结构的配置，所有缓存和状态都写到临时目录"""
+    return {
+        "pipeline": {"enable_ingestor": True, "enable_processor": True,
+                     "enable_image_gen": args.images, "enable_publisher": True},
+        "modules": {
+            "ingestor": {
+                "enable_rss": True,
+                "rss_urls": feed_urls,
+                "keywords": [],
+                "max_entries_per_feed": args.items_per_feed,
+                "fetch_workers": 16,
+                "per_host_limit": 16,  # 所有源都在同一个本地 host 上
+                "feed_timeout": 15,
+            },
+            "processor": {
+                "provider": "openai",
+                "model": "gpt-4o-mini",
+                "base_url": services.openai_base_url,
+                "temperature": 0.7,
+                "system_prompt": "Return ONLY a JSON object with caption, image_prompt and tags.",
+                "rate_limit": {"max_concurrency": args.concurrency * 2, "max_retries": 0},
+            },
+            "media_studio": {
+                "image": {
+                    "provider": "openai",
+                    "model": "dall-e-3",
+                    "base_url": services.openai_base_url,
+                    "resolution": "1024x1024",
+                    "save_dir": os.path.join(workdir, "images"),
+                    "response_format": args.image_format,
+                    "rate_limit": {"max_concurrency": args.concurrency * 2, "max_retries": 0},
+                },
+            },
+            "publish_channels": {
+                "twitter": {"enabled": "twitter" in args.channels, "post_image": args.images,
+                            "timeout": 30, "rate_limit": {"max_concurrency": args.concurrency * 2}},
+                "telegram": {"enabled": "telegram" in args.channels, "chat_id": "@bench",
+                             "api_base": services.base_url, "timeout": 30},
+            },
+        },
+    }
+
+
+def point_publishers_at(manager, services):
+    """tweepy 把域名写死在代码里，在它的 Session 上挂改写 host 的 adapter"""
+    twitter = [p for c, p in manager.active_publishers.items() if manager.channel_platforms[c] == "twitter"]
+    for publisher in twitter:
+        redirect_session(publisher.client.session, services.base_url)
+        redirect_session(publisher.api_v1.session, services.base_url)
+
+
+def run(args):
+    # 假凭证，只为通过各适配器的初始化检查
+    for name in ("OPENAI_API_KEY", "X_API_KEY", "X_API_SECRET", "X_ACCESS_TOKEN",
+                 "X_ACCESS_TOKEN_SECRET", "TG_BOT_TOKEN"):
+        os.environ.setdefault(name, "bench-" + name.lower())
+
+    from core.ingestor import Ingestor
+    from core.processor import Processor
+    from core.media_studio import MediaStudio
+    from core.publisher import PublishManager
+    from core.providers.base_adapter import is_error_result
+
+    delays = {"chat": args.llm_delay, "images": args.image_delay, "download": args.image_delay / 5,
+              "x_media": args.publish_delay, "x_tweet": args.publish_delay, "telegram": args.publish_delay}
+    timings = {stage: [] for stage in STAGES}
+    errors = {stage: 0 for stage in STAGES}
+
+    with FeedServer() as feeds, FakeServices(delays) as services, tempfile.TemporaryDirectory() as workdir:
+        feed_urls = [feeds.url(i, delay=args.feed_delay, items=args.items_per_feed) for i in range(args.feeds)]
+        config = build_config(args, feed_urls, services, workdir)
+        modules = config["modules"]
+
+        ingestor = Ingestor(modules["ingestor"])
+        processor = Processor(modules["processor"], modules["publish_channels"])
+        studio = MediaStudio(modules["media_studio"]["image"]) if args.images else None
+        publisher = PublishManager(config)
+        point_publishers_at(publisher, services)
+
+        def timed(stage, fn, *fn_args):
+            start = time.perf_counter()
+            try:
+                return fn(*fn_args)
+            except Exception:
+                errors[stage] += 1
+                raise
+            finally:
+                timings[stage].append(time.perf_counter() - start)
+
+        def handle(item):
+            start = time.perf_counter()
+            content = timed("process", processor.process, processor.prepare_input(item))
+            if not content or "caption" not in content or is_error_result(content):
+                errors["process"] += 1
+                return
+            image_path = timed("image", studio.create_visual, content["image_prompt"]) if studio else None
+            results = timed("publish", publisher.broadcast,
+                            {"caption": content["caption"], "image_path": image_path, "tags": content["tags"],
+                             "variants": content.get("variants", {})})
+            if not all(r["success"] for r in results.values()):
+                errors["publish"] += 1
+            timings["item"].append(time.perf_counter() - start)
+
+        wall_start = time.perf_counter()
+        items = timed("ingest", ingestor.fetch)[:args.max_items or None]
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            for future in [pool.submit(handle, item) for item in items]:
+                try:
+                    future.result()
+                except Exception:
+                    pass
+        elapsed = time.perf_counter() - wall_start
+        requests_served = dict(services.counts)
+
+    completed = len(timings["item"])
+    return {
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "params": {k: v for k, v in vars(args).items() if k != "output"},
+        "items": len(items),
+        "completed": completed,
+        "elapsed_s": round(elapsed, 3),
+        "items_per_sec": round(completed / elapsed, 3) if elapsed else None,
+        "stages": {stage: summarize(values) for stage, values in timings.items()},
+        "errors": errors,
+        "requests_served": requests_served,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--feeds", type=int, default=10)
+    parser.add_argument("--items-per-feed", type=int, default=10)
+    parser.add_argument("--max-items", type=int, default=0, help="最多处理的条目数，0 为不限")
+    parser.add_argument("--concurrency", type=int, default=8, help="同时在途的条目数")
+    parser.add_argument("--feed-delay", type=float, default=0.05)
+    parser.add_argument("--llm-delay", type=float, default=0.2)
+    parser.add_argument("--image-delay", type=float, default=0.5)
+    parser.add_argument("--publish-delay", type=float, default=0.1)
+    parser.add_argument("--image-format", choices=("url", "b64_json"), default="b64_json")
+    parser.add_argument("--no-images", dest="images", action="store_false")
+    parser.add_argument("--channels", default="twitter,telegram")
+    parser.add_argument("--output", default="bench_results.json")
+    args = parser.parse_args()
+    args.channels = [c.strip() for c in args.channels.split(",") if c.strip()]
+
+    report = run(args)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    print(f"items={report['completed']}/{report['items']}  elapsed={report['elapsed_s']}s  "
+          f"throughput={report['items_per_sec']} items/s  peak_rss={report['peak_rss_mb']}MB")
+    for stage in STAGES:
+        stats = report["stages"][stage]
+        if stats["count"]:
+            print(f"  {stage:<8} n={stats['count']:<5} p50={stats['p50'] * 1000:.0f}ms  "
+                  f"p95={stats['p95'] * 1000:.0f}ms  p99={stats['p99'] * 1000:.0f}ms")
+    print(f"report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+启动耗时基准：用一份所有阶段都关闭的配置运行 main.py，
+测量进程墙钟时间，并用 -X importtime 列出累计耗时最高的导入。
+
+用法: python -m benchmarks.bench_startup --runs 10 --top 15
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import yaml
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(ROOT, "main.py")
+
+# 所有阶段关闭：只剩解析参数、读取配置和初始化日志
+NOOP_CONFIG = {
+    "pipeline": {
+        "enable_ingestor": False,
+        "enable_processor": False,
+        "enable_image_gen": False,
+        "enable_publisher": False,
+    },
+    "journal": {"enabled": False},
+    "modules": {"ingestor": {}, "processor": {}, "media_studio": {}, "publish_channels": {}},
+}
+
+
+# 不可省略的部分：解释器启动 + 读取 .env 和配置 (yaml) + 日志处理器，作为启动耗时的参照
+REFERENCE_SCRIPT = "import yaml, logging.handlers; from dotenv import load_dotenv; load_dotenv()"
+
+
+def write_noop_config(directory):
+    """日志也写到 directory 中，不在仓库里留下 logs/bot.log"""
+    path = os.path.join(directory, "noop.yaml")
+    config = dict(NOOP_CONFIG, paths={"log_file": os.path.join(directory, "bot.log")})
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(config, f)
+    return path
+
+
+def _timed(cmd):
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"{cmd[-1]} exited with {proc.returncode}: {proc.stderr[-500:]}")
+    return elapsed, proc.stderr
+
+
+def run_once(config_path, importtime=False):
+    """返回 (墙钟秒数, stderr)"""
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ["-X", "importtime"]
+    return _timed(cmd + [MAIN, "--config", config_path])
+
+
+def run_reference():
+    """同一台机器上参照进程的墙钟秒数，用来换算与机器快慢无关的启动开销"""
+    return _timed([sys.executable, "-c", REFERENCE_SCRIPT])[0]
+
+
+def top_imports(stderr, top=15):
+    """解析 -X importtime 输出，按累计耗时 (微秒) 排序"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # 格式: "import time:  self [us] | cumulative | imported package"
+        self_us, cumulative_us, name = [part.strip() for part in line[len("import time:"):].split("|")]
+        rows.append((int(cumulative_us), int(self_us), name))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config_path = write_noop_config(tmp)
+        run_once(config_path)  # 预热 .pyc 缓存
+        timings = [run_once(config_path)[0] for _ in range(args.runs)]
+        reference = min(run_reference() for _ in range(args.runs))
+        _, stderr = run_once(config_path, importtime=True)
+
+    print(f"wall clock: median {statistics.median(timings) * 1000:.0f}ms  "
+          f"min {min(timings) * 1000:.0f}ms  max {max(timings) * 1000:.0f}ms  (runs={args.runs})")
+    print(f"reference ({REFERENCE_SCRIPT}): min {reference * 1000:.0f}ms  "
+          f"ratio {min(timings) / reference:.2f}x")
+    print(f"{'cumulative':>12} {'self':>10}  module")
+    for cumulative_us, self_us, name in top_imports(stderr, args.top):
+        print(f"{cumulative_us / 1000:>10.1f}ms {self_us / 1000:>8.1f}ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+本地假服务：OpenAI 兼容的 chat / images 接口、X (Twitter) 和 Telegram Bot API 桩。
+与 feed_server.FeedServer 一样在后台线程运行，用于离线基准和测试。
+"""
+import base64
+import itertools
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 1x1 透明 PNG，作为生成的图片返回
+TINY_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=="
+)
+
+
+def fake_content(text, channels=()):
+    """按 system_prompt 约定的结构返回内容；channels 为多平台模式下要求的渠道"""
+    title = text.split("\n", 1)[0][:60]
+    content = {
+        "caption": f"Breaking: {title}",
+        "image_prompt": f"A photorealistic illustration of {title}",
+        "tags": ["#AI", "#News", "#Bench"],
+    }
+    if channels:
+        content["variants"] = {channel: f"[{channel}] {title}" for channel in channels}
+    return content
+
+
+class FakeServiceHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        path = self.path.split("?", 1)[0]
+
+        if path.endswith("/chat/completions"):
+            route, payload = "chat", self._chat(json.loads(body))
+        elif path.endswith("/images/generations"):
+            route, payload = "images", self._images(json.loads(body))
+        elif path == "/1.1/media/upload.json":
+            route, payload = "x_media", self._x_media()
+        elif path == "/2/tweets":
+            route, payload = "x_tweet", self._x_tweet(json.loads(body))
+        elif path.startswith("/bot"):
+            route, payload = "telegram", self._telegram(path.rsplit("/", 1)[-1])
+        else:
+            self._send(404, {"error": {"message": f"unknown route {path}"}})
+            return
+
+        self.server.services.hit(route)
+        self._send(201 if route == "x_tweet" else 200, payload)
+
+    def _send(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        try:
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # 客户端已超时断开 (注入延迟大于客户端超时)
+
+    def _chat(self, request):
+        messages = request.get("messages", [])
+        system = messages[0]["content"] if messages else ""
+        user = messages[-1]["content"] if messages else ""
+        raw = user.split("\n", 1)[1] if "\n" in user else user
+        channels = re.findall(r'^- "([^"]+)":', system, re.MULTILINE)
+        if '"results"' in system:
+            # Processor 打包模式：按 id 逐条返回
+            entries = json.loads(raw)
+            content = {"results": [dict(fake_content(e["content"], channels), id=e["id"]) for e in entries]}
+        else:
+            content = fake_content(raw, channels)
+        prompt_tokens = (len(system) + len(user)) // 4
+        completion_tokens = len(json.dumps(content)) // 4
+        return {
+            "id": f"chatcmpl-{self.server.services.next_id()}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "gpt-4o-mini"),
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": json.dumps(content)},
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    def _images(self, request):
+        image = {"revised_prompt": request.get("prompt", "")}
+        if request.get("response_format") == "b64_json":
+            image["b64_json"] = base64.b64encode(TINY_PNG).decode("ascii")
+        else:
+            host, port = self.server.server_address[:2]
+            image["url"] = f"http://{host}:{port}/files/image.png"
+        return {"created": int(time.time()), "data": [image]}
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] == "/files/image.png":
+            self.server.services.hit("download")
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", str(len(TINY_PNG)))
+            self.end_headers()
+            self.wfile.write(TINY_PNG)
+            return
+        self._send(404, {"error": "not found"})
+
+    def _x_media(self):
+        media_id = self.server.services.next_id()
+        return {"media_id": media_id, "media_id_string": str(media_id), "size": len(TINY_PNG)}
+
+    def _x_tweet(self, request):
+        tweet_id = str(self.server.services.next_id())
+        return {"data": {"id": tweet_id, "text": request.get("text", ""), "edit_history_tweet_ids": [tweet_id]}}
+
+    def _telegram(self, method):
+        services = self.server.services
+        services.count(f"telegram.{method}")
+        if self.headers.get("Content-Type", "").startswith("multipart/form-data"):
+            services.count("telegram.upload")  # 上传了文件，而不是复用 file_id
+        message_id = services.next_id()
+        result = {"message_id": message_id, "date": int(time.time()), "chat": {"id": -100, "type": "channel"}}
+        if method == "sendPhoto":
+            result["photo"] = [{"file_id": f"photo-{message_id}", "file_unique_id": f"u{message_id}",
+                                "width": 1, "height": 1}]
+        return {"ok": True, "result": result}
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeServices:
+    """
+    所有假接口共用一个本地 HTTP 服务器。
+    delays 为各路由注入的延迟 (秒): chat / images / x_media / x_tweet / telegram / download
+    """
+    def __init__(self, delays=None, host="127.0.0.1", port=0):
+        self.delays = delays or {}
+        self.counts = {}
+        self._ids = itertools.count(1000)
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), FakeServiceHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.services = self
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def count(self, route):
+        with self._lock:
+            self.counts[route] = self.counts.get(route, 0) + 1
+
+    def hit(self, route):
+        self.count(route)
+        delay = self.delays.get(route, 0)
+        if delay:
+            time.sleep(delay)
+
+    def next_id(self):
+        with self._lock:
+            return next(self._ids)
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def openai_base_url(self):
+        return f"{self.base_url}/v1"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def redirect_session(session, target_base_url, hosts=("api.twitter.com", "upload.twitter.com")):
+    """
+    在 requests.Session 上挂一个改写 host 的 transport adapter，
+    让 tweepy 等硬编码了域名的客户端把请求发到本地桩服务。
+    """
+    from urllib.parse import urlsplit, urlunsplit
+    from requests.adapters import HTTPAdapter
+
+    target = urlsplit(target_base_url)
+
+    class RedirectAdapter(HTTPAdapter):
+        def send(self, request, **kwargs):
+            parts = urlsplit(request.url)
+            request.url = urlunsplit((target.scheme, target.netloc, parts.path, parts.query, parts.fragment))
+            return super().send(request, **kwargs)
+
+    adapter = RedirectAdapter()
+    for host in hosts:
+        session.mount(f"https://{host}/", adapter)
+    return session
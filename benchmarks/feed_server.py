@@ -0,0 +1,85 @@
+import hashlib
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+def build_rss(feed_id, n_items=20):
+    """生成一个简单的 RSS 2.0 文档"""
+    items = "".join(
+        f"<item><title>Feed {feed_id} AI story {i}</title>"
+        f"<link>http://example.com/{feed_id}/{i}</link>"
+        f"<description>Summary of story {i} from feed {feed_id}.</description>"
+        f"<pubDate>Mon, 06 Jan 2025 10:{i % 60:02d}:00 GMT</pubDate></item>"
+        for i in range(n_items)
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        f'<rss version="2.0"><channel><title>Feed {feed_id}</title>{items}</channel></rss>'
+    ).encode("utf-8")
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    """
+    GET /feed/<id>?delay=0.5&items=20&drip=0.1
+    delay 为注入的响应延迟 (秒)；drip 大于 0 时每隔 drip 秒只发送 64 字节，模拟慢速服务器；
+    支持 If-None-Match，内容未变化时返回 304
+    """
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        query = parse_qs(parsed.query)
+        delay = float(query.get('delay', ['0'])[0])
+        n_items = int(query.get('items', ['20'])[0])
+        drip = float(query.get('drip', ['0'])[0])
+        feed_id = parsed.path.rstrip('/').split('/')[-1]
+
+        if delay:
+            time.sleep(delay)
+        body = build_rss(feed_id, n_items)
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Type", "application/rss+xml")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if not drip:
+            self.wfile.write(body)
+            return
+        for i in range(0, len(body), 64):
+            self.wfile.write(body[i:i + 64])
+            self.wfile.flush()
+            time.sleep(drip)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FeedServer:
+    """在后台线程中运行的本地 RSS 服务器"""
+    def __init__(self, host="127.0.0.1", port=0):
+        self.httpd = ThreadingHTTPServer((host, port), FeedHandler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def url(self, feed_id, delay=0.0, items=20, drip=0.0):
+        return f"{self.base_url}/feed/{feed_id}?delay={delay}&items={items}&drip={drip}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
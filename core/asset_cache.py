@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Optional
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", (text or "").strip().lower())
+
+
+class AssetCache:
+    """
+    Prompt-keyed image cache stored next to the images in save_dir.
+    The index is a JSON file that survives restarts; entries are evicted by age and
+    by the total size of cached images (least recently used first).
+    Hits only touch last_used in memory; the index is written on puts and evictions,
+    and flush() persists pending recency updates.
+    """
+    INDEX_NAME = ".asset_index.json"
+
+    def __init__(self, save_dir: str, max_bytes: int = 500 * 1024 * 1024, max_age: float = 30 * 86400):
+        self.save_dir = save_dir
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.index_path = os.path.join(save_dir, self.INDEX_NAME)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+
+        if not os.path.exists(save_dir):
+            os.makedirs(save_dir)
+        self._entries = self._load()
+        with self._lock:
+            if self._evict():
+                self._save()
+
+    @staticmethod
+    def make_key(prompt: str, quality_enhancers: str, model: str, resolution: str) -> str:
+        """Normalize case and whitespace so trivially different prompts share an entry."""
+        payload = json.dumps([_normalize(prompt), _normalize(quality_enhancers), model, resolution])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and time.time() - entry["created"] < self.max_age and os.path.exists(entry["path"]):
+                entry["last_used"] = time.time()
+                self.hits += 1
+                self._dirty = True
+                return entry["path"]
+            if entry:
+                # Expired or deleted from disk behind our back
+                self._drop(key)
+                self._save()
+            self.misses += 1
+            return None
+
+    def put(self, key: str, path: str):
+        if not path or not os.path.exists(path):
+            return
+        now = time.time()
+        with self._lock:
+            self._entries[key] = {
+                "path": path,
+                "size": os.path.getsize(path),
+                "created": now,
+                "last_used": now,
+            }
+            self._evict()
+            self._save()
+
+    def flush(self):
+        """Persist last_used updates from hits that have not been written yet."""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._total_bytes(),
+            }
+
+    def _total_bytes(self) -> int:
+        # Several prompts can resolve to the same content-addressed file; count it once
+        return sum({e["path"]: e["size"] for e in self._entries.values()}.values())
+
+    def _evict(self) -> bool:
+        """Drop expired and over-budget entries; returns whether anything was dropped."""
+        now = time.time()
+        expired = [k for k, e in self._entries.items() if now - e["created"] >= self.max_age]
+        for key in expired:
+            self._drop(key)
+        by_last_used = sorted(self._entries, key=lambda k: self._entries[k]["last_used"])
+        dropped = bool(expired)
+        while by_last_used and self._total_bytes() > self.max_bytes:
+            self._drop(by_last_used.pop(0))
+            dropped = True
+        return dropped
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key)
+        still_used = any(e["path"] == entry["path"] for e in self._entries.values())
+        if not still_used and os.path.exists(entry["path"]):
+            os.remove(entry["path"])
+
+    def _load(self) -> dict:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save(self):
+        # Atomic replace so a crash never leaves a truncated index
+        fd, tmp_path = tempfile.mkstemp(dir=self.save_dir, suffix=".part")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f)
+        os.replace(tmp_path, self.index_path)
+        self._dirty = False
@@ -0,0 +1,312 @@
+import queue
+import signal
+import threading
+from core.ingestor import Ingestor
+from core.processor import Processor
+from core.media_studio import MediaStudio
+from core.publisher import PublishManager
+from core.derivatives import DerivativeBuilder
+from core.providers.base_adapter import is_error_result
+from core.metrics import configure, get_metrics
+from core.journal import RunJournal, open_journal
+from core.seen_index import item_keys
+from utils.logger import logger, correlation
+
+# 队列中的结束标记
+_STOP = object()
+
+
+class PipelineDaemon:
+    """
+    常驻流水线：采集 -> 生成 -> 配图 -> 分发 四个阶段各自运行，
+    阶段之间用有界队列连接。下游处理不过来时队列写满，采集线程被阻塞，形成背压。
+    收到 SIGTERM / SIGINT 后停止采集，已入队的条目处理完再退出。
+    开启运行日志时各阶段记录进度，重启后未完成的条目从断点继续。
+    """
+    def __init__(self, config):
+        self.config = config
+        pipeline = config['pipeline']
+        daemon_config = config.get('daemon', {})
+
+        self.poll_interval = daemon_config.get('poll_interval', 600)
+        # 生成阶段每次从队列取出最多 batch_size 条，交给 Processor.process_batch 并发 (或打包) 处理
+        self.batch_size = max(1, daemon_config.get('batch_size', 5))
+        self.packed = daemon_config.get('packed', False)
+        queue_size = daemon_config.get('queue_size', 20)
+        workers = daemon_config.get('workers', {})
+        self.workers = {
+            'process': workers.get('process', 2),
+            'image': workers.get('image', 1),
+            'publish': workers.get('publish', 1),
+        }
+
+        configure(config.get('metrics'))
+        # 各阶段的客户端只在启动时创建一次；采集或生成关闭时常驻模式无事可做，不创建任何客户端
+        self.enabled = pipeline.get('enable_ingestor', True) and pipeline.get('enable_processor', True)
+        self.ingestor = self.processor = self.studio = self.publisher = self.derivatives = None
+        self.journal = None
+        if self.enabled:
+            self._load_stages(config)
+            self.journal = open_journal(config)
+
+        self.queues = {
+            'process': queue.Queue(maxsize=queue_size),
+            'image': queue.Queue(maxsize=queue_size),
+            'publish': queue.Queue(maxsize=queue_size),
+        }
+        self._stop = threading.Event()
+        self._threads = {}
+        # 在途条目: {item_id: 去重键}。已入队但尚未被标记为已处理的条目再次被采集到时不重复入队
+        self._inflight = {}
+        self._inflight_keys = set()
+        self._inflight_lock = threading.Lock()
+
+    def _load_stages(self, config):
+        pipeline = config['pipeline']
+        modules = config['modules']
+        self.ingestor = Ingestor(modules['ingestor'])
+        channels = modules.get('publish_channels', {}) if pipeline.get('enable_publisher') else {}
+        self.processor = Processor(modules['processor'], channels)
+        image_config = modules.get('media_studio', {}).get('image')
+        self.studio = None
+        if pipeline.get('enable_image_gen') and image_config:
+            self.studio = MediaStudio(image_config)
+        self.publisher = PublishManager(config) if pipeline.get('enable_publisher') else None
+        derivative_config = modules.get('media_studio', {}).get('derivatives', {})
+        self.derivatives = None
+        if self.publisher and derivative_config.get('enabled'):
+            self.derivatives = DerivativeBuilder(modules.get('publish_channels', {}), derivative_config)
+
+    def stop(self, *_):
+        if not self._stop.is_set():
+            logger.info("收到停止信号，停止采集并等待在途任务完成...")
+            self._stop.set()
+
+    def _admit(self, item):
+        """登记在途条目并写入 item_id；同一条目 (链接或内容指纹相同) 已在途时返回 False"""
+        keys = item_keys(item)
+        item_id = RunJournal.item_id_for(item)
+        with self._inflight_lock:
+            if item_id in self._inflight or any(key in self._inflight_keys for key in keys):
+                return False
+            self._inflight[item_id] = keys
+            self._inflight_keys.update(keys)
+        item['item_id'] = item_id
+        return True
+
+    def _enqueue(self, item, entry=None):
+        """
+        把已登记的条目送入流水线：新条目进入生成阶段，
+        运行日志中已生成内容或图片的条目直接进入后续阶段。写入被放弃时返回 False
+        """
+        item_id = item['item_id']
+        if self.journal and entry is None:
+            entry = self.journal.get(self.journal.begin(item))
+            if entry['stage'] in ('done', 'failed'):
+                self._release(item_id)
+                return True
+        if not entry or not entry['content']:
+            return self._put('process', item)
+
+        logger.info(f"恢复未完成的任务 {item_id} (阶段: {entry['stage']})")
+        self.ingestor.mark_processed([item])
+        bundle = self._bundle(item_id, entry['content'])
+        if entry['stage'] == 'image':
+            bundle.pop('image_prompt')
+            bundle['image_path'], bundle['image_paths'] = entry['image_path'], entry['image_paths']
+            return self._forward('publish', bundle)
+        return self._forward('image', bundle)
+
+    def _forward(self, stage, bundle):
+        """送往下一阶段；没有下一阶段时条目到此完成"""
+        if stage == 'image' and self.studio:
+            return self._put('image', bundle)
+        if self.publisher:
+            return self._put('publish', bundle)
+        if self.journal:
+            self.journal.complete(bundle['item_id'])
+        self._release(bundle['item_id'])
+        return True
+
+    def _resume(self):
+        """启动时把运行日志中未完成的条目重新送入流水线"""
+        for entry in self.journal.pending():
+            item = entry['raw']
+            if not isinstance(item, dict):
+                continue  # 单次运行模式按批记录的条目由 run_bot 恢复
+            if self._admit(item) and not self._enqueue(item, entry):
+                self._release(item['item_id'])
+                return
+
+    def _release(self, item_id):
+        """条目离开流水线 (完成或失败) 时调用"""
+        with self._inflight_lock:
+            self._inflight_keys.difference_update(self._inflight.pop(item_id, ()))
+
+    def run(self):
+        if not self.enabled:
+            logger.warning("pipeline.enable_ingestor / enable_processor 已关闭，常驻模式无事可做，退出。")
+            return
+        # 退出时恢复原来的信号处理，避免影响嵌入本进程的调用方
+        previous = {sig: signal.signal(sig, self.stop) for sig in (signal.SIGTERM, signal.SIGINT)}
+
+        targets = {
+            'process': (self._process_worker, ()),
+            'image': (self._worker, ('image', self._image)),
+            'publish': (self._worker, ('publish', self._publish)),
+        }
+        for stage, (target, args) in targets.items():
+            self._threads[stage] = [
+                threading.Thread(target=target, args=args, name=f"{stage}-{i}", daemon=True)
+                for i in range(self.workers[stage])
+            ]
+            for thread in self._threads[stage]:
+                thread.start()
+        logger.info(f"--- OpenContentBot 常驻模式启动 (workers: {self.workers}) ---")
+        if self.journal:
+            self._resume()
+
+        while not self._stop.is_set():
+            try:
+                items = self.ingestor.fetch()
+            except Exception as e:
+                logger.error(f"采集失败: {e}")
+                items = []
+            duplicates = 0
+            for item in items:
+                if not self._admit(item):
+                    duplicates += 1
+                    continue
+                if not self._enqueue(item):
+                    self._release(item['item_id'])
+                    break
+            if duplicates:
+                logger.info(f"跳过 {duplicates} 条仍在处理中的条目")
+            get_metrics().export()
+            self._stop.wait(self.poll_interval)
+
+        self._drain()
+        get_metrics().export()
+        if self.studio:
+            self.studio.close()
+        if self.derivatives:
+            self.derivatives.close()
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+        logger.info("--- 常驻模式已退出 ---")
+
+    def _put(self, stage, item):
+        """
+        阻塞写入下一阶段队列 (背压)。
+        只有采集线程在停止后放弃写入，已进入流水线的条目总会被送达下游。
+        """
+        if threading.current_thread() is not threading.main_thread():
+            self.queues[stage].put(item)
+            return True
+        while not self._stop.is_set():
+            try:
+                self.queues[stage].put(item, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _drain(self):
+        # 按阶段顺序发送结束标记：上游全部退出后，下游才会收到，保证在途条目处理完
+        for stage in ('process', 'image', 'publish'):
+            for _ in self._threads[stage]:
+                self.queues[stage].put(_STOP)
+            for thread in self._threads[stage]:
+                thread.join()
+
+    def _worker(self, stage, handler):
+        q = self.queues[stage]
+        while True:
+            item = q.get()
+            if item is _STOP:
+                break
+            # 采集条目在进入流水线时生成 ID，后续阶段沿用 bundle 中的 item_id
+            item_id = item.get('item_id') or RunJournal.item_id_for(item)
+            with correlation(item_id):
+                try:
+                    handler(item)
+                except Exception as e:
+                    logger.error(f"[{stage}] 处理失败: {e}")
+                    self._release(item_id)
+
+    def _process_worker(self):
+        """生成阶段：取到一条后顺带取走队列中已有的条目，凑成一批处理"""
+        q = self.queues['process']
+        while True:
+            item = q.get()
+            if item is _STOP:
+                break
+            batch, stop = [item], False
+            while len(batch) < self.batch_size:
+                try:
+                    item = q.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True  # 本线程的结束标记，处理完这一批后退出
+                    break
+                batch.append(item)
+            try:
+                self._process_batch(batch)
+            except Exception as e:
+                logger.error(f"[process] 处理失败: {e}")
+                for item in batch:
+                    self._release(item['item_id'])
+            if stop:
+                break
+
+    def _process_batch(self, items):
+        results = self.processor.process_batch(items, packed=self.packed)
+        for item, result in zip(items, results):
+            with correlation(item['item_id']):
+                try:
+                    self._process(item, result)
+                except Exception as e:
+                    logger.error(f"[process] 处理失败: {e}")
+                    self._release(item['item_id'])
+
+    def _process(self, item, result):
+        ai_content = result['content']
+        if not result['ok'] or is_error_result(ai_content):
+            logger.error(f"AI 内容生成失败: {result['error']}")
+            self._release(item['item_id'])
+            return
+        if self.journal:
+            self.journal.record_processed(item['item_id'], ai_content)
+        self.ingestor.mark_processed([item])
+        self._forward('image', self._bundle(item['item_id'], ai_content))
+
+    @staticmethod
+    def _bundle(item_id, ai_content):
+        return {
+            "item_id": item_id,
+            "caption": ai_content.get('caption', ''),
+            "image_prompt": ai_content.get('image_prompt', ''),
+            "image_path": None,
+            "image_paths": {},
+            "tags": ai_content.get('tags', []),
+            "variants": ai_content.get('variants', {})
+        }
+
+    def _image(self, bundle):
+        bundle['image_path'] = self.studio.create_visual(bundle.pop('image_prompt', ''))
+        if self.derivatives and bundle['image_path']:
+            bundle['image_paths'] = self.derivatives.build(bundle['image_path'])
+        if self.journal:
+            self.journal.record_image(bundle['item_id'], bundle['image_path'], bundle['image_paths'])
+        self._forward('publish', bundle)
+
+    def _publish(self, bundle):
+        bundle.pop('image_prompt', None)
+        try:
+            if self.journal:
+                self.journal.publish(self.publisher, bundle['item_id'], bundle)
+            else:
+                self.publisher.broadcast(bundle)
+        finally:
+            self._release(bundle['item_id'])
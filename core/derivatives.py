@@ -0,0 +1,150 @@
+import hashlib
+import importlib.util
+import io
+import json
+import multiprocessing
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from utils.logger import logger
+
+# Per-platform defaults, overridable with an `image:` block under each publish channel
+DEFAULT_SPECS = {
+    "twitter": {"format": "JPEG", "max_side": 2048, "target_kb": 900, "quality": 90},
+    "telegram": {"format": "JPEG", "max_side": 1280, "target_kb": 800, "quality": 90},
+    "instagram": {"format": "JPEG", "size": [1080, 1080], "target_kb": 1500, "quality": 92},
+}
+# Instagram stories / reels need a 9:16 crop
+STORY_SPEC = {"format": "JPEG", "size": [1080, 1920], "target_kb": 1500, "quality": 92}
+EXTENSIONS = {"JPEG": "jpg", "WEBP": "webp", "PNG": "png"}
+
+
+def _fit(img, spec):
+    """Center-crop to the requested size, or shrink so the longest side fits max_side."""
+    from PIL import Image
+    if spec.get("size"):
+        width, height = spec["size"]
+        scale = max(width / img.width, height / img.height)
+        img = img.resize((round(img.width * scale), round(img.height * scale)), Image.LANCZOS)
+        left, top = (img.width - width) // 2, (img.height - height) // 2
+        return img.crop((left, top, left + width, top + height))
+    max_side = spec.get("max_side")
+    if max_side and max(img.size) > max_side:
+        img = img.copy()
+        img.thumbnail((max_side, max_side), Image.LANCZOS)
+    return img
+
+
+def encode_derivative(src_path, dst_path, spec):
+    """
+    Runs in a worker process. Re-encodes src into dst, lowering quality step by step
+    until the output fits target_kb (or the quality floor is reached).
+    """
+    from PIL import Image  # imported in the worker so the parent process never pays for it
+    fmt = spec.get("format", "JPEG").upper()
+    with Image.open(src_path) as img:
+        img = _fit(img.convert("RGB") if fmt == "JPEG" else img, spec)
+        quality = spec.get("quality", 90)
+        target = spec.get("target_kb", 0) * 1024
+        while True:
+            buffer = io.BytesIO()
+            img.save(buffer, fmt, quality=quality, optimize=True)
+            if not target or buffer.tell() <= target or quality <= 40:
+                break
+            quality -= 10
+
+    # Unique temp file per encoder: builders in other processes may write the same target concurrently
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(dst_path) or ".", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(buffer.getvalue())
+        os.replace(tmp_path, dst_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return dst_path
+
+
+class DerivativeBuilder:
+    """
+    Produces per-channel image variants between MediaStudio and PublishManager.
+    Encoding runs on a process pool; outputs are cached by (source hash, target spec)
+    so each variant is encoded only once.
+    """
+    def __init__(self, publish_channels, config):
+        self.save_dir = config.get("save_dir", "data/output/derivatives/")
+        self.max_workers = config.get("workers", 2)
+        self.specs = {}
+        for channel, settings in publish_channels.items():
+            if settings.get("enabled"):
+                self.specs[channel] = self._spec_for(channel, settings)
+        self._pool = None
+
+        if not os.path.exists(self.save_dir):
+            os.makedirs(self.save_dir)
+
+    @staticmethod
+    def _spec_for(channel, settings):
+        platform = settings.get("platform", channel)
+        if platform == "instagram" and settings.get("post_type") in ("story", "reels"):
+            spec = dict(STORY_SPEC)
+        else:
+            spec = dict(DEFAULT_SPECS.get(platform, {"format": "JPEG", "max_side": 2048, "quality": 90}))
+        spec.update(settings.get("image", {}))
+        return spec
+
+    @staticmethod
+    def _file_hash(path):
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(64 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _target_path(self, src_hash, spec):
+        spec_hash = hashlib.sha256(json.dumps(spec, sort_keys=True).encode("utf-8")).hexdigest()
+        ext = EXTENSIONS.get(spec.get("format", "JPEG").upper(), "img")
+        return os.path.join(self.save_dir, f"{src_hash[:16]}_{spec_hash[:12]}.{ext}")
+
+    def build(self, image_path):
+        """Returns {channel: derivative path}; channels fall back to the original on failure."""
+        if not image_path or not os.path.exists(image_path) or not self.specs:
+            return {}
+        # Pillow is optional; without it every platform gets the original file
+        if importlib.util.find_spec("PIL") is None:
+            logger.warning("Pillow is not installed, publishing the original image everywhere.")
+            return {channel: image_path for channel in self.specs}
+
+        src_hash = self._file_hash(image_path)
+        targets = {channel: self._target_path(src_hash, spec) for channel, spec in self.specs.items()}
+
+        # Several channels may share a spec; encode each distinct target once
+        pending = {}
+        for channel, target in targets.items():
+            if not os.path.exists(target) and target not in pending:
+                pending[target] = self.specs[channel]
+
+        if pending:
+            if self._pool is None:
+                # spawn: forking a process that runs feed / publisher threads can copy held locks
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+            futures = {
+                target: self._pool.submit(encode_derivative, image_path, target, spec)
+                for target, spec in pending.items()
+            }
+            for target, future in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    logger.error(f"Derivative encoding failed for {target}: {e}")
+
+        return {
+            channel: target if os.path.exists(target) else image_path
+            for channel, target in targets.items()
+        }
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
@@ -0,0 +1,95 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class FeedCache:
+    """
+    订阅源条件请求缓存 (ETag / Last-Modified)：
+    按 URL 持久化校验头和上次解析出的条目，服务器返回 304 时直接复用，跳过下载和解析
+    """
+    def __init__(self, path="data/cache/feeds.db"):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        # 抓取在多个线程中进行，共用一个连接并加锁
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS feeds ("
+                " url TEXT PRIMARY KEY,"
+                " etag TEXT,"
+                " last_modified TEXT,"
+                " entries TEXT NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+
+        self.requests = 0
+        self.not_modified = 0
+        self.cache_hits = 0
+
+    def request_headers(self, url):
+        """为 url 生成条件请求头；没有缓存时返回空字典"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified FROM feeds WHERE url = ?", (url,)
+            ).fetchone()
+        headers = {}
+        if row:
+            etag, last_modified = row
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+        return headers
+
+    def lookup(self, url):
+        """返回缓存的条目列表，没有时返回 None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT entries FROM feeds WHERE url = ?", (url,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def store(self, url, headers, entries):
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        # 服务器不提供任何校验头时，缓存也无法带来 304，不必写入
+        if not etag and not last_modified:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO feeds (url, etag, last_modified, entries, updated_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (url, etag, last_modified, json.dumps(entries, ensure_ascii=False), time.time())
+            )
+            self._conn.commit()
+
+    def record(self, not_modified, hit=False):
+        """记录一次请求的结果，用于统计"""
+        with self._lock:
+            self.requests += 1
+            if not_modified:
+                self.not_modified += 1
+            if hit:
+                self.cache_hits += 1
+
+    def stats(self):
+        with self._lock:
+            total = self.requests or 1
+            return {
+                "requests": self.requests,
+                "not_modified": self.not_modified,
+                "cache_hits": self.cache_hits,
+                "not_modified_rate": self.not_modified / total,
+                "hit_rate": self.cache_hits / total,
+            }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,232 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import unquote, urlparse
+
+CHUNK_SIZE = 64 * 1024
+
+
+class FeedTimeout(Exception):
+    """单个订阅源超过截止时间"""
+    pass
+
+
+class LocalResponse:
+    """
+    本地文件源 (路径或 file:// URL) 的响应，只实现解析时用到的 status_code / headers / raise_for_status，
+    保持 feedparser.parse(url) 原先对本地文件的支持
+    """
+    status_code = 200
+
+    def __init__(self, path):
+        self.url = path
+        self.headers = {}
+        self._file = open(path, 'rb')
+
+    def iter_chunks(self):
+        return iter(lambda: self._file.read(CHUNK_SIZE), b"")
+
+    def raise_for_status(self):
+        pass
+
+    def close(self):
+        self._file.close()
+
+
+def local_path(url):
+    """非 HTTP 源返回本地路径，HTTP(S) 源返回 None"""
+    parsed = urlparse(url)
+    if parsed.scheme in ("http", "https"):
+        return None
+    if parsed.scheme == "file":
+        return unquote(parsed.path)
+    return url
+
+
+def _socket_of(response):
+    """取出响应底层的 socket，用于把单次读取的超时收紧到剩余时间；取不到时返回 None"""
+    try:
+        return response.raw._fp.fp.raw._sock
+    except AttributeError:
+        return None
+
+
+class FeedFetcher:
+    """
+    并发 RSS 抓取器：
+    - 线程池并发抓取，整轮耗时约等于最慢的那个源
+    - 每个 host 一个 Session，复用连接池
+    - 每个 host 限制同时进行的请求数，避免把同一站点打挂
+    - 每个源有独立的截止时间 (从发出请求到读完的总时长)，卡住或缓慢滴流的源会被跳过并记录，不会拖住整轮
+    - 本地文件路径和 file:// URL 直接读取
+    """
+    def __init__(self, config):
+        self.max_workers = config.get('fetch_workers', 16)
+        self.per_host_limit = config.get('per_host_limit', 4)
+        self.feed_timeout = config.get('feed_timeout', 15)
+        self.user_agent = config.get('user_agent', 'OpenContentBot/2.0')
+
+        self._sessions = {}
+        self._host_slots = {}
+        self._lock = threading.Lock()
+
+        # 最近一轮失败/超时的源: {url: 原因}
+        self.failures = {}
+        # 整轮超时后设置，仍在排队的抓取不再发出请求
+        self._abort = threading.Event()
+        self._inflight = set()
+
+    def _host_of(self, url):
+        return urlparse(url).netloc.lower()
+
+    def _session(self, host):
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                # requests 较重，只在真正抓取时才导入
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.per_host_limit)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.headers['User-Agent'] = self.user_agent
+                self._sessions[host] = session
+            return session
+
+    def _slot(self, host):
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = threading.BoundedSemaphore(self.per_host_limit)
+                self._host_slots[host] = slot
+            return slot
+
+    def _iter_chunks(self, response, deadline):
+        """
+        逐次读取已到达的数据 (read1)，每次读取前把 socket 超时收紧到剩余时间，
+        因此截止时间是总时长，不会被每次只发几个字节的慢速服务器拖过去
+        """
+        raw = getattr(response, 'raw', None)
+        if raw is None or not hasattr(raw, 'read1'):
+            # 旧版 urllib3 没有 read1：只能在块之间检查截止时间
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                yield chunk
+                if time.monotonic() > deadline:
+                    raise FeedTimeout(f"exceeded {self.feed_timeout}s")
+            return
+
+        sock = _socket_of(response)
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise FeedTimeout(f"exceeded {self.feed_timeout}s")
+            if sock is not None:
+                try:
+                    sock.settimeout(remaining)
+                except OSError:
+                    sock = None  # 响应读完后 http.client 已关闭连接
+            try:
+                chunk = raw.read1(CHUNK_SIZE, decode_content=True)
+            except Exception as e:
+                if time.monotonic() >= deadline:
+                    raise FeedTimeout(f"exceeded {self.feed_timeout}s") from e
+                raise
+            if not chunk:
+                return
+            yield chunk
+
+    def fetch_one(self, url, headers=None, consumer=None):
+        """
+        下载单个源，返回 (response, body)，body 为完整的响应字节。
+        传入 consumer(response, chunks) 时改为在连接关闭前流式消费，返回 (response, consumer 的返回值)；
+        consumer 可以只读取一部分，剩余内容不会被下载。
+        截止时间从真正发出请求开始计算，排队等待 host 名额的时间不计入。
+        """
+        path = local_path(url)
+        if path is not None:
+            response = LocalResponse(path)
+            try:
+                chunks = response.iter_chunks()
+                return response, consumer(response, chunks) if consumer is not None else b"".join(chunks)
+            finally:
+                response.close()
+
+        host = self._host_of(url)
+        with self._slot(host):
+            if self._abort.is_set():
+                raise FeedTimeout("cycle deadline reached")
+            deadline = time.monotonic() + self.feed_timeout
+            response = self._session(host).get(
+                url, headers=headers, stream=True, timeout=self.feed_timeout
+            )
+            with self._lock:
+                self._inflight.add(response)
+            try:
+                chunks = self._iter_chunks(response, deadline)
+                if consumer is not None:
+                    return response, consumer(response, chunks)
+                body = b"".join(chunks)
+            finally:
+                with self._lock:
+                    self._inflight.discard(response)
+                response.close()
+        return response, body
+
+    def fetch_all(self, urls, handler, headers_for=None, streaming=False):
+        """
+        并发抓取所有 urls，并在工作线程内调用 handler(url, response, body) 完成解析。
+        streaming=True 时 handler 收到的是分块迭代器 handler(url, response, chunks)，可以提前停止读取。
+        headers_for(url) 可为每个源提供额外请求头 (例如条件请求头)。
+        返回 {url: handler 的返回值}，失败或超时的源不在结果中，原因记录在 self.failures。
+        """
+        self.failures = {}
+        self._abort.clear()
+        if not urls:
+            return {}
+
+        def task(url):
+            headers = headers_for(url) if headers_for else None
+            if streaming:
+                return self.fetch_one(url, headers=headers,
+                                      consumer=lambda response, chunks: handler(url, response, chunks))[1]
+            response, body = self.fetch_one(url, headers=headers)
+            return handler(url, response, body)
+
+        results = {}
+        pool = ThreadPoolExecutor(max_workers=min(self.max_workers, len(urls)))
+        futures = {pool.submit(task, url): url for url in urls}
+
+        # 兜底：整轮的最长等待时间，防止 host 排队过长时一直阻塞
+        per_host = {}
+        for url in urls:
+            host = self._host_of(url)
+            per_host[host] = per_host.get(host, 0) + 1
+        waves = max(-(-n // self.per_host_limit) for n in per_host.values())
+        waves = max(waves, -(-len(urls) // self.max_workers))
+        done, not_done = wait(futures, timeout=self.feed_timeout * (waves + 1))
+
+        for future in done:
+            url = futures[future]
+            try:
+                results[url] = future.result()
+            except Exception as e:
+                self.failures[url] = f"{type(e).__name__}: {e}"
+        for future in not_done:
+            self.failures[futures[future]] = "FeedTimeout: cycle deadline reached"
+
+        if not_done:
+            # 排队中的抓取直接取消，已发出的请求关闭连接，不在后台继续下载
+            self._abort.set()
+            with self._lock:
+                inflight = list(self._inflight)
+            for response in inflight:
+                response.close()
+        pool.shutdown(wait=False, cancel_futures=True)
+        return results
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
@@ -0,0 +1,153 @@
+import heapq
+import os
+import random
+import sqlite3
+import statistics
+import threading
+import time
+
+
+class FeedScheduler:
+    """
+    自适应轮询调度：根据各源条目的发布时间估计更新频率，决定下次抓取时间。
+    - 轮询间隔限制在 [min_interval, max_interval]，并加随机抖动，避免所有源同时到期
+    - 用最小堆按到期时间排序，每轮只抓取已到期的源
+    - 状态持久化到 SQLite，重启后继续沿用学到的间隔
+    """
+    def __init__(self, path="data/cache/feed_schedule.db", min_interval=300, max_interval=86400,
+                 jitter=0.1, smoothing=0.5):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.jitter = jitter
+        self.smoothing = smoothing  # 新估计值的权重 (指数滑动平均)
+
+        # 结果在抓取线程中记录，共用一个连接并加锁
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS schedule ("
+                " url TEXT PRIMARY KEY,"
+                " interval REAL NOT NULL,"
+                " next_due REAL NOT NULL,"
+                " last_entry REAL,"
+                " last_polled REAL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+            )
+            self._conn.commit()
+            rows = self._conn.execute(
+                "SELECT url, interval, next_due, last_entry FROM schedule"
+            ).fetchall()
+
+        # url -> {"interval", "next_due", "last_entry"}
+        self._state = {url: {"interval": interval, "next_due": next_due, "last_entry": last_entry}
+                       for url, interval, next_due, last_entry in rows}
+        # (到期时间, url)；状态更新后旧的堆项不删除，出堆时与 _state 比对跳过
+        self._heap = [(state["next_due"], url) for url, state in self._state.items()]
+        heapq.heapify(self._heap)
+
+        self.polled = 0
+        self.avoided = 0
+
+    def due(self, urls, now=None):
+        """返回 urls 中已到期的源 (保持 urls 的顺序)；新加入的源立即到期"""
+        now = time.time() if now is None else now
+        wanted = set(urls)
+        with self._lock:
+            for url in urls:
+                if url not in self._state:
+                    self._state[url] = {"interval": self.min_interval, "next_due": 0.0, "last_entry": None}
+                    heapq.heappush(self._heap, (0.0, url))
+
+            due, unwanted = set(), []
+            while self._heap and self._heap[0][0] <= now:
+                next_due, url = heapq.heappop(self._heap)
+                state = self._state.get(url)
+                if state is None or state["next_due"] != next_due:
+                    continue  # 过期的堆项
+                if url not in wanted:
+                    unwanted.append((next_due, url))  # 本轮未配置的源，保留在堆中
+                    continue
+                due.add(url)
+            for entry in unwanted:
+                heapq.heappush(self._heap, entry)
+            # 出堆的源在 record() 之前不会被重复返回；先放回一个保底到期时间，防止抓取异常时丢失
+            for url in due:
+                self._state[url]["next_due"] = now + self.min_interval
+                heapq.heappush(self._heap, (self._state[url]["next_due"], url))
+
+            avoided = len(wanted) - len(due)
+            self.polled += len(due)
+            self.avoided += avoided
+            self._conn.execute(
+                "INSERT INTO counters (name, value) VALUES ('avoided', ?)"
+                " ON CONFLICT(name) DO UPDATE SET value = value + excluded.value", (avoided,)
+            )
+            self._conn.commit()
+        return [url for url in urls if url in due]
+
+    def estimate_interval(self, timestamps):
+        """条目发布时间间隔的中位数；少于两个时间戳时无法估计，返回 None"""
+        timestamps = sorted(t for t in timestamps if t)
+        if len(timestamps) < 2:
+            return None
+        gaps = [b - a for a, b in zip(timestamps, timestamps[1:]) if b > a]
+        return statistics.median(gaps) if gaps else None
+
+    def record(self, url, timestamps=(), failed=False, now=None):
+        """
+        记录一次抓取结果并安排下次抓取。
+        timestamps 为本次条目的发布时间 (epoch 秒)；没有发布时间时按是否出现新条目调整：
+        出现新条目间隔减半，没有则放大 1.5 倍
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            state = self._state.setdefault(
+                url, {"interval": self.min_interval, "next_due": 0.0, "last_entry": None}
+            )
+            interval = state["interval"]
+            newest = max((t for t in timestamps if t), default=None)
+            if not failed:
+                estimate = self.estimate_interval(timestamps)
+                has_new = newest is not None and (state["last_entry"] is None or newest > state["last_entry"])
+                if estimate is not None:
+                    interval = self.smoothing * estimate + (1 - self.smoothing) * interval
+                elif has_new:
+                    interval /= 2
+                else:
+                    interval *= 1.5
+                # 距离最新条目已经很久，说明源放慢了，间隔至少取空窗期的一半
+                if newest is not None and not has_new:
+                    interval = max(interval, (now - newest) / 2)
+            interval = min(max(interval, self.min_interval), self.max_interval)
+
+            next_due = now + interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+            state.update(interval=interval, next_due=next_due,
+                         last_entry=max(filter(None, [state["last_entry"], newest]), default=None))
+            heapq.heappush(self._heap, (next_due, url))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO schedule (url, interval, next_due, last_entry, last_polled)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (url, interval, next_due, state["last_entry"], now)
+            )
+            self._conn.commit()
+        return next_due
+
+    def interval(self, url):
+        state = self._state.get(url)
+        return state["interval"] if state else None
+
+    def stats(self):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM counters WHERE name = 'avoided'").fetchone()
+        return {"polled": self.polled, "avoided": self.avoided, "avoided_total": row[0] if row else 0}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
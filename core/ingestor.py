@@ -1,49 +1,216 @@
-import feedparser
-import requests
-from datetime import datetime
+import calendar
+from datetime import datetime, timezone
+from core.feed_fetcher import FeedFetcher
+from core.feed_cache import FeedCache
+from core.feed_scheduler import FeedScheduler
+from core.stream_parser import StreamParseError, parse_stream
+from core.seen_index import SeenIndex
+from core.keyword_engine import KeywordEngine
+from core.story_cluster import StoryClusterer
+from core.metrics import get_metrics
+from utils.logger import logger
 
 class Ingestor:
     def __init__(self, config):
         self.config = config
         self.sources = config.get('sources', [])
         self.keywords = config.get('keywords', [])
+        self.max_entries = config.get('max_entries_per_feed', 5)
+        # 流式解析：取够 max_entries 条就停止下载，格式异常时回退到 feedparser
+        self.streaming = config.get('streaming_parser', True)
+        self.top_k = config.get('top_k')
+        # 关键词在初始化时一次性编译
+        self.keyword_engine = KeywordEngine(self.keywords, title_weight=config.get('title_weight', 2.0))
+        self.fetcher = FeedFetcher(config)
+
+        # 条件请求缓存：未变化的源直接复用上次解析结果
+        cache_config = config.get('feed_cache', {})
+        self.feed_cache = None
+        if cache_config.get('enabled'):
+            self.feed_cache = FeedCache(cache_config.get('path', 'data/cache/feeds.db'))
+
+        # 自适应轮询：按各源的更新频率决定是否到期，每轮只抓取到期的源
+        schedule_config = config.get('scheduler', {})
+        self.scheduler = None
+        if schedule_config.get('enabled'):
+            self.scheduler = FeedScheduler(
+                schedule_config.get('path', 'data/cache/feed_schedule.db'),
+                min_interval=schedule_config.get('min_interval', 300),
+                max_interval=schedule_config.get('max_interval', 86400),
+                jitter=schedule_config.get('jitter', 0.1)
+            )
+
+        # 已处理条目索引：处理过的新闻不会再次进入 LLM
+        seen_config = config.get('seen_index', {})
+        self.seen_index = None
+        if seen_config.get('enabled'):
+            self.seen_index = SeenIndex(
+                seen_config.get('path', 'data/cache/seen.db'),
+                ttl_days=seen_config.get('ttl_days', 30),
+                bloom_capacity=seen_config.get('bloom_capacity', 1000000)
+            )
+
+        # 近似重复聚类：同一事件只保留一个代表条目
+        cluster_config = config.get('clustering', {})
+        self.clusterer = None
+        if cluster_config.get('enabled'):
+            self.clusterer = StoryClusterer(
+                threshold=cluster_config.get('threshold', 0.5),
+                num_perm=cluster_config.get('num_perm', 64),
+                bands=cluster_config.get('bands', 16)
+            )
 
     def fetch(self):
         """
         核心抓取方法：根据配置抓取所有源
         """
-        print("Starting data ingestion...")
-        all_items = []
+        with get_metrics().timer("ingest"):
+            logger.info("Starting data ingestion...")
+            all_items = []
+
+            # 1. 处理 RSS 订阅
+            if self.config.get('enable_rss'):
+                all_items.extend(self._fetch_rss())
 
-        # 1. 处理 RSS 订阅
-        if self.config.get('enable_rss'):
-            all_items.extend(self._fetch_rss())
+            # 2. 处理特定 API (以简单的热词模拟为例)
+            if self.config.get('enable_trends'):
+                all_items.extend(self._fetch_trends())
 
-        # 2. 处理特定 API (以简单的热词模拟为例)
-        if self.config.get('enable_trends'):
-            all_items.extend(self._fetch_trends())
+            # 去掉已经处理过的条目
+            if self.seen_index is not None:
+                before = len(all_items)
+                all_items = self.seen_index.filter_unseen(all_items)
+                logger.info(f"Seen index: dropped {before - len(all_items)} already processed items")
 
-        # 这里的过滤逻辑可以根据关键词过滤，或者去除重复
-        return self._filter(all_items)
+            if self.clusterer:
+                # 先打分、聚类再截断：同一事件的多篇报道只占一个 top_k 名额
+                items = self._filter(all_items, top_k=None)
+                before = len(items)
+                # 跨来源的同一事件合并为一条，其余报道作为 related 上下文
+                items = self.clusterer.collapse(items)
+                logger.info(f"Clustering: {before} items -> {len(items)} stories")
+                if self.keywords and self.top_k:
+                    items = items[:self.top_k]
+            else:
+                # 这里的过滤逻辑可以根据关键词过滤，或者去除重复
+                items = self._filter(all_items, top_k=self.top_k)
+            get_metrics().inc("items_total", len(items), stage="ingest")
+            return items
+
+    def mark_processed(self, items):
+        """
+        在内容生成成功后调用，记录这些条目已处理
+        """
+        if self.seen_index is not None and items:
+            # 同簇的其他报道也一并记录，避免下次换个来源再次进入 LLM
+            expanded = []
+            for item in items:
+                expanded.append(item)
+                expanded.extend(item.get('related', []))
+            self.seen_index.mark_seen(expanded)
 
     def _fetch_rss(self):
+        urls = self.config.get('rss_urls', [])
+        if self.scheduler:
+            total = len(urls)
+            urls = self.scheduler.due(urls)
+            skipped = total - len(urls)
+            get_metrics().inc("feed_polls_avoided_total", skipped)
+            logger.info(f"Scheduler: {len(urls)}/{total} feeds due, {skipped} fetches avoided "
+                        f"({self.scheduler.stats()['avoided_total']} in total)")
+            if not urls:
+                return []
+        logger.info(f"Fetching {len(urls)} RSS feeds...")
+        # 并发下载，解析也在工作线程内完成
+        headers_for = self.feed_cache.request_headers if self.feed_cache else None
+        parsed = self.fetcher.fetch_all(urls, self._parse_feed, headers_for=headers_for,
+                                        streaming=self.streaming)
+
+        for url, reason in self.fetcher.failures.items():
+            logger.warning(f"Skipped RSS: {url} ({reason})")
+        if self.scheduler:
+            for url in urls:
+                self.scheduler.record(url, self._published_times(parsed.get(url, [])),
+                                      failed=url in self.fetcher.failures)
+        if self.feed_cache:
+            stats = self.feed_cache.stats()
+            logger.info(f"Feed cache: {stats['not_modified']}/{stats['requests']} not modified "
+                        f"(hit rate {stats['hit_rate']:.0%})")
+
+        # 按配置顺序合并，保证输出顺序稳定
         rss_data = []
-        for url in self.config.get('rss_urls', []):
-            print(f"Fetching RSS: {url}")
-            feed = feedparser.parse(url)
-            for entry in feed.entries[:5]:  # 每个源取前5条
-                rss_data.append({
-                    "title": entry.title,
-                    "link": entry.link,
-                    "summary": entry.get('summary', ''),
-                    "source_type": "rss",
-                    "timestamp": datetime.now().isoformat()
-                })
+        for url in urls:
+            rss_data.extend(parsed.get(url, []))
         return rss_data
 
+    def _parse_feed(self, url, response, content):
+        """content 为完整的响应字节，流式模式下为分块迭代器"""
+        if self.feed_cache:
+            if response.status_code == 304:
+                cached = self.feed_cache.lookup(url)
+                self.feed_cache.record(not_modified=True, hit=cached is not None)
+                if cached is not None:
+                    return self._refresh_timestamps(cached)
+                return []
+            self.feed_cache.record(not_modified=False)
+
+        response.raise_for_status()
+        entries = None
+        if self.streaming:
+            try:
+                entries = parse_stream(content, self.max_entries)
+            except StreamParseError as e:
+                logger.info(f"Streaming parse failed for {url} ({e}), falling back to feedparser")
+                # 已读取的部分加上剩余的响应，交给容错更强的 feedparser
+                content = e.data + b"".join(content)
+        if entries is None:
+            entries = self._feedparser_entries(content, response)
+
+        now = datetime.now().isoformat()
+        items = [dict(entry, source_type="rss", timestamp=now) for entry in entries]
+
+        if self.feed_cache:
+            self.feed_cache.store(url, response.headers, items)
+        return items
+
+    def _feedparser_entries(self, body, response):
+        import feedparser  # 只在流式解析失败或关闭时才需要
+        feed = feedparser.parse(body, response_headers=dict(response.headers))
+        return [{
+            "title": entry.get('title', ''),
+            "link": entry.get('link', ''),
+            "summary": entry.get('summary', ''),
+            "published": self._published(entry),
+        } for entry in feed.entries[:self.max_entries]]  # 每个源默认取前5条
+
+    @staticmethod
+    def _published(entry):
+        """条目的发布 (或更新) 时间，UTC ISO 格式；源没有提供时为 None"""
+        parsed = entry.get('published_parsed') or entry.get('updated_parsed')
+        if not parsed:
+            return None
+        return datetime.fromtimestamp(calendar.timegm(parsed), tz=timezone.utc).isoformat()
+
+    @staticmethod
+    def _published_times(items):
+        times = []
+        for item in items:
+            if item.get('published'):
+                try:
+                    times.append(datetime.fromisoformat(item['published']).timestamp())
+                except ValueError:
+                    continue
+        return times
+
+    def _refresh_timestamps(self, items):
+        now = datetime.now().isoformat()
+        for item in items:
+            item['timestamp'] = now
+        return items
+
     def _fetch_trends(self):
         # 实际开发时这里可以集成 pytrends 或 微博热搜 API
-        print("Fetching Google Trends...")
+        logger.info("Fetching Google Trends...")
         # 模拟返回
         return [{
             "title": "AI Content Automation is Booming",
@@ -51,15 +218,12 @@ class Ingestor:
             "source_type": "trends"
         }]
 
-    def _filter(self, items):
+    def _filter(self, items, top_k=None):
         """
-        简单的关键词过滤逻辑
+        关键词加权过滤：按标题和摘要的命中权重打分，
+        返回按分数排序的候选 (指定 top_k 时只保留前 k 条)
         """
         if not self.keywords:
             return items
-        
-        filtered = [
-            item for item in items 
-            if any(kw.lower() in item['title'].lower() for kw in self.keywords)
-        ]
-        return filtered
\ No newline at end of file
+
+        return self.keyword_engine.rank(items, top_k=top_k)
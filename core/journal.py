@@ -0,0 +1,234 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from utils.logger import logger
+
+
+class RunJournal:
+    """
+    运行日志 (SQLite WAL)：记录每个条目在各阶段的进度和产出。
+    进程崩溃后重启可从最后完成的阶段继续，已发布的渠道不会重复发布。
+    阶段: ingested -> processed -> image -> done (或 failed)
+    发布前先为每个渠道写入 pending 记录，成功后改为 published，确认失败时删除；
+    崩溃或超时留下的 pending 表示"可能已发出"，恢复时不会自动重发。
+    同一实例可在多个线程 (常驻模式的各阶段、异步流程的工作线程) 中使用。
+    """
+    def __init__(self, path="data/state/journal.db", max_attempts=3):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS items ("
+            " item_id TEXT PRIMARY KEY,"
+            " raw TEXT NOT NULL,"
+            " stage TEXT NOT NULL,"
+            " content TEXT,"
+            " image_path TEXT,"
+            " image_paths TEXT,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " created_at REAL NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS publications ("
+            " item_id TEXT NOT NULL,"
+            " channel TEXT NOT NULL,"
+            " result TEXT,"
+            " published_at REAL NOT NULL,"
+            " status TEXT NOT NULL DEFAULT 'published',"
+            " PRIMARY KEY (item_id, channel))"
+        )
+        # 旧版本的日志库没有 status 列，其中的记录都是已发布
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(publications)")}
+        if 'status' not in columns:
+            self._conn.execute("ALTER TABLE publications ADD COLUMN status TEXT NOT NULL DEFAULT 'published'")
+        self._conn.commit()
+
+    # 每次采集都会变化的字段，不参与 item_id 计算，同一条目重新采集后仍对应同一条记录
+    VOLATILE_FIELDS = ('timestamp', 'item_id')
+
+    @classmethod
+    def item_id_for(cls, raw):
+        def stable(value):
+            if isinstance(value, dict):
+                return {k: v for k, v in value.items() if k not in cls.VOLATILE_FIELDS}
+            return value
+        raw = [stable(v) for v in raw] if isinstance(raw, list) else stable(raw)
+        payload = json.dumps(raw, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:24]
+
+    def begin(self, raw):
+        """登记新条目并返回 item_id；已存在时保持原有进度"""
+        item_id = self.item_id_for(raw)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO items (item_id, raw, stage, created_at, updated_at)"
+                " VALUES (?, ?, 'ingested', ?, ?)",
+                (item_id, json.dumps(raw, ensure_ascii=False, default=str), now, now)
+            )
+            self._conn.commit()
+        return item_id
+
+    def get(self, item_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT item_id, raw, stage, content, image_path, image_paths, attempts"
+                " FROM items WHERE item_id = ?", (item_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "item_id": row[0],
+            "raw": json.loads(row[1]),
+            "stage": row[2],
+            "content": json.loads(row[3]) if row[3] else None,
+            "image_path": row[4],
+            "image_paths": json.loads(row[5]) if row[5] else {},
+            "attempts": row[6],
+        }
+
+    def pending(self, limit=None):
+        """
+        按登记顺序返回未完成的条目 (最多 limit 条)，并把它们的尝试次数加一；
+        超过 max_attempts 的条目标记为 failed，不再重试
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE items SET stage = 'failed', updated_at = ?"
+                " WHERE stage NOT IN ('done', 'failed') AND attempts >= ?",
+                (time.time(), self.max_attempts)
+            )
+            rows = self._conn.execute(
+                "SELECT item_id FROM items WHERE stage NOT IN ('done', 'failed')"
+                " ORDER BY created_at LIMIT ?", (-1 if limit is None else limit,)
+            ).fetchall()
+            self._conn.executemany("UPDATE items SET attempts = attempts + 1 WHERE item_id = ?", rows)
+            self._conn.commit()
+        return [self.get(row[0]) for row in rows]
+
+    def next_pending(self):
+        """返回最早的未完成条目 (见 pending)，没有时返回 None"""
+        entries = self.pending(limit=1)
+        return entries[0] if entries else None
+
+    def _update(self, item_id, **fields):
+        fields['updated_at'] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            self._conn.execute(
+                f"UPDATE items SET {assignments} WHERE item_id = ?", (*fields.values(), item_id)
+            )
+            self._conn.commit()
+
+    def record_processed(self, item_id, content):
+        self._update(item_id, stage='processed', content=json.dumps(content, ensure_ascii=False))
+
+    def record_image(self, item_id, image_path, image_paths=None):
+        self._update(item_id, stage='image', image_path=image_path,
+                     image_paths=json.dumps(image_paths or {}, ensure_ascii=False))
+
+    def _channels(self, item_id, status):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT channel FROM publications WHERE item_id = ? AND status = ?", (item_id, status)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def published_channels(self, item_id):
+        return self._channels(item_id, 'published')
+
+    def uncertain_channels(self, item_id):
+        """已开始发布但没有确认结果 (崩溃或超时) 的渠道"""
+        return self._channels(item_id, 'pending')
+
+    def _write(self, sql, params):
+        with self._lock:
+            self._conn.execute(sql, params)
+            self._conn.commit()
+
+    def record_intent(self, item_id, channel):
+        """发布前调用：记录即将向 channel 发布"""
+        self._write(
+            "INSERT OR IGNORE INTO publications (item_id, channel, published_at, status)"
+            " VALUES (?, ?, ?, 'pending')", (item_id, channel, time.time())
+        )
+
+    def clear_intent(self, item_id, channel):
+        """确认发布失败 (内容没有发出) 时调用，下次运行会重试该渠道"""
+        self._write("DELETE FROM publications WHERE item_id = ? AND channel = ? AND status = 'pending'",
+                    (item_id, channel))
+
+    def record_published(self, item_id, channel, result=None):
+        self._write(
+            "INSERT OR REPLACE INTO publications (item_id, channel, result, published_at, status)"
+            " VALUES (?, ?, ?, ?, 'published')",
+            (item_id, channel, json.dumps(result, ensure_ascii=False, default=str), time.time())
+        )
+
+    def _publish_targets(self, item_id, channels):
+        """跳过已发布和结果不确定的渠道，并为其余渠道写入发布意图"""
+        published = self.published_channels(item_id)
+        uncertain = self.uncertain_channels(item_id)
+        if uncertain:
+            logger.warning(f"渠道 {sorted(uncertain)} 上次发布结果未知 (可能已发出)，不自动重发，请人工确认。")
+        targets = [c for c in channels if c not in published and c not in uncertain]
+        for channel in targets:
+            self.record_intent(item_id, channel)
+        return targets
+
+    def _on_result(self, item_id, channel, result):
+        if result['success']:
+            self.record_published(item_id, channel, result['result'])
+        elif not result.get('timed_out'):
+            self.clear_intent(item_id, channel)
+        # 超时的请求仍可能在后台发出，保留 pending 记录
+
+    def _finish_publish(self, item_id, results):
+        if all(r['success'] for r in results.values()):
+            self.complete(item_id)
+        else:
+            logger.warning("部分渠道发布失败，下次运行将只重试这些渠道。")
+        return results
+
+    def publish(self, publisher, item_id, content_bundle):
+        """
+        通过 PublishManager 发布并记录每个渠道的结果：已发布的渠道不重复发布，
+        每个渠道完成时立即落盘 (不等其他渠道)，全部成功后条目标记为 done
+        """
+        channels = self._publish_targets(item_id, list(publisher.active_publishers))
+        on_result = lambda channel, result: self._on_result(item_id, channel, result)
+        results = publisher.broadcast(content_bundle, channels, on_result=on_result) if channels else {}
+        return self._finish_publish(item_id, results)
+
+    async def apublish(self, publisher, item_id, content_bundle):
+        """publish 的异步版本，使用 PublishManager.abroadcast"""
+        channels = self._publish_targets(item_id, list(publisher.active_publishers))
+        on_result = lambda channel, result: self._on_result(item_id, channel, result)
+        results = await publisher.abroadcast(content_bundle, channels, on_result=on_result) if channels else {}
+        return self._finish_publish(item_id, results)
+
+    def complete(self, item_id):
+        self._update(item_id, stage='done')
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def open_journal(config):
+    """按 journal 配置创建运行日志，未开启时返回 None"""
+    journal_config = config.get('journal') or {}
+    if not journal_config.get('enabled'):
+        return None
+    return RunJournal(journal_config.get('path', 'data/state/journal.db'),
+                      max_attempts=journal_config.get('max_attempts', 3))
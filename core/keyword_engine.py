@@ -0,0 +1,104 @@
+import heapq
+import re
+
+# 只把 ASCII 字母数字视为单词字符：中文等相邻的汉字同样属于 \w，用 \w 作边界时中文关键词永远匹配不上
+_ASCII_WORD = r'[A-Za-z0-9_]'
+
+
+def _trie_pattern(node):
+    """
+    把前缀树转换为正则：共享前缀只匹配一次，
+    避免上万个关键词的简单 "a|b|c" 交替在每个位置逐一尝试
+    """
+    branches = [re.escape(ch) + _trie_pattern(child) for ch, child in sorted(node.items()) if ch]
+    if not branches:
+        return ''
+    is_end = '' in node
+    if len(branches) == 1 and not is_end:
+        return branches[0]
+    pattern = '(?:' + '|'.join(branches) + ')'
+    return pattern + '?' if is_end else pattern
+
+
+class KeywordEngine:
+    """
+    关键词权重引擎：根据 keywords 配置一次性编译成单个正则，
+    对标题和摘要做整词匹配，按权重打分并用堆选出 top-k
+    """
+    def __init__(self, keywords, title_weight=2.0):
+        self.weights = self._parse_keywords(keywords)
+        self.title_weight = title_weight
+        self.pattern = None
+
+        if self.weights:
+            # 纯 ASCII 关键词整词匹配，"AI" 不会命中 "OpenAI" 或 "said"，但能命中 "发布AI芯片"；
+            # 中文等关键词没有词边界，直接做子串匹配
+            ascii_words = [kw for kw in self.weights if kw.isascii()]
+            others = [kw for kw in self.weights if not kw.isascii()]
+            branches = []
+            if others:
+                branches.append(self._trie(others))
+            if ascii_words:
+                branches.append(f'(?<!{_ASCII_WORD})' + self._trie(ascii_words) + f'(?!{_ASCII_WORD})')
+            self.pattern = re.compile('|'.join(branches), re.IGNORECASE)
+
+    @staticmethod
+    def _trie(keywords):
+        trie = {}
+        for kw in keywords:
+            node = trie
+            for ch in kw:
+                node = node.setdefault(ch, {})
+            node[''] = True
+        return '(?:' + _trie_pattern(trie) + ')'
+
+    @staticmethod
+    def _parse_keywords(keywords):
+        """
+        支持两种写法：
+        keywords: ["AI", "Tesla"]              # 权重均为 1
+        keywords: {"AI": 3, "Tesla": 1.5}      # 自定义权重
+        """
+        if isinstance(keywords, dict):
+            pairs = keywords.items()
+        else:
+            pairs = ((kw, 1.0) for kw in keywords or [])
+
+        weights = {}
+        for kw, weight in pairs:
+            kw = str(kw).strip().lower()
+            if kw:
+                weights[kw] = float(weight)
+        return weights
+
+    def matches(self, text):
+        """返回文本中命中的关键词集合 (已转为小写)"""
+        if not self.pattern or not text:
+            return set()
+        return {m.group(0).lower() for m in self.pattern.finditer(text)}
+
+    def score(self, item):
+        """每个关键词在标题/摘要中各计一次，标题命中乘以 title_weight"""
+        title_hits = self.matches(item.get('title', ''))
+        summary_hits = self.matches(item.get('summary', ''))
+        weights = self.weights
+        return (sum(weights[kw] for kw in title_hits) * self.title_weight
+                + sum(weights[kw] for kw in summary_hits))
+
+    def rank(self, items, top_k=None):
+        """
+        给每个条目写入 score 字段，丢弃 0 分条目，按分数从高到低返回。
+        指定 top_k 时用堆选择，复杂度 O(n log k)；同分时保持原始顺序。
+        """
+        scored = []
+        for index, item in enumerate(items):
+            score = self.score(item)
+            if score > 0:
+                item['score'] = score
+                scored.append((score, -index, item))
+
+        if top_k:
+            best = heapq.nlargest(top_k, scored, key=lambda entry: entry[:2])
+        else:
+            best = sorted(scored, key=lambda entry: entry[:2], reverse=True)
+        return [item for _, _, item in best]
@@ -1,5 +1,7 @@
 import importlib
 from typing import Dict, Any
+from core.asset_cache import AssetCache
+from core.metrics import get_metrics
 
 class MediaStudio:
     def __init__(self, config: Dict[str, Any]):
@@ -7,6 +9,7 @@ class MediaStudio:
         self.quality_enhancers = config.get('quality_enhancers', '')
         self.config = config
         self.adapter = self._load_adapter()
+        self.asset_cache = self._load_asset_cache()
 
     def _load_adapter(self):
         # Dynamically loads core.providers.{provider}_image_adapter
@@ -17,8 +20,61 @@ class MediaStudio:
         except ImportError as e:
             raise ImportError(f"Image adapter {module_path}.py not found.") from e
 
+    def _load_asset_cache(self):
+        cache_config = self.config.get('asset_cache', {})
+        if not cache_config.get('enabled'):
+            return None
+        return AssetCache(
+            self.config.get('save_dir', 'outputs/images/'),
+            max_bytes=int(cache_config.get('max_size_mb', 500) * 1024 * 1024),
+            max_age=cache_config.get('max_age_days', 30) * 86400
+        )
+
+    def close(self):
+        """Persist pending cache recency updates (hits are not written one by one)."""
+        if self.asset_cache:
+            self.asset_cache.flush()
+
+    def _cache_key(self, prompt: str) -> str:
+        return AssetCache.make_key(
+            prompt, self.quality_enhancers,
+            self.config.get('model', ''), self.config.get('resolution', '')
+        )
+
     def create_visual(self, prompt: str) -> str:
         """Main entry point to generate an image."""
         if not prompt:
             return ""
-        return self.adapter.generate(prompt, self.quality_enhancers)
\ No newline at end of file
+        if not self.asset_cache:
+            with get_metrics().timer("image", provider=self.provider):
+                return self.adapter.generate(prompt, self.quality_enhancers)
+
+        key = self._cache_key(prompt)
+        path = self.asset_cache.get(key)
+        if path:
+            get_metrics().inc("asset_cache_hits_total", provider=self.provider)
+            return path
+        get_metrics().inc("asset_cache_misses_total", provider=self.provider)
+        with get_metrics().timer("image", provider=self.provider):
+            path = self.adapter.generate(prompt, self.quality_enhancers)
+        self.asset_cache.put(key, path)
+        return path
+
+    async def acreate_visual(self, prompt: str) -> str:
+        """Async variant of create_visual."""
+        if not prompt:
+            return ""
+        if not self.asset_cache:
+            with get_metrics().timer("image", provider=self.provider):
+                return await self.adapter.agenerate(prompt, self.quality_enhancers)
+
+        key = self._cache_key(prompt)
+        path = self.asset_cache.get(key)
+        if path:
+            get_metrics().inc("asset_cache_hits_total", provider=self.provider)
+            return path
+        get_metrics().inc("asset_cache_misses_total", provider=self.provider)
+        with get_metrics().timer("image", provider=self.provider):
+            path = await self.adapter.agenerate(prompt, self.quality_enhancers)
+        self.asset_cache.put(key, path)
+        return path
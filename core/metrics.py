@@ -0,0 +1,206 @@
+import bisect
+import json
+import os
+import tempfile
+import threading
+import time
+
+# 阶段耗时直方图的桶上界 (秒)
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+PREFIX = "opencontentbot"
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 最后一个是 +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for upper, count in zip(list(self.buckets) + [float('inf')], self.counts):
+            total += count
+            yield upper, total
+
+
+class _NoopTimer:
+    """关闭指标时 timer() 返回的共享对象，进出上下文不做任何事"""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_TIMER = _NoopTimer()
+
+
+class _Timer:
+    def __init__(self, metrics, stage, labels):
+        self.metrics = metrics
+        self.stage = stage
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.observe(self.stage, time.perf_counter() - self.start,
+                             outcome="error" if exc_type else "ok", **self.labels)
+        return False
+
+
+class Metrics:
+    """
+    进程内指标：各阶段耗时直方图、按 provider / 平台的调用次数、
+    LLM token 用量和估算费用。export() 写出 Prometheus textfile 或 JSON 快照。
+    enabled 为 false 时所有记录方法立即返回。
+    """
+    def __init__(self, config):
+        self.enabled = bool(config.get('enabled'))
+        self.format = config.get('format', 'prometheus')
+        self.path = config.get('path', 'data/metrics/opencontentbot.prom')
+        # 美元 / 1K tokens: {model: {"prompt": x, "completion": y}}
+        self.prices = config.get('prices', {})
+        # 美元 / 张: {model: x}
+        self.image_prices = config.get('image_prices', {})
+        self.buckets = tuple(config.get('buckets', DEFAULT_BUCKETS))
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def timer(self, stage, **labels):
+        """with metrics.timer("process", provider="openai"): ..."""
+        if not self.enabled:
+            return _NOOP_TIMER
+        return _Timer(self, stage, labels)
+
+    def observe(self, stage, seconds, **labels):
+        if not self.enabled:
+            return
+        labels['stage'] = stage
+        key = self._key("stage_duration_seconds", labels)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def record_usage(self, provider, model, usage):
+        """记录一次 LLM 响应的 usage (OpenAI 响应对象或字典) 并累计费用"""
+        if not self.enabled or usage is None:
+            return
+        get = usage.get if isinstance(usage, dict) else lambda name: getattr(usage, name, None)
+        prompt = get('prompt_tokens') or 0
+        completion = get('completion_tokens') or 0
+        self.inc("llm_tokens_total", prompt, provider=provider, model=model, kind="prompt")
+        self.inc("llm_tokens_total", completion, provider=provider, model=model, kind="completion")
+        price = self.prices.get(model)
+        if price:
+            cost = (prompt * price.get('prompt', 0) + completion * price.get('completion', 0)) / 1000
+            self.inc("cost_usd_total", cost, provider=provider, model=model)
+
+    def record_images(self, provider, model, count=1):
+        if not self.enabled:
+            return
+        self.inc("images_generated_total", count, provider=provider, model=model)
+        price = self.image_prices.get(model)
+        if price:
+            self.inc("cost_usd_total", price * count, provider=provider, model=model)
+
+    def snapshot(self):
+        with self._lock:
+            histograms = [
+                {"name": name, "labels": dict(labels), "count": h.count, "sum": round(h.sum, 6),
+                 "buckets": {str(upper): total for upper, total in h.cumulative()}}
+                for (name, labels), h in self._histograms.items()
+            ]
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in self._counters.items()
+            ]
+        return {"timestamp": time.time(), "histograms": histograms, "counters": counters}
+
+    def render_prometheus(self):
+        def fmt(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            body = ",".join('%s="%s"' % (k, v.replace('\\', '\\\\').replace('"', '\\"')) for k, v in pairs)
+            return "{" + body + "}"
+
+        lines = []
+        with self._lock:
+            typed = set()
+            for (name, labels), h in sorted(self._histograms.items()):
+                metric = f"{PREFIX}_{name}"
+                if metric not in typed:
+                    lines.append(f"# TYPE {metric} histogram")
+                    typed.add(metric)
+                for upper, total in h.cumulative():
+                    le = "+Inf" if upper == float('inf') else repr(float(upper))
+                    lines.append(f"{metric}_bucket{fmt(labels, [('le', le)])} {total}")
+                lines.append(f"{metric}_sum{fmt(labels)} {h.sum:.6f}")
+                lines.append(f"{metric}_count{fmt(labels)} {h.count}")
+            for (name, labels), value in sorted(self._counters.items()):
+                metric = f"{PREFIX}_{name}"
+                if metric not in typed:
+                    lines.append(f"# TYPE {metric} counter")
+                    typed.add(metric)
+                lines.append(f"{metric}{fmt(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, path=None):
+        """原子写出 (临时文件 + rename)，node_exporter 的 textfile collector 不会读到半个文件"""
+        if not self.enabled:
+            return None
+        path = path or self.path
+        if self.format == 'json':
+            text = json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+        else:
+            text = self.render_prometheus()
+
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".metrics-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return path
+
+
+# 进程内共享一个实例；未调用 configure() 时为关闭状态
+_metrics = Metrics({})
+
+
+def configure(config):
+    global _metrics
+    _metrics = Metrics(config or {})
+    return _metrics
+
+
+def get_metrics():
+    return _metrics
@@ -1,15 +1,67 @@
 import importlib
-from typing import Dict, Any
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List
+from core.providers.base_adapter import is_error_result
+from core.providers.cached_adapter import CachedAdapter
+from core.metrics import get_metrics
+from core.prompt_builder import PromptBuilder
+from utils.logger import logger
+
+# 打包模式下追加到 system_prompt 之后的说明
+PACKED_INSTRUCTION = """
+You will receive a JSON array of independent news items, each with an "id".
+Handle every item separately following the requirements above.
+Return ONLY a JSON object of the form:
+{"results": [{"id": <id>, ...the JSON object described above for that item...}]}
+with exactly one entry per input id.
+"""
+
+# 多平台模式下追加的说明：一次请求同时返回每个渠道的文案版本
+VARIANTS_INSTRUCTION = """
+Also write one caption variant per publishing channel listed below, adapted to that
+platform's audience and style and staying under its character limit (hashtags excluded).
+Add them to the JSON object as "variants": {{{keys}}}.
+Channels:
+{channels}
+"""
+
+# 渠道没有配置 max_length 时各平台的默认上限 (字符)
+DEFAULT_MAX_LENGTHS = {"twitter": 280, "telegram": 1024, "instagram": 2200}
+DEFAULT_STYLE = "engaging and informative"
+
+
+def enforce_length(text: str, max_len: int) -> str:
+    """超出上限时在单词边界截断并加省略号，模型给出的长度不可靠，必须本地保证"""
+    text = (text or "").strip()
+    if not max_len or len(text) <= max_len:
+        return text
+    cut = text[:max_len - 1]
+    if " " in cut[max_len // 2:]:
+        cut = cut[:cut.rindex(" ")]
+    return cut.rstrip(" ,.;:-") + "…"
+
+def tags_length(tags) -> int:
+    """发布器在正文后追加 "\n\n" + 空格分隔的 tags，这部分也占用平台的字符上限"""
+    tags = [t for t in tags or [] if t] if isinstance(tags, list) else []
+    return len("\n\n" + " ".join(tags)) if tags else 0
 
 class Processor:
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(self, config: Dict[str, Any], channels: Dict[str, Any] = None):
         """
         config 传入的是 config.yaml 中的 modules.processor 部分
+        channels 为 modules.publish_channels，传入时一次请求为每个启用的渠道生成一个文案版本
         """
         # 强制要求配置项，如果 config.yaml 没写，这里会直接报 KeyError，拒绝运行
         self.provider = config['provider'] 
-        self.system_prompt = config['system_prompt']
+        self.variant_specs = self.variant_specs_for(channels or {})
+        self.system_prompt = self.render_prompt(config['system_prompt'], self.variant_specs)
         self.config = config
+        # 输入压缩：按模型的 token 预算构建发给模型的文本
+        self.prompt_builder = PromptBuilder(config.get('prompt', {}), config.get('model'))
+        # 批量处理的并发上限和打包模式下每次请求的条目数
+        self.batch_concurrency = config.get('batch_concurrency', 4)
+        self.pack_size = config.get('pack_size', 5)
         
         # 动态加载适配器
         self.adapter = self._load_adapter()
@@ -24,19 +76,198 @@ class Processor:
             # 动态导入
             adapter_module = importlib.import_module(module_path)
             # 实例化适配器类
-            return adapter_module.Adapter(self.config)
+            adapter = adapter_module.Adapter(self.config)
         except ImportError as e:
             raise ImportError(f"未找到适配器文件: {module_path}.py。请确保该文件存在于 core/providers/ 目录下。") from e
         except Exception as e:
             raise Exception(f"加载适配器 {self.provider} 时发生错误: {str(e)}")
 
+        # 可选：在适配器外包一层响应缓存
+        cache_config = self.config.get('cache', {})
+        if cache_config.get('enabled'):
+            adapter = CachedAdapter(adapter, self.provider, self.config, cache_config)
+        return adapter
+
+    @staticmethod
+    def variant_specs_for(channels: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """{渠道: {"platform", "style", "max_len"}}，只包含启用的渠道"""
+        specs = {}
+        for channel, settings in channels.items():
+            if not settings.get('enabled'):
+                continue
+            platform = settings.get('platform', channel)
+            specs[channel] = {
+                "platform": platform,
+                "style": settings.get('style', DEFAULT_STYLE),
+                "max_len": settings.get('max_length') or DEFAULT_MAX_LENGTHS.get(platform, 280),
+            }
+        return specs
+
+    @staticmethod
+    def render_prompt(template: str, specs: Dict[str, Dict[str, Any]]) -> str:
+        """
+        填充 {platform} / {style} / {max_len} 占位符。
+        模板里有 JSON 示例的花括号，不能用 str.format，只能逐个 replace。
+        通用 caption 取最严格的长度上限，保证任何渠道都能直接使用
+        """
+        if specs:
+            platform = ", ".join(sorted({spec['platform'] for spec in specs.values()}))
+            style = "; ".join(f"{channel}: {spec['style']}" for channel, spec in specs.items())
+            max_len = min(spec['max_len'] for spec in specs.values())
+        else:
+            platform, style, max_len = "social media", DEFAULT_STYLE, DEFAULT_MAX_LENGTHS['twitter']
+        prompt = (template.replace("{platform}", platform)
+                  .replace("{style}", style)
+                  .replace("{max_len}", str(max_len)))
+        if specs:
+            prompt += VARIANTS_INSTRUCTION.format(
+                keys=", ".join(f'"{channel}": "..."' for channel in specs),
+                channels="\n".join(
+                    f'- "{channel}": platform {spec["platform"]}, style "{spec["style"]}", '
+                    f'under {spec["max_len"]} characters'
+                    for channel, spec in specs.items()
+                )
+            )
+        return prompt
+
+    def finalize(self, content: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        本地校正长度并补齐缺失的渠道版本：
+        caption 截断到最严格的上限，variants 中每个渠道截断到自己的上限，缺失时用 caption 代替。
+        模型写文案时不含 hashtags，上限要先扣掉发布时追加的 tags
+        """
+        if not isinstance(content, dict) or is_error_result(content) or 'caption' not in content:
+            return content
+        if not self.variant_specs:
+            return content
+        reserved = tags_length(content.get('tags'))
+        limits = {channel: max(1, spec['max_len'] - reserved) for channel, spec in self.variant_specs.items()}
+        caption = content['caption']
+        content['caption'] = enforce_length(caption, min(limits.values()))
+        variants = content.get('variants')
+        variants = variants if isinstance(variants, dict) else {}
+        content['variants'] = {
+            channel: enforce_length(variants.get(channel) or caption, limits[channel])
+            for channel in self.variant_specs
+        }
+        return content
+
     def process(self, raw_data: str) -> Dict[str, Any]:
         """
         主处理逻辑：调用适配器生成内容
         """
         if not raw_data:
-            print("[!] Warning: No raw data provided to Processor.")
+            logger.warning("No raw data provided to Processor.")
             return {}
 
         # 这里的返回结果将直接是适配器处理后的字典 (caption, image_prompt, tags)
-        return self.adapter.generate_content(raw_data, self.system_prompt)
\ No newline at end of file
+        with get_metrics().timer("process", provider=self.provider):
+            return self.finalize(self.adapter.generate_content(raw_data, self.system_prompt))
+
+    async def aprocess(self, raw_data: str) -> Dict[str, Any]:
+        """
+        process 的异步版本
+        """
+        if not raw_data:
+            logger.warning("No raw data provided to Processor.")
+            return {}
+        with get_metrics().timer("process", provider=self.provider):
+            return self.finalize(await self.adapter.agenerate_content(raw_data, self.system_prompt))
+
+    def process_batch(self, items: List[Any], packed: bool = False) -> List[Dict[str, Any]]:
+        """
+        批量处理：并发调用适配器，结果与输入顺序一致。
+        items 可以是字符串或 Ingestor 返回的条目字典。
+        packed=True 时把多条小条目合并为一次结构化请求，再按 id 拆分结果。
+        每条结果格式: {"index": i, "ok": bool, "content": dict 或 None, "error": str 或 None}
+        """
+        if not items:
+            return []
+
+        texts = [self.prepare_input(item) for item in items]
+        if packed:
+            groups = [list(range(i, min(i + self.pack_size, len(texts))))
+                      for i in range(0, len(texts), self.pack_size)]
+
+            def worker(group):
+                return self._process_pack(group, texts)
+        else:
+            groups = [[i] for i in range(len(texts))]
+
+            def worker(group):
+                return [self._process_single(group[0], texts[group[0]])]
+
+        results = [None] * len(texts)
+        with ThreadPoolExecutor(max_workers=max(1, self.batch_concurrency)) as pool:
+            for group_results in pool.map(worker, groups):
+                for result in group_results:
+                    results[result['index']] = result
+        return results
+
+    def prepare_input(self, raw_data) -> str:
+        """
+        把采集结果 (条目列表、单个条目或字符串) 压缩为发给模型的文本，
+        去掉 HTML、重复内容和无用字段，并截断到 token 预算以内
+        """
+        prompt, stats = self.prompt_builder.build(raw_data)
+        if stats['saved'] or stats['dropped']:
+            logger.info(f"Prompt: {stats['tokens']} tokens ({stats['items']} items), "
+                        f"saved {stats['saved']} of {stats['raw_tokens']}, dropped {stats['dropped']} items")
+        metrics = get_metrics()
+        metrics.inc("prompt_tokens_total", stats['tokens'], provider=self.provider)
+        metrics.inc("prompt_tokens_saved_total", stats['saved'], provider=self.provider)
+        return prompt
+
+    @staticmethod
+    def format_item(item) -> str:
+        """把 Ingestor 条目转换为发给模型的文本，字符串原样返回"""
+        if isinstance(item, dict):
+            return f"Title: {item.get('title', '')}\nSummary: {item.get('summary', '')}"
+        return str(item)
+
+    @staticmethod
+    def _result(index, content=None, error=None):
+        return {"index": index, "ok": error is None, "content": content, "error": error}
+
+    def _check(self, index, content, finalized=False):
+        """finalized=True 表示 content 来自 process()，已经校正过长度"""
+        if is_error_result(content):
+            error = content.get('error') if isinstance(content, dict) else "invalid response"
+            return self._result(index, error=error or "invalid response")
+        if 'caption' not in content:
+            return self._result(index, error="missing caption")
+        return self._result(index, content=content if finalized else self.finalize(content))
+
+    def _process_single(self, index, text):
+        try:
+            return self._check(index, self.process(text), finalized=True)
+        except Exception as e:
+            return self._result(index, error=str(e))
+
+    def _process_pack(self, group, texts):
+        if len(group) == 1:
+            return [self._process_single(group[0], texts[group[0]])]
+
+        payload = json.dumps(
+            [{"id": i, "content": texts[i]} for i in group], ensure_ascii=False
+        )
+        try:
+            with get_metrics().timer("process_pack", provider=self.provider):
+                response = self.adapter.generate_content(payload, self.system_prompt + PACKED_INSTRUCTION)
+            entries = [] if is_error_result(response) else response.get('results', [])
+        except Exception as e:
+            logger.warning(f"Packed request failed, falling back to single requests: {e}")
+            entries = []
+
+        # 模型返回的 id 可能是字符串，两边统一按字符串比较
+        wanted = {str(i) for i in group}
+        by_id = {}
+        for entry in entries:
+            if isinstance(entry, dict) and str(entry.get('id')) in wanted:
+                by_id[str(entry.pop('id'))] = entry
+
+        # 模型漏掉的条目单独重试，保证每条都有结果
+        return [
+            self._check(i, by_id[str(i)]) if str(i) in by_id else self._process_single(i, texts[i])
+            for i in group
+        ]
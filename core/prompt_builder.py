@@ -0,0 +1,155 @@
+import html
+import re
+import threading
+from urllib.parse import urlsplit
+
+# 未在 budgets 中配置的模型使用的输入 token 预算
+DEFAULT_BUDGET = 1500
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_BLOCK_RE = re.compile(r"<(script|style)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+_SPACE_RE = re.compile(r"\s+")
+_SENTENCE_RE = re.compile(r"(?<=[.!?。！？])\s+")
+
+_encoders = {}
+_encoders_lock = threading.Lock()
+
+
+def strip_html(text):
+    """去掉标签 (含 script/style 内容)、反转义实体并压缩空白"""
+    if not text:
+        return ""
+    text = _BLOCK_RE.sub(" ", text)
+    text = _TAG_RE.sub(" ", text)
+    return _SPACE_RE.sub(" ", html.unescape(text)).strip()
+
+
+def _encoder(model):
+    """tiktoken 是可选依赖：已安装时按模型取编码器，否则返回 None 使用估算"""
+    with _encoders_lock:
+        if model not in _encoders:
+            try:
+                import tiktoken
+            except ImportError:
+                _encoders[model] = None
+            else:
+                try:
+                    _encoders[model] = tiktoken.encoding_for_model(model)
+                except KeyError:
+                    _encoders[model] = tiktoken.get_encoding("cl100k_base")
+        return _encoders[model]
+
+
+def count_tokens(text, model=None):
+    """
+    本地计算 token 数。没有 tiktoken 时估算：
+    ASCII 约 4 个字符 1 个 token，中日韩等非 ASCII 字符按每字 1 个 token
+    """
+    if not text:
+        return 0
+    encoder = _encoder(model)
+    if encoder is not None:
+        return len(encoder.encode(text))
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    return (len(text) - non_ascii + 3) // 4 + non_ascii
+
+
+class PromptBuilder:
+    """
+    把采集条目压缩成发给模型的输入：
+    只保留标题和摘要，去掉 HTML 和重复内容，按得分从高到低放入，直到用完该模型的 token 预算。
+    聚类合并的其他报道 (related) 以标题和来源域名附在条目后，作为同一事件的补充上下文
+    """
+    def __init__(self, config, model=None):
+        self.model = model
+        budgets = config.get('budgets', {})
+        self.budget = budgets.get(model, config.get('default_budget', DEFAULT_BUDGET))
+        self.summary_chars = config.get('summary_chars', 500)
+
+    def _summary(self, item, title, seen_sentences):
+        summary = strip_html(item.get('summary', ''))
+        if summary.lower().startswith(title.lower()):
+            summary = summary[len(title):].lstrip(" :-–—")
+        sentences = []
+        for sentence in _SENTENCE_RE.split(summary):
+            key = sentence.strip().lower()
+            # 跨条目重复的句子 (来源署名、订阅提示等) 只保留一次
+            if key and key not in seen_sentences:
+                seen_sentences.add(key)
+                sentences.append(sentence.strip())
+        summary = " ".join(sentences)
+        if len(summary) > self.summary_chars:
+            summary = summary[:self.summary_chars].rsplit(" ", 1)[0] + "…"
+        return summary
+
+    def _related(self, item, title):
+        """同一事件的其他报道：标题 (来源域名)，与主标题重复的省略"""
+        lines, seen = [], {title.lower()}
+        for other in item.get('related') or []:
+            if not isinstance(other, dict):
+                continue
+            related_title = strip_html(other.get('title', ''))
+            if not related_title or related_title.lower() in seen:
+                continue
+            seen.add(related_title.lower())
+            domain = urlsplit(other.get('link') or '').netloc.lower()
+            if domain.startswith("www."):
+                domain = domain[4:]
+            lines.append(f"- {related_title}" + (f" ({domain})" if domain else ""))
+        return "\n".join(lines)
+
+    def _fit(self, text, budget):
+        """按单词截断到 budget 以内"""
+        words = text.split(" ")
+        while words and count_tokens(" ".join(words), self.model) > budget:
+            words = words[:max(1, len(words) * 3 // 4)] if len(words) > 1 else []
+        return " ".join(words)
+
+    def build(self, raw_data):
+        """
+        返回 (prompt, stats)。
+        stats: {"items", "dropped", "raw_tokens", "tokens", "saved"}，raw_tokens 为原先 str(raw_data) 的 token 数
+        """
+        raw_tokens = count_tokens(str(raw_data), self.model)
+        if isinstance(raw_data, str):
+            return raw_data, {"items": 1, "dropped": 0, "raw_tokens": raw_tokens, "tokens": raw_tokens, "saved": 0}
+
+        items = [raw_data] if isinstance(raw_data, dict) else list(raw_data)
+        # 得分高的优先；sorted 是稳定排序，没有得分时保持采集顺序
+        items = sorted(items, key=lambda item: -(item.get('score') or 0) if isinstance(item, dict) else 0)
+
+        blocks, seen_titles, seen_sentences = [], set(), set()
+        used = 0
+        for item in items:
+            if not isinstance(item, dict):
+                item = {"title": str(item)}
+            title = strip_html(item.get('title', ''))
+            if not title or title.lower() in seen_titles:
+                continue
+            seen_titles.add(title.lower())
+            summary = self._summary(item, title, seen_sentences)
+            block = f"[{len(blocks) + 1}] {title}" + (f"\n{summary}" if summary else "")
+            related = self._related(item, title)
+            if related:
+                # related 计入预算；放不下时先去掉它，保住条目本身
+                with_related = f"{block}\nAlso reported:\n{related}"
+                if used + count_tokens(with_related, self.model) + 1 <= self.budget:
+                    block = with_related
+            cost = count_tokens(block, self.model) + 1
+            if used + cost > self.budget:
+                if blocks:
+                    continue  # 放不下就跳过，后面更短的条目可能还放得下
+                block = self._fit(block, self.budget)  # 单条就超预算时截断它，而不是什么都不发
+                cost = count_tokens(block, self.model)
+            blocks.append(block)
+            used += cost
+
+        prompt = "\n".join(blocks)
+        tokens = count_tokens(prompt, self.model)
+        return prompt, {
+            "items": len(blocks),
+            "dropped": len(items) - len(blocks),
+            "raw_tokens": raw_tokens,
+            "tokens": tokens,
+            "saved": max(raw_tokens - tokens, 0),
+        }
@@ -1,3 +1,4 @@
+import asyncio
 from abc import ABC, abstractmethod
 from typing import Dict, Any
 
@@ -11,5 +12,28 @@ class BaseAdapter(ABC):
             "image_prompt": "绘图提示词",
             "tags": ["标签1", "标签2"]
         }
+        调用失败时返回 error_result(...) 生成的占位字典
         """
-        pass
\ No newline at end of file
+        pass
+
+    async def agenerate_content(self, raw_data: str, system_prompt: str) -> Dict[str, Any]:
+        """
+        异步版本。默认把同步实现放到线程池执行，原生异步的适配器可以覆盖
+        """
+        return await asyncio.to_thread(self.generate_content, raw_data, system_prompt)
+
+
+def error_result(error) -> Dict[str, Any]:
+    """
+    生成失败时的占位结果，带 error 字段以便上层识别，避免被缓存或发布
+    """
+    return {
+        "caption": "内容生成失败，请检查日志。",
+        "image_prompt": "Error placeholder",
+        "tags": [],
+        "error": str(error)
+    }
+
+
+def is_error_result(result) -> bool:
+    return not isinstance(result, dict) or bool(result.get("error"))
@@ -1,7 +1,12 @@
+import asyncio
 from abc import ABC, abstractmethod
 
 class BaseImageAdapter(ABC):
     @abstractmethod
     def generate(self, prompt: str, quality_enhancers: str) -> str:
         """Should return the local path to the generated image."""
-        pass
\ No newline at end of file
+        pass
+
+    async def agenerate(self, prompt: str, quality_enhancers: str) -> str:
+        """Async variant. Defaults to running the sync implementation in a worker thread."""
+        return await asyncio.to_thread(self.generate, prompt, quality_enhancers)
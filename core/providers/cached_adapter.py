@@ -0,0 +1,167 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any
+from core.providers.base_adapter import BaseAdapter, is_error_result
+from core.metrics import get_metrics
+
+
+class CachedAdapter(BaseAdapter):
+    """
+    LLM 响应缓存：包装任意文本适配器。
+    以 (provider, model, temperature, system_prompt, raw_data) 的哈希为键，
+    内存 LRU 在前，SQLite 持久化在后；支持 TTL 和条目数上限。
+    失败时的占位结果永远不会被缓存。
+    """
+    def __init__(self, adapter, provider, config, cache_config):
+        self.adapter = adapter
+        self.provider = provider
+        self.model = config.get('model')
+        self.temperature = config.get('temperature', 0.7)
+
+        self.ttl = cache_config.get('ttl_hours', 24 * 7) * 3600
+        self.memory_size = cache_config.get('memory_size', 256)
+        self.max_entries = cache_config.get('max_entries', 100000)
+        path = cache_config.get('path', 'data/cache/llm.db')
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " last_used REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON responses (last_used)")
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl,))
+            self._conn.commit()
+            # 条目数在内存中维护，写入时不必每次 COUNT(*)
+            self._count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def __getattr__(self, name):
+        # 其他属性 (如 client) 透传给被包装的适配器
+        if name == 'adapter':
+            raise AttributeError(name)
+        return getattr(self.adapter, name)
+
+    def cache_key(self, raw_data, system_prompt):
+        payload = json.dumps(
+            [self.provider, self.model, self.temperature, system_prompt, raw_data],
+            ensure_ascii=False
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def _lookup(self, key):
+        """查询缓存并把命中 / 未命中计入 metrics (llm_cache_hits_total / llm_cache_misses_total)"""
+        value, tier = self._find(key)
+        if value is None:
+            get_metrics().inc("llm_cache_misses_total", provider=self.provider)
+        else:
+            get_metrics().inc("llm_cache_hits_total", provider=self.provider, tier=tier)
+        return value
+
+    def generate_content(self, raw_data: str, system_prompt: str) -> Dict[str, Any]:
+        key = self.cache_key(raw_data, system_prompt)
+        cached = self._lookup(key)
+        if cached is not None:
+            return json.loads(cached)
+
+        result = self.adapter.generate_content(raw_data, system_prompt)
+        if not is_error_result(result):
+            self._store(key, json.dumps(result, ensure_ascii=False))
+        return result
+
+    async def agenerate_content(self, raw_data: str, system_prompt: str) -> Dict[str, Any]:
+        key = self.cache_key(raw_data, system_prompt)
+        cached = await asyncio.to_thread(self._lookup, key)
+        if cached is not None:
+            return json.loads(cached)
+
+        result = await self.adapter.agenerate_content(raw_data, system_prompt)
+        if not is_error_result(result):
+            await asyncio.to_thread(self._store, key, json.dumps(result, ensure_ascii=False))
+        return result
+
+    def _find(self, key):
+        """返回 (value, "memory" / "disk")，未命中时为 (None, None)"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, value = entry
+                if now - created_at < self.ttl:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return value, "memory"
+                del self._memory[key]
+
+            row = self._conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ? AND created_at >= ?",
+                (key, now - self.ttl)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None, None
+
+            value, created_at = row
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self._remember(key, created_at, value)
+            self.disk_hits += 1
+            return value, "disk"
+
+    def _store(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, value)
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO responses (key, value, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+            if cursor.rowcount:
+                self._count += 1
+            else:
+                self._conn.execute(
+                    "UPDATE responses SET value = ?, created_at = ?, last_used = ? WHERE key = ?",
+                    (value, now, now, key)
+                )
+            # 超过上限时一次淘汰到上限的 90%，而不是每次写入都淘汰一条
+            if self._count > self.max_entries:
+                cursor = self._conn.execute(
+                    "DELETE FROM responses WHERE key IN ("
+                    " SELECT key FROM responses ORDER BY last_used ASC LIMIT ?)",
+                    (self._count - int(self.max_entries * 0.9),)
+                )
+                self._count -= cursor.rowcount
+            self._conn.commit()
+
+    def _remember(self, key, created_at, value):
+        self._memory[key] = (created_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            }
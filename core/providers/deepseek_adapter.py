@@ -0,0 +1,11 @@
+from core.providers.openai_adapter import Adapter as OpenAICompatibleAdapter
+
+
+class Adapter(OpenAICompatibleAdapter):
+    """
+    DeepSeek 提供兼容 OpenAI 的 Chat Completions 接口 (支持 JSON 输出)，
+    复用 OpenAI 适配器，只替换 Key 和地址。model 例如 deepseek-chat
+    """
+    provider = "deepseek"
+    api_key_env = "DEEPSEEK_API_KEY"
+    default_base_url = "https://api.deepseek.com"
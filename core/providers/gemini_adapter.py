@@ -0,0 +1,11 @@
+from core.providers.openai_adapter import Adapter as OpenAICompatibleAdapter
+
+
+class Adapter(OpenAICompatibleAdapter):
+    """
+    通过 Gemini 的 OpenAI 兼容接口调用，复用 OpenAI 适配器，只替换 Key 和地址。
+    model 例如 gemini-2.0-flash
+    """
+    provider = "gemini"
+    api_key_env = "GEMINI_API_KEY"
+    default_base_url = "https://generativelanguage.googleapis.com/v1beta/openai/"
@@ -1,48 +1,84 @@
 import os
 import json
-from openai import OpenAI
 from dotenv import load_dotenv
+from core.providers.base_adapter import BaseAdapter, error_result
+from core.providers.openai_client import get_client, get_async_client
+from core.rate_limiter import get_limiter, estimate_tokens
+from core.metrics import get_metrics
+from utils.logger import logger
 
 # 预先加载环境变量
 load_dotenv()
 
-class Adapter:
+class Adapter(BaseAdapter):
+    # 兼容 OpenAI 接口的服务商 (DeepSeek、Gemini 等) 继承本类，只需覆盖这三项
+    provider = "openai"
+    api_key_env = "OPENAI_API_KEY"
+    default_base_url = None
+
     def __init__(self, config):
         """
         config 同样是 modules.processor 的内容
         """
-        api_key = os.getenv("OPENAI_API_KEY")
+        api_key = os.getenv(self.api_key_env)
         if not api_key:
-            raise ValueError("环境变量 OPENAI_API_KEY 未设置，请检查 .env 文件。")
-        
-        self.client = OpenAI(api_key=api_key)
+            raise ValueError(f"环境变量 {self.api_key_env} 未设置，请检查 .env 文件。")
+
+        self.api_key = api_key
+        self.base_url = config.get('base_url') or self.default_base_url
+        self.client = get_client(api_key, self.base_url)
         self.model = config['model']
         self.temperature = config.get('temperature', 0.7)
+        # 同一 Key 的所有实例共享限流器；重试由限流器负责，关闭 SDK 自带的重试
+        self.limiter = get_limiter(self.provider, api_key, "chat", config.get('rate_limit'))
+
+    def _request_kwargs(self, raw_data, system_prompt):
+        return dict(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": f"请处理以下原始数据并按 JSON 格式输出：\n{raw_data}"}
+            ],
+            # 关键：强制返回 JSON 格式
+            response_format={"type": "json_object"},
+            temperature=self.temperature
+        )
 
     def generate_content(self, raw_data, system_prompt):
         """
         请求 OpenAI 并返回结构化数据
         """
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": f"请处理以下原始数据并按 JSON 格式输出：\n{raw_data}"}
-                ],
-                # 关键：强制返回 JSON 格式
-                response_format={"type": "json_object"},
-                temperature=self.temperature
+            response = self.limiter.call(
+                self.client.with_options(max_retries=0).chat.completions.create,
+                tokens=estimate_tokens(raw_data, system_prompt),
+                **self._request_kwargs(raw_data, system_prompt)
             )
-            
+            get_metrics().record_usage(self.provider, self.model, getattr(response, 'usage', None))
+
             # 将字符串转换为 Python 字典
             content_str = response.choices[0].message.content
             return json.loads(content_str)
-            
+
+        except Exception as e:
+            logger.error(f"{self.provider} API 错误: {e}")
+            return error_result(e)
+
+    async def agenerate_content(self, raw_data, system_prompt):
+        """
+        异步版本：使用共享的 AsyncOpenAI 客户端
+        """
+        try:
+            client = get_async_client(self.api_key, self.base_url)
+            response = await self.limiter.acall(
+                client.with_options(max_retries=0).chat.completions.create,
+                tokens=estimate_tokens(raw_data, system_prompt),
+                **self._request_kwargs(raw_data, system_prompt)
+            )
+            get_metrics().record_usage(self.provider, self.model, getattr(response, 'usage', None))
+            content_str = response.choices[0].message.content
+            return json.loads(content_str)
+
         except Exception as e:
-            print(f"[!] OpenAI API 错误: {e}")
-            return {
-                "caption": "内容生成失败，请检查日志。",
-                "image_prompt": "Error placeholder",
-                "tags": []
-            }
\ No newline at end of file
+            logger.error(f"{self.provider} API 错误: {e}")
+            return error_result(e)
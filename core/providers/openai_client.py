@@ -0,0 +1,39 @@
+import asyncio
+import threading
+from openai import OpenAI, AsyncOpenAI
+
+# 同一个 API Key 的文本和图片适配器共用客户端，从而共用底层连接池。
+# 键为 (事件循环, 客户端类名, api_key, base_url)，同步客户端的事件循环为 None
+_clients = {}
+_lock = threading.Lock()
+
+
+def get_client(api_key=None, base_url=None):
+    return _get(OpenAI, api_key, base_url)
+
+
+def get_async_client(api_key=None, base_url=None):
+    """
+    AsyncOpenAI 的连接绑定在创建它的事件循环上，跨循环复用会报 "Event loop is closed"，
+    所以按当前运行的循环分别缓存，并丢弃已关闭循环的客户端 (例如同一进程多次 asyncio.run)
+    """
+    loop = asyncio.get_running_loop()
+    with _lock:
+        for key in [key for key in _clients if key[0] is not None and key[0].is_closed()]:
+            del _clients[key]
+    return _get(AsyncOpenAI, api_key, base_url, loop)
+
+
+def _get(client_class, api_key, base_url, loop=None):
+    key = (loop, client_class.__name__, api_key, base_url)
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            kwargs = {}
+            if api_key:
+                kwargs['api_key'] = api_key
+            if base_url:
+                kwargs['base_url'] = base_url
+            client = client_class(**kwargs)
+            _clients[key] = client
+        return client
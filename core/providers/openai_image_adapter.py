@@ -1,39 +1,122 @@
+import asyncio
+import base64
+import hashlib
 import os
+import tempfile
+import threading
 import requests
-import time
-from openai import OpenAI
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 from core.providers.base_image_adapter import BaseImageAdapter
+from core.providers.openai_client import get_client, get_async_client
+from core.rate_limiter import get_limiter
+from core.metrics import get_metrics
+from utils.logger import logger
 
 # 预先加载环境变量
 load_dotenv()
 
+CHUNK_SIZE = 64 * 1024
+
+# Pooled session shared by every adapter instance for image downloads
+_session = None
+_session_lock = threading.Lock()
+
+
+def _get_session() -> requests.Session:
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            _session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+            _session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+        return _session
+
 class ImageAdapter(BaseImageAdapter):
     def __init__(self, config):
         self.config = config
-        self.client = OpenAI() # Reads OPENAI_API_KEY from .env
+        # Shared client (and connection pool) with the text adapter; reads OPENAI_API_KEY from .env
+        self.api_key = os.getenv("OPENAI_API_KEY")
+        self.base_url = config.get('base_url')
+        self.client = get_client(self.api_key, self.base_url)
+        # Shared per-key limiter for the images endpoint; it owns retries, so SDK retries are off
+        self.limiter = get_limiter("openai", self.api_key, "images", config.get('rate_limit'))
         self.save_dir = config.get('save_dir', 'outputs/images/')
+        # "url" downloads the image in a second request; "b64_json" returns it inline
+        self.response_format = config.get('response_format', 'url')
         
         if not os.path.exists(self.save_dir):
             os.makedirs(self.save_dir)
 
+    def _request_kwargs(self, prompt: str, quality_enhancers: str) -> dict:
+        return dict(
+            model=self.config.get('model', 'dall-e-3'),
+            prompt=f"{prompt}, {quality_enhancers}",
+            size=self.config.get('resolution', '1024x1024'),
+            response_format=self.response_format,
+            n=1
+        )
+
     def generate(self, prompt: str, quality_enhancers: str) -> str:
-        full_prompt = f"{prompt}, {quality_enhancers}"
         try:
-            response = self.client.images.generate(
-                model=self.config.get('model', 'dall-e-3'),
-                prompt=full_prompt,
-                size=self.config.get('resolution', '1024x1024'),
-                n=1
+            response = self.limiter.call(
+                self.client.with_options(max_retries=0).images.generate,
+                **self._request_kwargs(prompt, quality_enhancers)
+            )
+            get_metrics().record_images("openai", self.config.get('model', 'dall-e-3'))
+            return self._save(response.data[0])
+        except Exception as e:
+            logger.error(f"OpenAI Image Error: {e}")
+            return ""
+
+    async def agenerate(self, prompt: str, quality_enhancers: str) -> str:
+        """Native async variant using the shared AsyncOpenAI client."""
+        try:
+            client = get_async_client(self.api_key, self.base_url)
+            response = await self.limiter.acall(
+                client.with_options(max_retries=0).images.generate,
+                **self._request_kwargs(prompt, quality_enhancers)
             )
-            return self._download(response.data[0].url)
+            get_metrics().record_images("openai", self.config.get('model', 'dall-e-3'))
+            return await asyncio.to_thread(self._save, response.data[0])
         except Exception as e:
-            print(f"OpenAI Image Error: {e}")
+            logger.error(f"OpenAI Image Error: {e}")
             return ""
 
+    def _save(self, image) -> str:
+        if getattr(image, 'b64_json', None):
+            return self._decode(image.b64_json)
+        return self._download(image.url)
+
     def _download(self, url: str) -> str:
-        path = os.path.join(self.save_dir, f"img_{int(time.time())}.png")
-        img_data = requests.get(url).content
-        with open(path, 'wb') as handler:
-            handler.write(img_data)
-        return path
\ No newline at end of file
+        """Stream the image to disk in chunks over the pooled session."""
+        with _get_session().get(url, stream=True, timeout=60) as response:
+            response.raise_for_status()
+            return self._write_atomic(response.iter_content(chunk_size=CHUNK_SIZE))
+
+    def _decode(self, b64_data: str) -> str:
+        """Decode an inline b64_json payload straight to disk, skipping the download round trip."""
+        step = CHUNK_SIZE // 3 * 4  # multiple of 4 so every slice decodes on its own
+        return self._write_atomic(
+            base64.b64decode(b64_data[i:i + step]) for i in range(0, len(b64_data), step)
+        )
+
+    def _write_atomic(self, chunks) -> str:
+        """
+        Write chunks to a temp file in save_dir, then rename it to img_<sha256>.png.
+        Naming by content hash means concurrent generations never overwrite each other.
+        """
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=self.save_dir, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as handler:
+                for chunk in chunks:
+                    if chunk:
+                        digest.update(chunk)
+                        handler.write(chunk)
+            path = os.path.join(self.save_dir, f"img_{digest.hexdigest()[:32]}.png")
+            os.replace(tmp_path, path)
+            return path
+        except BaseException:
+            os.remove(tmp_path)
+            raise
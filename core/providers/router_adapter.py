@@ -0,0 +1,232 @@
+import asyncio
+import importlib
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Any, List
+from core.providers.base_adapter import BaseAdapter, error_result, is_error_result
+from core.metrics import get_metrics
+from utils.logger import logger
+
+
+class ProviderHealth:
+    """
+    单个服务商最近 window 次调用的耗时和成败，用于排序和计算对冲阈值
+    """
+    def __init__(self, window=50):
+        self.latencies = deque(maxlen=window)   # 只记录成功调用的耗时
+        self.outcomes = deque(maxlen=window)    # True 为成功
+        self.consecutive_failures = 0
+        self._lock = threading.Lock()
+
+    def record(self, latency, ok):
+        with self._lock:
+            self.outcomes.append(ok)
+            if ok:
+                self.latencies.append(latency)
+                self.consecutive_failures = 0
+            else:
+                self.consecutive_failures += 1
+
+    def error_rate(self):
+        with self._lock:
+            if not self.outcomes:
+                return 0.0
+            return self.outcomes.count(False) / len(self.outcomes)
+
+    def percentile(self, pct):
+        """最近成功调用耗时的分位数 (nearest-rank)，没有样本时返回 None"""
+        with self._lock:
+            values = sorted(self.latencies)
+        if not values:
+            return None
+        rank = max(1, -(-len(values) * pct // 100))
+        return values[int(rank) - 1]
+
+    def samples(self):
+        with self._lock:
+            return len(self.latencies)
+
+    def score(self):
+        """成功率越高、中位耗时越低得分越高"""
+        p50 = self.percentile(50) or 0.0
+        return (1.0 - self.error_rate()) / (1.0 + p50)
+
+
+class Adapter(BaseAdapter):
+    """
+    多服务商路由：provider 配置为 "router" 时使用，服务商列表见 modules.processor.router。
+    - 故障转移：某个服务商报错或返回无法解析的 JSON 时，依次改用下一个
+    - 对冲请求：首个请求超过该服务商的 p95 耗时仍未返回时，向下一个服务商再发一次，
+      取先成功的结果并取消另一个
+    - 健康度：按服务商统计耗时和错误率，流量优先发往更健康的服务商
+    全部失败时才返回 error_result
+    """
+    def __init__(self, config):
+        router_config = config.get('router', {})
+        entries = router_config.get('providers', [])
+        if not entries:
+            raise ValueError("router 需要在 modules.processor.router.providers 中配置至少一个服务商。")
+
+        self.strategy = router_config.get('strategy', 'ordered')  # ordered 或 weighted
+        self.max_error_rate = router_config.get('max_error_rate', 0.5)
+        hedge = router_config.get('hedge', {})
+        self.hedge_enabled = hedge.get('enabled', True)
+        self.hedge_percentile = hedge.get('percentile', 95)
+        self.hedge_min_samples = hedge.get('min_samples', 10)
+        self.hedge_initial_delay = hedge.get('initial_delay', 5.0)  # 样本不足时使用
+        self.hedge_min_delay = hedge.get('min_delay', 0.5)
+
+        # 每个服务商使用 processor 配置覆盖上该条目自己的 model / base_url 等
+        base = {k: v for k, v in config.items() if k not in ('router', 'provider', 'cache')}
+        self.adapters = {}
+        self.weights = {}
+        self.order = []
+        for entry in entries:
+            name = entry.get('name', entry['provider'])
+            sub_config = dict(base, **{k: v for k, v in entry.items() if k not in ('name', 'weight')})
+            # 重试交给路由：单个服务商失败时立即转移到下一个，而不是先走完自己的退避重试
+            sub_config['rate_limit'] = dict(sub_config.get('rate_limit') or {}, max_retries=0)
+            module = importlib.import_module(f"core.providers.{entry['provider']}_adapter")
+            self.adapters[name] = module.Adapter(sub_config)
+            self.weights[name] = entry.get('weight', 1)
+            self.order.append(name)
+
+        window = router_config.get('health_window', 50)
+        self.health = {name: ProviderHealth(window) for name in self.order}
+        # 对冲时一次调用最多占用两个线程
+        self._executor = ThreadPoolExecutor(max_workers=router_config.get('workers', 16),
+                                            thread_name_prefix="router")
+        self._random = random.Random()
+
+    def ranked(self) -> List[str]:
+        """本次调用尝试服务商的顺序"""
+        if self.strategy == 'weighted':
+            # 按 权重 × 健康分 做不放回的加权抽样
+            remaining = {name: self.weights[name] * max(self.health[name].score(), 0.01) for name in self.order}
+            ranked = []
+            while remaining:
+                pick = self._random.uniform(0, sum(remaining.values()))
+                for name, weight in remaining.items():
+                    pick -= weight
+                    if pick <= 0:
+                        break
+                ranked.append(name)
+                del remaining[name]
+            return ranked
+        # ordered: 保持配置顺序，错误率超过阈值的服务商排到最后
+        return sorted(self.order, key=lambda name: self.health[name].error_rate() > self.max_error_rate)
+
+    def hedge_delay(self, name) -> float:
+        health = self.health[name]
+        if health.samples() < self.hedge_min_samples:
+            return self.hedge_initial_delay
+        return max(self.hedge_min_delay, health.percentile(self.hedge_percentile))
+
+    def _finish(self, name, start, result):
+        ok = not is_error_result(result)
+        self.health[name].record(time.monotonic() - start, ok)
+        get_metrics().inc("router_requests_total", provider=name, outcome="ok" if ok else "error")
+        return ok, result
+
+    def _call(self, name, raw_data, system_prompt):
+        start = time.monotonic()
+        try:
+            result = self.adapters[name].generate_content(raw_data, system_prompt)
+        except Exception as e:
+            result = error_result(e)
+        return self._finish(name, start, result)
+
+    async def _acall(self, name, raw_data, system_prompt):
+        start = time.monotonic()
+        try:
+            result = await self.adapters[name].agenerate_content(raw_data, system_prompt)
+        except asyncio.CancelledError:
+            raise  # 对冲落败被取消，不计入健康度
+        except Exception as e:
+            result = error_result(e)
+        return self._finish(name, start, result)
+
+    def _hedge_timeout(self, ranked, launched, pending_count, hedged):
+        """只有一个请求在途且还有备用服务商时，返回等待多久后发起对冲"""
+        if self.hedge_enabled and not hedged and pending_count == 1 and launched < len(ranked):
+            return self.hedge_delay(ranked[launched - 1])
+        return None
+
+    def _failed(self, errors):
+        logger.error(f"所有服务商均失败: {'; '.join(errors)}")
+        return error_result("all providers failed: " + "; ".join(errors))
+
+    def generate_content(self, raw_data: str, system_prompt: str) -> Dict[str, Any]:
+        ranked = self.ranked()
+        pending, errors = {}, []
+        launched, hedged = 0, False
+
+        def launch():
+            nonlocal launched
+            name = ranked[launched]
+            launched += 1
+            pending[self._executor.submit(self._call, name, raw_data, system_prompt)] = name
+
+        launch()
+        while pending:
+            timeout = self._hedge_timeout(ranked, launched, len(pending), hedged)
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                hedged = True
+                logger.info(f"{pending[next(iter(pending))]} 超过 {timeout:.2f}s 未返回，对冲请求 {ranked[launched]}")
+                get_metrics().inc("router_hedges_total")
+                launch()
+                continue
+            for future in done:
+                name = pending.pop(future)
+                ok, result = future.result()
+                if ok:
+                    # 线程中的同步请求无法中断，落败方的结果直接丢弃
+                    for loser in pending:
+                        loser.cancel()
+                    return result
+                errors.append(f"{name}: {result.get('error') if isinstance(result, dict) else result}")
+                logger.warning(f"服务商 {name} 失败，尝试下一个。")
+            if not pending and launched < len(ranked):
+                launch()
+        return self._failed(errors)
+
+    async def agenerate_content(self, raw_data: str, system_prompt: str) -> Dict[str, Any]:
+        ranked = self.ranked()
+        pending, errors = {}, []
+        launched, hedged = 0, False
+
+        def launch():
+            nonlocal launched
+            name = ranked[launched]
+            launched += 1
+            pending[asyncio.ensure_future(self._acall(name, raw_data, system_prompt))] = name
+
+        launch()
+        try:
+            while pending:
+                timeout = self._hedge_timeout(ranked, launched, len(pending), hedged)
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedged = True
+                    logger.info(f"{pending[next(iter(pending))]} 超过 {timeout:.2f}s 未返回，对冲请求 {ranked[launched]}")
+                    get_metrics().inc("router_hedges_total")
+                    launch()
+                    continue
+                for task in done:
+                    name = pending.pop(task)
+                    ok, result = task.result()
+                    if ok:
+                        return result
+                    errors.append(f"{name}: {result.get('error') if isinstance(result, dict) else result}")
+                    logger.warning(f"服务商 {name} 失败，尝试下一个。")
+                if not pending and launched < len(ranked):
+                    launch()
+        finally:
+            # 取消落败或仍在途的请求
+            for task in pending:
+                task.cancel()
+        return self._failed(errors)
@@ -1,6 +1,13 @@
+import asyncio
 import importlib
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from core.metrics import get_metrics
 from utils.logger import logger
 
+# 未在 publish_channels 中配置 timeout 时的默认值 (秒)
+DEFAULT_TIMEOUT = 60
+
 class PublishManager:
     """
     分发中控模块：负责根据 config 调度不同的平台发布器
@@ -9,42 +16,177 @@ class PublishManager:
         self.config = config
         self.publish_channels = config.get('modules', {}).get('publish_channels', {})
         self.active_publishers = {}
+        # 渠道名 -> 平台名；同一平台可以配置多个账号 (渠道)
+        self.channel_platforms = {}
         self._load_publishers()
 
     def _load_publishers(self):
         """
         动态加载配置文件中 enabled 为 true 的发布器
         """
-        for platform, settings in self.publish_channels.items():
+        for channel, settings in self.publish_channels.items():
             if settings.get('enabled'):
+                # 渠道名默认即平台名；多账号时用 platform 字段指定，例如 twitter_brand: {platform: twitter}
+                platform = settings.get('platform', channel)
                 try:
                     # 动态导入 core.publishers.twitter_pub 等模块
                     module_path = f"core.publishers.{platform}_pub"
                     module = importlib.import_module(module_path)
-                    
+
                     # 约定：每个平台模块内都有一个名为 Publisher 的类
                     publisher_class = getattr(module, "Publisher")
                     # 传入该平台的特定配置进行初始化
-                    self.active_publishers[platform] = publisher_class(settings)
-                    logger.info(f"成功加载发布器: {platform}")
+                    self.active_publishers[channel] = publisher_class(settings)
+                    self.channel_platforms[channel] = platform
+                    logger.info(f"成功加载发布器: {channel}")
                 except (ImportError, AttributeError) as e:
-                    logger.error(f"无法加载平台 {platform} 的发布模块: {e}")
+                    logger.error(f"无法加载平台 {channel} 的发布模块: {e}")
+                except ValueError as e:
+                    # 凭证或 chat_id 等配置缺失：跳过该渠道，不影响其他渠道和整个流程
+                    logger.error(f"渠道 {channel} 配置无效，已跳过: {e}")
+
+    def _timeout(self, channel):
+        return self.publish_channels.get(channel, {}).get('timeout', DEFAULT_TIMEOUT)
+
+    def _media_owners(self, channels):
+        """每个平台选第一个渠道负责上传图片，返回 {平台: 渠道}"""
+        owners = {}
+        for channel in channels:
+            owners.setdefault(self.channel_platforms[channel], channel)
+        return owners
+
+    @staticmethod
+    def _image_for(channel, content_bundle):
+        """优先使用为该渠道生成的图片衍生版本"""
+        return content_bundle.get('image_paths', {}).get(channel) or content_bundle.get('image_path')
+
+    @staticmethod
+    def _bundle_for(channel, content_bundle):
+        """每个渠道拿到自己的文案版本 (variants) 和图片版本 (image_paths)，没有时用通用的"""
+        bundle = dict(content_bundle)
+        bundle['caption'] = (content_bundle.get('variants') or {}).get(channel) or content_bundle.get('caption', '')
+        bundle['image_path'] = PublishManager._image_for(channel, content_bundle)
+        return bundle
 
-    def broadcast(self, content_bundle):
+    @staticmethod
+    def _result(success, latency, error=None, result=None, timed_out=False):
+        # timed_out: 超过截止时间，请求可能仍在后台完成，结果未知
+        return {"success": success, "latency": round(latency, 3), "error": error, "result": result,
+                "timed_out": timed_out}
+
+    def _finish(self, channel, result, on_result):
+        """记录单个渠道的指标，并立即通知调用方 (如写入运行日志)"""
+        get_metrics().observe("publish", result['latency'], platform=self.channel_platforms[channel],
+                              channel=channel, outcome="ok" if result['success'] else "error")
+        if on_result is not None:
+            try:
+                on_result(channel, result)
+            except Exception as e:
+                logger.error(f"{channel} 发布结果回调失败: {e}")
+        return result
+
+    def broadcast(self, content_bundle, channels=None, on_result=None):
         """
-        将内容发布到所有已启用的平台
+        将内容同时发布到所有已启用的平台 (或 channels 指定的子集)
         :param content_bundle: 包含文字、图片路径、标签等的字典
+        :param on_result: 可选回调 on_result(渠道, 结果)，每个渠道一结束就调用，不等其他渠道
+        :return: {渠道: {"success", "latency", "error", "result", "timed_out"}}
         """
-        if not self.active_publishers:
+        channels = [c for c in (self.active_publishers if channels is None else channels)
+                    if c in self.active_publishers]
+        if not channels:
             logger.warning("没有启用的发布渠道，跳过发布。")
-            return
+            return {}
+
+        start = time.monotonic()
+        owners = self._media_owners(channels)
+        pool = ThreadPoolExecutor(max_workers=len(channels) + len(owners))
+
+        # 同一平台的图片只上传一次，该平台的所有账号复用上传结果
+        image_path = content_bundle.get('image_path')
+        media_futures = {
+            platform: pool.submit(self.active_publishers[owner].prepare_media,
+                                  self._image_for(owner, content_bundle))
+            for platform, owner in owners.items()
+        } if image_path else {}
 
-        for platform, pub_instance in self.active_publishers.items():
-            logger.info(f"正在发布到: {platform}...")
+        def post_one(channel):
+            bundle = self._bundle_for(channel, content_bundle)
+            media_future = media_futures.get(self.channel_platforms[channel])
+            if media_future is not None:
+                bundle['media'] = media_future.result()
+            result = self.active_publishers[channel].post(bundle)
+            return result, time.monotonic() - start
+
+        pending = {pool.submit(post_one, channel): channel for channel in channels}
+        results = {}
+        while pending:
+            # 每个渠道的截止时间都从广播开始时算起；按完成顺序逐个处理
+            elapsed = time.monotonic() - start
+            timeout = max(min(self._timeout(c) for c in pending.values()) - elapsed, 0)
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                channel = pending.pop(future)
+                try:
+                    result, latency = future.result()
+                    results[channel] = self._result(True, latency, result=result)
+                    logger.info(f"{channel} 发布成功。")
+                except Exception as e:
+                    results[channel] = self._result(False, time.monotonic() - start, error=str(e))
+                    logger.error(f"{channel} 发布失败: {str(e)}")
+                self._finish(channel, results[channel], on_result)
+            elapsed = time.monotonic() - start
+            for future, channel in list(pending.items()):
+                if elapsed >= self._timeout(channel):
+                    del pending[future]
+                    results[channel] = self._result(False, elapsed, error=f"timeout after {self._timeout(channel)}s",
+                                                    timed_out=True)
+                    logger.error(f"{channel} 发布超时。")
+                    self._finish(channel, results[channel], on_result)
+
+        # 超时的请求仍在后台线程中运行，这里不等待它们
+        pool.shutdown(wait=False)
+        return results
+
+    async def abroadcast(self, content_bundle, channels=None, on_result=None):
+        """
+        异步广播：所有平台同时发布，参数和返回结构与 broadcast 相同
+        """
+        channels = [c for c in (self.active_publishers if channels is None else channels)
+                    if c in self.active_publishers]
+        if not channels:
+            logger.warning("没有启用的发布渠道，跳过发布。")
+            return {}
+
+        start = time.monotonic()
+        image_path = content_bundle.get('image_path')
+        media_tasks = {
+            platform: asyncio.ensure_future(
+                asyncio.to_thread(self.active_publishers[owner].prepare_media,
+                                  self._image_for(owner, content_bundle))
+            )
+            for platform, owner in self._media_owners(channels).items()
+        } if image_path else {}
+
+        async def post_one(channel):
+            bundle = self._bundle_for(channel, content_bundle)
+            media_task = media_tasks.get(self.channel_platforms[channel])
+            if media_task is not None:
+                bundle['media'] = await asyncio.shield(media_task)
+            return await self.active_publishers[channel].apost(bundle)
+
+        async def run(channel):
             try:
-                # content_bundle 结构应包含: {'caption': '...', 'image_path': '...', 'tags': [...]}
-                result = pub_instance.post(content_bundle)
-                if result:
-                    logger.info(f"{platform} 发布成功。")
+                result = await asyncio.wait_for(post_one(channel), timeout=self._timeout(channel))
+                logger.info(f"{channel} 发布成功。")
+                result = self._result(True, time.monotonic() - start, result=result)
+            except asyncio.TimeoutError:
+                logger.error(f"{channel} 发布超时。")
+                result = self._result(False, time.monotonic() - start,
+                                      error=f"timeout after {self._timeout(channel)}s", timed_out=True)
             except Exception as e:
-                logger.error(f"{platform} 发布失败: {str(e)}")
\ No newline at end of file
+                logger.error(f"{channel} 发布失败: {str(e)}")
+                result = self._result(False, time.monotonic() - start, error=str(e))
+            return channel, self._finish(channel, result, on_result)
+
+        return dict(await asyncio.gather(*(run(channel) for channel in channels)))
@@ -1,3 +1,4 @@
+import asyncio
 from abc import ABC, abstractmethod
 
 class BasePublisher(ABC):
@@ -9,4 +10,17 @@ class BasePublisher(ABC):
         """
         子类必须实现此方法以执行具体的 API 调用
         """
-        pass
\ No newline at end of file
+        pass
+
+    def prepare_media(self, image_path: str):
+        """
+        上传图片并返回平台侧的媒体句柄 (如 media_id)，PublishManager 会把它放入
+        content_bundle['media'] 供同平台的所有账号复用。默认不预上传，返回 None
+        """
+        return None
+
+    async def apost(self, content_bundle: dict):
+        """
+        异步版本：默认在线程中调用同步的 post，原生异步的发布器可以覆盖
+        """
+        return await asyncio.to_thread(self.post, content_bundle)
@@ -0,0 +1,167 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from .base_publisher import BasePublisher
+from core.rate_limiter import get_limiter
+from core.metrics import get_metrics
+from utils.logger import logger
+
+DEFAULT_API_BASE = "https://api.telegram.org"
+# sendPhoto 的 caption 上限，超出时图片和文字分两条发送
+CAPTION_LIMIT = 1024
+
+
+class TelegramError(Exception):
+    """Bot API 返回 ok=false；status_code / retry_after 供限流器判断是否重试及等待多久"""
+    def __init__(self, description, status_code=None, retry_after=None):
+        super().__init__(description)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class Publisher(BasePublisher):
+    """
+    Telegram Bot 发布器：
+    - 一个带连接池的 Session 复用 TCP/TLS 连接
+    - 同一张图片只上传一次，其余目标直接使用返回的 file_id (最近 file_id_cache_size 张)
+    - 多个 chat 并发发送，同时遵守 Bot 的全局限额和每个 chat 的限额
+    - 发送不是幂等操作：超时或 5xx 时消息可能已经发出，只在 429 / 连接被拒绝时重试
+    """
+    def __init__(self, platform_config):
+        super().__init__(platform_config)
+        token_env = self.config.get('api_config', 'TG_BOT_TOKEN')
+        self.token = os.getenv(token_env)
+        if not self.token:
+            raise ValueError(f"环境变量 {token_env} 未设置，请检查 .env 文件。")
+
+        # chat_id 与 chat_ids 合并，保持顺序并去重
+        chat_ids = [self.config.get('chat_id')] + list(self.config.get('chat_ids', []))
+        self.chat_ids = list(dict.fromkeys(str(c) for c in chat_ids if c))
+        if not self.chat_ids:
+            raise ValueError("Telegram 渠道需要配置 chat_id 或 chat_ids。")
+
+        # api_base 可以指向本地 Bot API 服务或测试桩
+        self.api_base = self.config.get('api_base', DEFAULT_API_BASE).rstrip('/')
+        self.request_timeout = self.config.get('request_timeout', 20)
+        self.max_concurrency = self.config.get('max_concurrency', 8)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="telegram")
+
+        # 全局限额 (同一 Bot 的所有渠道共享) 只负责节流，重试和 Retry-After 由每个 chat 的限流器处理
+        rate_config = dict(self.config.get('rate_limit', {}))
+        self.per_chat_rpm = rate_config.pop('per_chat_rpm', 20)
+        self.rate_config = rate_config
+        send_config = dict({"rpm": 1800, "max_concurrency": self.max_concurrency}, **rate_config)
+        send_config['max_retries'] = 0
+        self.send_limiter = get_limiter("telegram", self.token, "send", send_config)
+
+        # 图片上传后得到的 file_id: {(文件路径, 大小, 修改时间): file_id}，按最近使用淘汰
+        self.file_id_cache_size = self.config.get('file_id_cache_size', 256)
+        self._file_ids = OrderedDict()
+        self._upload_locks = {}
+        self._file_lock = threading.Lock()
+
+    def _chat_limiter(self, chat_id):
+        config = dict(self.rate_config, rpm=self.per_chat_rpm, initial_concurrency=1, max_concurrency=1)
+        return get_limiter("telegram", self.token, f"chat:{chat_id}", config)
+
+    def _request(self, method, data, upload=None):
+        url = f"{self.api_base}/bot{self.token}/{method}"
+        if upload:
+            # 每次 (包括重试) 重新打开文件，保证上传完整内容
+            with open(upload, 'rb') as f:
+                response = self.session.post(url, data=data, files={"photo": (os.path.basename(upload), f)},
+                                             timeout=self.request_timeout)
+        else:
+            response = self.session.post(url, data=data, timeout=self.request_timeout)
+        try:
+            payload = response.json()
+        except ValueError:
+            payload = {"ok": False, "description": response.text[:200]}
+        if not payload.get('ok'):
+            retry_after = (payload.get('parameters') or {}).get('retry_after')
+            raise TelegramError(f"{method}: {payload.get('description')}", response.status_code, retry_after)
+        return payload['result']
+
+    def _send(self, chat_id, method, data, upload=None):
+        data = dict(data, chat_id=chat_id)
+        return self._chat_limiter(chat_id).call(self.send_limiter.call, self._request, method, data, upload,
+                                                idempotent=False)
+
+    def _cached_file_id(self, key):
+        with self._file_lock:
+            file_id = self._file_ids.get(key)
+            if file_id is not None:
+                self._file_ids.move_to_end(key)
+            return file_id
+
+    def _remember_file_id(self, key, file_id):
+        with self._file_lock:
+            self._file_ids[key] = file_id
+            self._file_ids.move_to_end(key)
+            while len(self._file_ids) > self.file_id_cache_size:
+                self._file_ids.popitem(last=False)
+
+    def _send_photo(self, chat_id, image_path, caption):
+        """首次发送某张图片时上传文件，之后的发送都复用 file_id"""
+        stat = os.stat(image_path)
+        key = (os.path.abspath(image_path), stat.st_size, stat.st_mtime)
+        data = {"caption": caption} if caption else {}
+
+        file_id = self._cached_file_id(key)
+        if file_id is None:
+            with self._file_lock:
+                lock = self._upload_locks.setdefault(key, threading.Lock())
+            # 并发发往多个 chat 时，只有一个线程上传，其余等待它拿到 file_id
+            try:
+                with lock:
+                    file_id = self._cached_file_id(key)
+                    if file_id is None:
+                        message = self._send(chat_id, "sendPhoto", data, upload=image_path)
+                        self._remember_file_id(key, message['photo'][-1]['file_id'])
+                        return message
+            finally:
+                with self._file_lock:
+                    self._upload_locks.pop(key, None)
+
+        get_metrics().inc("telegram_media_reused_total")
+        return self._send(chat_id, "sendPhoto", dict(data, photo=file_id))
+
+    def _post_to_chat(self, chat_id, text, image_path):
+        if not image_path:
+            return self._send(chat_id, "sendMessage", {"text": text})
+        if len(text) <= CAPTION_LIMIT:
+            return self._send_photo(chat_id, image_path, text)
+        self._send_photo(chat_id, image_path, None)
+        return self._send(chat_id, "sendMessage", {"text": text})
+
+    def post(self, content_bundle):
+        caption = content_bundle.get('caption', '')
+        tags = " ".join(content_bundle.get('tags', []))
+        text = f"{caption}\n\n{tags}".strip()
+
+        image_path = content_bundle.get('image_path')
+        if not (self.config.get('post_image', True) and image_path and os.path.exists(image_path)):
+            image_path = None
+
+        futures = {chat_id: self._pool.submit(self._post_to_chat, chat_id, text, image_path)
+                   for chat_id in self.chat_ids}
+        sent, failed = {}, {}
+        for chat_id, future in futures.items():
+            try:
+                sent[chat_id] = future.result()['message_id']
+            except Exception as e:
+                failed[chat_id] = str(e)
+                logger.error(f"Telegram 发送到 {chat_id} 失败: {e}")
+
+        # 部分成功时不抛异常，否则重试会向已成功的 chat 重复发送
+        if not sent:
+            raise TelegramError(f"所有 chat 均发送失败: {failed}")
+        return {"sent": sent, "failed": failed}
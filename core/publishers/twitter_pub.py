@@ -1,6 +1,7 @@
 import tweepy
 import os
 from .base_publisher import BasePublisher
+from core.rate_limiter import get_limiter
 from utils.logger import logger
 
 class Publisher(BasePublisher):
@@ -22,32 +23,53 @@ class Publisher(BasePublisher):
         auth = tweepy.OAuth1UserHandler(self.api_key, self.api_secret, self.access_token, self.access_token_secret)
         self.api_v1 = tweepy.API(auth)
 
-    def post(self, content_bundle):
-        caption = content_bundle.get('caption', '')
-        tags = " ".join(content_bundle.get('tags', []))
-        full_text = f"{caption}\n\n{tags}"
-        image_path = content_bundle.get('image_path')
+        # 发推和上传媒体分别限流 (同一账号的多个实例共享)
+        rate_config = self.config.get('rate_limit', {})
+        self.tweet_limiter = get_limiter("twitter", self.access_token, "tweets", rate_config)
+        self.media_limiter = get_limiter("twitter", self.access_token, "media", rate_config)
 
+    def prepare_media(self, image_path):
+        """
+        上传图片并返回 media_ids 列表；多个账号共用时需在配置中填写 additional_owners
+        """
         # 从 config.yaml 读取是否允许发图，默认为 True
         allow_post_image = self.config.get('post_image', True)
 
-        media_ids = []
         # 只有在开关打开且文件存在时才上传
-        if allow_post_image and image_path and os.path.exists(image_path):
-            try:
-                logger.info(f"正在上传媒体文件: {image_path}")
-                media = self.api_v1.media_upload(filename=image_path)
-                media_ids = [media.media_id]
-                logger.info(f"媒体上传成功，ID: {media_ids}")
-            except Exception as e:
-                logger.error(f"图片上传失败: {e}")
+        if not (allow_post_image and image_path and os.path.exists(image_path)):
+            return []
+        try:
+            logger.info(f"正在上传媒体文件: {image_path}")
+            kwargs = {}
+            if self.config.get('additional_owners'):
+                kwargs['additional_owners'] = self.config['additional_owners']
+            media = self.media_limiter.call(self.api_v1.media_upload, filename=image_path, **kwargs)
+            logger.info(f"媒体上传成功，ID: {media.media_id}")
+            return [media.media_id]
+        except Exception as e:
+            logger.error(f"图片上传失败: {e}")
+            return []
+
+    def post(self, content_bundle):
+        caption = content_bundle.get('caption', '')
+        tags = " ".join(content_bundle.get('tags', []))
+        full_text = f"{caption}\n\n{tags}"
+
+        # PublishManager 已统一上传过图片时直接复用，否则自行上传
+        if not self.config.get('post_image', True):
+            media_ids = []
+        elif 'media' in content_bundle:
+            media_ids = content_bundle['media'] or []
+        else:
+            media_ids = self.prepare_media(content_bundle.get('image_path'))
 
-        # 发布推文：必须显式传入 media_ids 参数
+        # 发布推文：必须显式传入 media_ids 参数；发推不是幂等操作，超时不重试以免重复发布
         try:
             if media_ids:
-                response = self.client.create_tweet(text=full_text, media_ids=media_ids)
+                response = self.tweet_limiter.call(self.client.create_tweet, text=full_text, media_ids=media_ids,
+                                                   idempotent=False)
             else:
-                response = self.client.create_tweet(text=full_text)
+                response = self.tweet_limiter.call(self.client.create_tweet, text=full_text, idempotent=False)
             return response.data
         except Exception as e:
             logger.error(f"推文发布失败: {e}")
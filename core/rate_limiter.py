@@ -0,0 +1,314 @@
+import asyncio
+import email.utils
+import hashlib
+import random
+import threading
+import time
+
+# 这些状态码视为临时错误，可以退避后重试
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    令牌桶：rate 为每秒补充的令牌数，capacity 为突发上限。
+    reserve() 立即预占令牌并返回需要等待的秒数，同步和异步调用方都可以使用。
+    """
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, amount=1):
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # 单次请求超过桶容量时按容量计算，避免永远等不到
+            self.tokens -= min(amount, self.capacity)
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self.blocked_until - now)
+
+    def adjust(self, amount):
+        """归还 (正数) 或补扣 (负数) 令牌，用于按实际用量修正 reserve 时的预估"""
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+    def pause(self, seconds):
+        """服务端要求等待 (Retry-After) 时，让所有共享该桶的调用方一起暂停"""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD 并发控制：每次成功加性增长，遇到限流乘性下降，
+    让并发数稳定在配额附近而不越过
+    """
+    def __init__(self, initial=4, minimum=1, maximum=32, decrease=0.5):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+        self.in_flight = 0
+        self._cond = threading.Condition()
+        # 异步调用方等待的 (事件循环, future)，release 时跨线程唤醒
+        self._waiters = []
+
+    def try_acquire(self):
+        with self._cond:
+            if self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return True
+            return False
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    async def aacquire(self):
+        """acquire 的异步版本：挂起协程直到有空位，不阻塞事件循环，也不轮询"""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                if self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return
+                waiter = (loop, loop.create_future())
+                self._waiters.append(waiter)
+            try:
+                await waiter[1]
+            finally:
+                with self._cond:
+                    if waiter in self._waiters:
+                        self._waiters.remove(waiter)
+
+    def release(self, throttled=False, cancelled=False):
+        """cancelled: 请求被取消 (如对冲请求的落败方)，只归还空位，不调整并发上限"""
+        with self._cond:
+            self.in_flight -= 1
+            if throttled:
+                self.limit = max(self.minimum, self.limit * self.decrease)
+            elif not cancelled:
+                self.limit = min(self.maximum, self.limit + 1.0 / max(self.limit, 1.0))
+            self._cond.notify_all()
+            waiters, self._waiters = self._waiters, []
+        # 唤醒的协程会重新检查空位，抢不到的再次排队
+        for loop, future in waiters:
+            loop.call_soon_threadsafe(_wake, future)
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
+
+
+def status_code(error):
+    """从 openai / tweepy / requests 的异常中取出 HTTP 状态码"""
+    code = getattr(error, 'status_code', None)
+    response = getattr(error, 'response', None)
+    if code is None and response is not None:
+        code = getattr(response, 'status_code', None) or getattr(response, 'status', None)
+    return code
+
+
+def retry_after(error):
+    """解析 Retry-After (秒或 HTTP 日期) 以及 X 的 x-rate-limit-reset，单位秒"""
+    seconds = getattr(error, 'retry_after', None)  # Telegram 等在错误体中返回
+    if seconds:
+        return float(seconds)
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+    value = headers.get('retry-after') or headers.get('Retry-After')
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            parsed = email.utils.parsedate_to_datetime(value)
+            return max(0.0, parsed.timestamp() - time.time())
+    reset = headers.get('x-rate-limit-reset')
+    if reset:
+        return max(0.0, float(reset) - time.time())
+    return None
+
+
+def is_retryable(error):
+    if status_code(error) in RETRYABLE_STATUS:
+        return True
+    name = type(error).__name__
+    return 'Timeout' in name or 'Connection' in name or 'RateLimit' in name or 'TooManyRequests' in name
+
+
+def is_throttled(error):
+    name = type(error).__name__
+    return status_code(error) == 429 or 'RateLimit' in name or 'TooManyRequests' in name
+
+
+def _causes(error):
+    """沿 __cause__ / __context__ 以及 requests / urllib3 的包装 (args、reason) 展开异常链"""
+    seen, stack = set(), [error]
+    while stack:
+        current = stack.pop()
+        if not isinstance(current, BaseException) or id(current) in seen:
+            continue
+        seen.add(id(current))
+        yield current
+        stack.extend([current.__cause__, current.__context__, getattr(current, 'reason', None), *current.args])
+
+
+def is_connection_refused(error):
+    """连接没有建立 (被拒绝)，请求一定没有发到服务端"""
+    return any(isinstance(e, ConnectionRefusedError) or type(e).__name__ in ('NewConnectionError', 'ConnectError')
+               for e in _causes(error))
+
+
+def is_safe_to_retry(error, idempotent=True):
+    """
+    非幂等请求 (发帖、发消息) 超时或 5xx 时服务端可能已经执行，重试会重复发布；
+    只有被限流 (429) 或连接被拒绝时才能确定没有生效
+    """
+    if idempotent:
+        return is_retryable(error)
+    return is_throttled(error) or is_connection_refused(error)
+
+
+def usage_tokens(result):
+    """取出响应中的实际 token 用量 (OpenAI 兼容的 usage.total_tokens)，没有时返回 None"""
+    usage = result.get('usage') if isinstance(result, dict) else getattr(result, 'usage', None)
+    if usage is None:
+        return None
+    total = usage.get('total_tokens') if isinstance(usage, dict) else getattr(usage, 'total_tokens', None)
+    return total if isinstance(total, (int, float)) else None
+
+
+class RateLimiter:
+    """
+    单个 (API Key, 接口) 的限流器：请求数/分钟 + token 数/分钟两个令牌桶，
+    AIMD 自适应并发，以及带抖动的指数退避重试。
+    tokens 为预估用量，响应带 usage 时按实际用量修正 token 桶；
+    idempotent=False 的调用 (发帖等) 只在确定没有生效时重试，见 is_safe_to_retry
+    """
+    def __init__(self, config):
+        rpm = config.get('rpm')
+        tpm = config.get('tpm')
+        self.requests = TokenBucket(rpm / 60.0, max(1, rpm / 6)) if rpm else None
+        self.tokens = TokenBucket(tpm / 60.0, max(1, tpm / 6)) if tpm else None
+        self.concurrency = AdaptiveConcurrency(
+            initial=config.get('initial_concurrency', 4),
+            maximum=config.get('max_concurrency', 32)
+        )
+        self.max_retries = config.get('max_retries', 4)
+        self.base_delay = config.get('base_delay', 1.0)
+        self.max_delay = config.get('max_delay', 60.0)
+
+    def _reserve(self, tokens):
+        wait = self.requests.reserve(1) if self.requests else 0.0
+        if self.tokens and tokens:
+            wait = max(wait, self.tokens.reserve(tokens))
+        return wait
+
+    def _reconcile(self, tokens, result=None, error=None):
+        """
+        用实际用量修正预占的 token：被限流的请求没有消耗，成功的按 usage 多退少补；
+        被取消的请求 (CancelledError 等非 Exception) 拿不到 usage，同样退还预占
+        """
+        if not (self.tokens and tokens):
+            return
+        reserved = min(tokens, self.tokens.capacity)
+        if error is not None:
+            if is_throttled(error) or not isinstance(error, Exception):
+                self.tokens.adjust(reserved)
+            return
+        actual = usage_tokens(result)
+        if actual is not None:
+            self.tokens.adjust(reserved - actual)
+
+    def _backoff(self, attempt, error):
+        delay = retry_after(error)
+        if delay is not None:
+            # 服务端明确给出等待时间，共享这个桶的其他调用方也一起等
+            for bucket in (self.requests, self.tokens):
+                if bucket:
+                    bucket.pause(delay)
+            return delay
+        # full jitter: [0, min(max_delay, base * 2^attempt)]
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def call(self, fn, *args, tokens=0, idempotent=True, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            time.sleep(self._reserve(tokens))
+            self.concurrency.acquire()
+            throttled = cancelled = False
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                throttled = is_throttled(e)
+                self._reconcile(tokens, error=e)
+                if attempt >= self.max_retries or not is_safe_to_retry(e, idempotent):
+                    raise
+                delay = self._backoff(attempt, e)
+            except BaseException as e:
+                cancelled = True
+                self._reconcile(tokens, error=e)
+                raise
+            else:
+                self._reconcile(tokens, result=result)
+                return result
+            finally:
+                # 无论成功、失败还是被中断都要归还并发空位，否则空位泄漏后限流器会卡死
+                self.concurrency.release(throttled=throttled, cancelled=cancelled)
+            time.sleep(delay)
+
+    async def acall(self, fn, *args, tokens=0, idempotent=True, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            await asyncio.sleep(self._reserve(tokens))
+            await self.concurrency.aacquire()
+            throttled = cancelled = False
+            try:
+                result = await fn(*args, **kwargs)
+            except Exception as e:
+                throttled = is_throttled(e)
+                self._reconcile(tokens, error=e)
+                if attempt >= self.max_retries or not is_safe_to_retry(e, idempotent):
+                    raise
+                delay = self._backoff(attempt, e)
+            except BaseException as e:
+                # asyncio.CancelledError 不是 Exception：对冲请求的落败方每次都会走到这里
+                cancelled = True
+                self._reconcile(tokens, error=e)
+                raise
+            else:
+                self._reconcile(tokens, result=result)
+                return result
+            finally:
+                self.concurrency.release(throttled=throttled, cancelled=cancelled)
+            await asyncio.sleep(delay)
+
+
+# 全局注册表：同一个 Key + 接口在整个进程内共享一个限流器
+_limiters = {}
+_registry_lock = threading.Lock()
+
+
+def get_limiter(service, api_key, endpoint, config):
+    """
+    service: openai / twitter / telegram ...
+    api_key 只用于区分配额，注册表中保存的是它的哈希
+    """
+    key_id = hashlib.sha256((api_key or '').encode('utf-8')).hexdigest()[:12]
+    key = (service, key_id, endpoint)
+    with _registry_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = RateLimiter(config or {})
+            _limiters[key] = limiter
+        return limiter
+
+
+def estimate_tokens(*texts, completion=500):
+    """粗略估计一次请求的 token 数 (约 4 个字符 1 个 token)，用于 tpm 预占"""
+    return sum(len(t or '') for t in texts) // 4 + completion
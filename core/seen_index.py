@@ -0,0 +1,151 @@
+import hashlib
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# 这些查询参数只用于追踪来源，不影响文章本身
+_TRACKING_PARAMS = {'fbclid', 'gclid', 'ref', 'ref_src', 'mc_cid', 'mc_eid'}
+
+
+def normalize_link(link):
+    """规范化链接：统一协议和大小写、去掉 www、锚点、追踪参数和末尾斜杠"""
+    if not link:
+        return ""
+    parts = urlsplit(link.strip())
+    netloc = parts.netloc.lower()
+    if netloc.startswith('www.'):
+        netloc = netloc[4:]
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith('utm_') and k.lower() not in _TRACKING_PARAMS
+    )
+    path = parts.path.rstrip('/') or '/'
+    scheme = parts.scheme.lower()
+    if scheme == 'http':
+        scheme = 'https'
+    return urlunsplit((scheme, netloc, path, urlencode(query), ''))
+
+
+def content_hash(item):
+    """标题 + 摘要的指纹，忽略大小写、标点和空白差异"""
+    text = f"{item.get('title', '')} {item.get('summary', '')}".lower()
+    text = " ".join(re.findall(r"\w+", text))
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def item_keys(item):
+    keys = ["hash:" + content_hash(item)]
+    link = normalize_link(item.get('link', ''))
+    if link:
+        keys.append("link:" + link)
+    return keys
+
+
+class BloomFilter:
+    """
+    纯内存布隆过滤器：判断“一定没见过”只需 O(k) 次位运算，
+    命中时再回到 SQLite 确认，因此误判只影响性能不影响正确性
+    """
+    def __init__(self, capacity, error_rate=0.001):
+        capacity = max(capacity, 1)
+        self.size = int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class SeenIndex:
+    """
+    已处理条目索引：SQLite 持久化 + 内存布隆过滤器加速。
+    以规范化链接和内容指纹为键，超过 TTL 的记录视为未见过并会被清理。
+    """
+    def __init__(self, path="data/cache/seen.db", ttl_days=30, bloom_capacity=1000000):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        self.ttl = ttl_days * 86400
+        # 抓取、常驻模式和异步模式会在不同线程中调用，共用一个连接并加锁 (布隆过滤器也由该锁保护)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS seen (key TEXT PRIMARY KEY, seen_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_seen_at ON seen (seen_at)")
+            self._conn.commit()
+
+        self.prune()
+        self.bloom = BloomFilter(bloom_capacity)
+        with self._lock:
+            # 逐行遍历游标填充过滤器，不会把所有键一次性读入内存
+            for (key,) in self._conn.execute("SELECT key FROM seen"):
+                self.bloom.add(key)
+
+    def prune(self):
+        """删除过期记录，返回删除条数"""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM seen WHERE seen_at < ?", (time.time() - self.ttl,))
+            self._conn.commit()
+            return cursor.rowcount
+
+    def _known(self, key, cutoff):
+        """调用方需持有 self._lock"""
+        if key not in self.bloom:
+            return False
+        row = self._conn.execute(
+            "SELECT 1 FROM seen WHERE key = ? AND seen_at >= ?", (key, cutoff)
+        ).fetchone()
+        return row is not None
+
+    def is_seen(self, item):
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            return any(self._known(key, cutoff) for key in item_keys(item))
+
+    def filter_unseen(self, items):
+        """过滤掉已处理过的条目，同一批次内的重复也只保留第一条"""
+        cutoff = time.time() - self.ttl
+        batch_keys = set()
+        fresh = []
+        with self._lock:
+            for item in items:
+                keys = item_keys(item)
+                if any(k in batch_keys or self._known(k, cutoff) for k in keys):
+                    continue
+                batch_keys.update(keys)
+                fresh.append(item)
+        return fresh
+
+    def mark_seen(self, items):
+        now = time.time()
+        rows = [(key, now) for item in items for key in item_keys(item)]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO seen (key, seen_at) VALUES (?, ?)", rows)
+            self._conn.commit()
+            for key, _ in rows:
+                self.bloom.add(key)
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
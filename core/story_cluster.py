@@ -0,0 +1,108 @@
+import hashlib
+import random
+import re
+
+# 常见虚词不参与指纹计算
+_STOPWORDS = {
+    'a', 'an', 'the', 'and', 'or', 'of', 'to', 'in', 'on', 'for', 'with', 'at', 'by',
+    'from', 'is', 'are', 'was', 'were', 'be', 'as', 'it', 'its', 'this', 'that', 'has',
+    'have', 'after', 'over', 'new', 'says', 'said',
+}
+_MERSENNE_PRIME = (1 << 61) - 1
+
+
+def _tokens(item):
+    text = f"{item.get('title', '')} {item.get('summary', '')}".lower()
+    # 去掉 RSS 摘要中的 HTML 标签
+    text = re.sub(r'<[^>]+>', ' ', text)
+    return {w for w in re.findall(r'\w+', text) if w not in _STOPWORDS and len(w) > 1}
+
+
+class StoryClusterer:
+    """
+    基于 MinHash + LSH 的近似重复新闻聚类：
+    不同来源报道同一事件时只保留一个代表条目送入 AI，其余作为 related 附带
+    """
+    def __init__(self, threshold=0.5, num_perm=64, bands=16, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm 必须能被 bands 整除")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+
+        rng = random.Random(seed)
+        self._perms = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, item):
+        hashes = [
+            int.from_bytes(hashlib.blake2b(t.encode('utf-8'), digest_size=8).digest(), 'little')
+            for t in _tokens(item)
+        ]
+        if not hashes:
+            return None
+        return tuple(
+            min((a * h + b) % _MERSENNE_PRIME for h in hashes)
+            for a, b in self._perms
+        )
+
+    @staticmethod
+    def similarity(sig_a, sig_b):
+        """用 MinHash 签名估计 Jaccard 相似度"""
+        return sum(x == y for x, y in zip(sig_a, sig_b)) / len(sig_a)
+
+    def cluster(self, items):
+        """
+        返回簇列表 (每个簇是条目下标列表)。
+        LSH 分桶后只比较同桶候选，整体复杂度接近线性。
+        """
+        parent = list(range(len(items)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        signatures = [self.signature(item) for item in items]
+        buckets = {}
+        for index, sig in enumerate(signatures):
+            if sig is None:
+                continue
+            for band in range(self.bands):
+                key = (band, sig[band * self.rows:(band + 1) * self.rows])
+                buckets.setdefault(key, []).append(index)
+
+        for members in buckets.values():
+            for pos, a in enumerate(members):
+                for b in members[pos + 1:]:
+                    root_a, root_b = find(a), find(b)
+                    if root_a == root_b:
+                        continue
+                    if self.similarity(signatures[a], signatures[b]) >= self.threshold:
+                        parent[root_b] = root_a
+
+        clusters = {}
+        for index in range(len(items)):
+            clusters.setdefault(find(index), []).append(index)
+        return list(clusters.values())
+
+    def collapse(self, items):
+        """
+        每个簇只保留分数最高的条目 (同分取靠前的)，其余条目放入代表条目的 related 字段。
+        输出保持代表条目在原列表中的相对顺序。
+        """
+        representatives = []
+        for members in self.cluster(items):
+            best = max(members, key=lambda i: (items[i].get('score', 0), -i))
+            rep = items[best]
+            related = [items[i] for i in members if i != best]
+            if related:
+                rep['related'] = related
+            representatives.append((best, rep))
+
+        representatives.sort(key=lambda pair: pair[0])
+        return [rep for _, rep in representatives]
@@ -0,0 +1,102 @@
+import email.utils
+from datetime import datetime, timezone
+from xml.etree.ElementTree import ParseError, XMLPullParser
+
+ATOM = "{http://www.w3.org/2005/Atom}"
+RSS1 = "{http://purl.org/rss/1.0/}"
+DC = "{http://purl.org/dc/elements/1.1/}"
+CONTENT = "{http://purl.org/rss/1.0/modules/content/}"
+
+# 条目元素: RSS 2.0 <item>、RSS 1.0 (RDF) <item>、Atom <entry>
+ENTRY_TAGS = {"item", RSS1 + "item", ATOM + "entry"}
+TITLE_TAGS = {"title", RSS1 + "title", ATOM + "title"}
+SUMMARY_TAGS = ["description", RSS1 + "description", ATOM + "summary", CONTENT + "encoded", ATOM + "content"]
+DATE_TAGS = ["pubDate", ATOM + "published", DC + "date", ATOM + "updated"]
+
+
+class StreamParseError(Exception):
+    """流式解析失败 (格式错误或无法识别)；data 为已读取的字节，调用方拼上剩余部分后交给 feedparser"""
+    def __init__(self, message, data):
+        super().__init__(message)
+        self.data = data
+
+
+def parse_date(value):
+    """RFC 822 (RSS) 或 ISO 8601 (Atom) 转为 UTC ISO 字符串，无法解析时返回 None"""
+    value = (value or "").strip()
+    if not value:
+        return None
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).isoformat()
+
+
+def _text(elem, tags):
+    for tag in tags:
+        child = elem.find(tag)
+        if child is not None and (child.text or "").strip():
+            return child.text.strip()
+    return ""
+
+
+def _link(elem):
+    link = elem.find("link")
+    if link is None:
+        link = elem.find(RSS1 + "link")
+    if link is not None and (link.text or "").strip():
+        return link.text.strip()
+    # Atom: 优先 rel="alternate" (缺省即 alternate)
+    for child in elem.findall(ATOM + "link"):
+        if child.get("rel", "alternate") == "alternate" and child.get("href"):
+            return child.get("href")
+    guid = elem.find("guid")
+    if guid is not None and guid.get("isPermaLink", "true") == "true" and (guid.text or "").strip():
+        return guid.text.strip()
+    return ""
+
+
+def _entry(elem):
+    return {
+        "title": _text(elem, TITLE_TAGS),
+        "link": _link(elem),
+        "summary": _text(elem, SUMMARY_TAGS),
+        "published": parse_date(_text(elem, DATE_TAGS)),
+    }
+
+
+def parse_stream(chunks, max_entries):
+    """
+    增量解析 RSS / Atom：边读边解析，只取 Ingestor 用到的字段，
+    拿到 max_entries 条后立即返回，不再读取剩余的响应。
+    格式错误或一个条目都没有解析到时抛出 StreamParseError。
+    """
+    parser = XMLPullParser(events=("end",))
+    consumed = []
+    entries = []
+    for chunk in chunks:
+        consumed.append(chunk)
+        try:
+            parser.feed(chunk)
+            events = list(parser.read_events())
+        except ParseError as e:
+            raise StreamParseError(str(e), b"".join(consumed))
+        for _, elem in events:
+            if elem.tag in ENTRY_TAGS:
+                entries.append(_entry(elem))
+                elem.clear()  # 已提取的条目不再保留子树
+                if len(entries) >= max_entries:
+                    return entries
+    try:
+        parser.close()
+    except ParseError as e:
+        raise StreamParseError(str(e), b"".join(consumed))
+    if not entries:
+        raise StreamParseError("no entries found", b"".join(consumed))
+    return entries
@@ -1,76 +1,316 @@
+import argparse
 import yaml
 import os
-from core.ingestor import Ingestor
-from core.processor import Processor
-from core.media_studio import MediaStudio
-from core.publisher import PublishManager
-from utils.logger import logger
+from dotenv import load_dotenv
+from utils.logger import logger, configure_logging, set_correlation_id
+
+# 注意：各阶段模块 (及其依赖的 openai / tweepy / feedparser 等) 只在对应开关打开时才导入，
+# 以缩短定时任务的启动时间。启动耗时预算见 test_startup.py
+
+def load_config(config_path=None):
+    # 凭证 (OPENAI_API_KEY、TG_BOT_TOKEN 等) 在启动时统一从 .env 读取，
+    # 不依赖某个适配器被导入：从日志恢复时可能不创建 Processor，但发布器仍需要凭证
+    load_dotenv()
 
-def load_config():
     # 使用绝对路径确保脚本在不同目录下运行都能找到配置
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    config_path = os.path.join(base_dir, "config", "config.yaml")
+    if config_path is None:
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        config_path = os.path.join(base_dir, "config", "config.yaml")
     
     if not os.path.exists(config_path):
         raise FileNotFoundError(f"未找到配置文件: {config_path}")
         
     with open(config_path, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f)
+        config = yaml.safe_load(f)
+
+    # 按配置切换日志模式 (队列 / 同步、文本 / JSON、重复日志限流)
+    logging_config = dict(config.get('logging') or {})
+    if config.get('paths', {}).get('log_file'):
+        logging_config.setdefault('file', config['paths']['log_file'])
+    configure_logging(logging_config)
+    return config
+
+def load_derivative_builder(config):
+    """
+    按 media_studio.derivatives 配置创建图片衍生版本构建器，未开启时返回 None
+    """
+    derivative_config = config['modules']['media_studio'].get('derivatives', {})
+    if not derivative_config.get('enabled'):
+        return None
+    from core.derivatives import DerivativeBuilder
+    return DerivativeBuilder(config['modules'].get('publish_channels', {}), derivative_config)
+
+def load_journal(config):
+    """
+    按 journal 配置创建运行日志，未开启时返回 None
+    """
+    if not (config.get('journal') or {}).get('enabled'):
+        return None
+    from core.journal import open_journal
+    return open_journal(config)
+
+def publish_channels(config):
+    """开启分发时返回渠道配置，Processor 会为每个启用的渠道生成一个文案版本"""
+    if not config['pipeline'].get('enable_publisher'):
+        return {}
+    return config['modules'].get('publish_channels', {})
 
-def run_bot():
-    config = load_config()
+def load_metrics(config):
+    """按 metrics 配置开启指标采集，关闭时各阶段的埋点几乎没有开销"""
+    from core.metrics import configure
+    return configure(config.get('metrics'))
+
+def run_bot(config_path=None):
+    config = load_config(config_path)
+    load_metrics(config)
     logger.info("--- OpenContentBot 启动整合流程 ---")
 
-    # 1. Ingestor: 数据采集
-    raw_data = "Manual seed prompt"
+    # 运行日志：上次崩溃或部分发布失败的任务会优先从断点继续
+    journal = load_journal(config)
+    entry = journal.next_pending() if journal else None
+
+    ingestor = None
     if config['pipeline'].get('enable_ingestor'):
-        logger.info("步骤 1: 正在采集数据...")
+        from core.ingestor import Ingestor
         ingestor = Ingestor(config['modules']['ingestor'])
-        raw_data = ingestor.fetch()
-        if not raw_data:
-            logger.warning("未采集到有效数据，流程终止。")
-            return
 
-    # 2. Processor: AI 逻辑处理
-    logger.info("步骤 2: AI 正在处理内容...")
-    processor = Processor(config['modules']['processor'])
-    ai_content = processor.process(str(raw_data)) # 确保传入字符串
-    
-    if not ai_content or 'caption' not in ai_content:
-        logger.error("AI 内容生成失败，缺少必要字段。")
+    # 1. Ingestor: 数据采集
+    if entry:
+        logger.info(f"恢复未完成的任务 {entry['item_id']} (阶段: {entry['stage']})")
+        raw_data = entry['raw']
+    else:
+        raw_data = "Manual seed prompt"
+        if ingestor:
+            logger.info("步骤 1: 正在采集数据...")
+            raw_data = ingestor.fetch()
+            if not raw_data:
+                logger.warning("未采集到有效数据，流程终止。")
+                return
+        if journal and ingestor:
+            entry = journal.get(journal.begin(raw_data))
+            if entry['stage'] in ('done', 'failed'):
+                logger.info("该批内容已处理过，跳过。")
+                return
+        elif journal:
+            # 手动种子提示每次都相同，记入运行日志会在第二次运行时被当作已完成而跳过
+            journal = None
+    item_id = entry['item_id'] if entry else None
+    if item_id:
+        set_correlation_id(item_id)
+
+    if not config['pipeline'].get('enable_processor', True):
+        logger.info("AI 处理已关闭，流程结束。")
         return
+
+    # 2. Processor: AI 逻辑处理
+    ai_content = entry['content'] if entry else None
+    if ai_content:
+        logger.info("步骤 2: 复用上次已生成的内容。")
+    else:
+        logger.info("步骤 2: AI 正在处理内容...")
+        from core.processor import Processor
+        from core.providers.base_adapter import is_error_result
+        processor = Processor(config['modules']['processor'], publish_channels(config))
+        ai_content = processor.process(processor.prepare_input(raw_data))
+
+        # 失败时适配器返回占位文案，绝不能当作正常内容发布
+        if not ai_content or 'caption' not in ai_content or is_error_result(ai_content):
+            logger.error("AI 内容生成失败，缺少必要字段。")
+            return
+        if journal:
+            journal.record_processed(item_id, ai_content)
+
+    # 记录已处理的条目，下次运行不会重复消耗 LLM / 图片额度
+    if ingestor and isinstance(raw_data, list):
+        ingestor.mark_processed(raw_data)
         
     logger.info(f"生成文案概览: {ai_content.get('caption', '')[:30]}...")
 
     # 3. Media Studio: 多媒体生成
     image_path = None
-    if config['pipeline'].get('enable_image_gen'):
-        logger.info("步骤 3: 正在生成 AI 图片...")
-        # 注意：这里要确保 config.yaml 中存在 modules.media_studio.image 节点
-        image_config = config['modules']['media_studio'].get('image')
-        if image_config:
-            studio = MediaStudio(image_config) 
-            image_path = studio.create_visual(ai_content.get('image_prompt', ''))
-        else:
-            logger.warning("未找到图像生成配置，跳过此步骤。")
+    image_paths = {}
+    if entry and entry['stage'] == 'image':
+        logger.info("步骤 3: 复用上次已生成的图片。")
+        image_path, image_paths = entry['image_path'], entry['image_paths']
+    else:
+        if config['pipeline'].get('enable_image_gen'):
+            logger.info("步骤 3: 正在生成 AI 图片...")
+            # 注意：这里要确保 config.yaml 中存在 modules.media_studio.image 节点
+            image_config = config['modules']['media_studio'].get('image')
+            if image_config:
+                from core.media_studio import MediaStudio
+                studio = MediaStudio(image_config) 
+                image_path = studio.create_visual(ai_content.get('image_prompt', ''))
+                studio.close()
+            else:
+                logger.warning("未找到图像生成配置，跳过此步骤。")
+
+        # 为每个渠道生成尺寸/格式合适的图片版本
+        derivative_builder = load_derivative_builder(config)
+        if derivative_builder and image_path and config['pipeline'].get('enable_publisher'):
+            image_paths = derivative_builder.build(image_path)
+            derivative_builder.close()
+        if journal:
+            journal.record_image(item_id, image_path, image_paths)
     
     # 4. Publisher: 分发
     if config['pipeline'].get('enable_publisher'):
         logger.info("步骤 4: 正在执行分发任务...")
+        from core.publisher import PublishManager
         publisher_manager = PublishManager(config)
         
         content_bundle = {
             "caption": ai_content.get('caption', ''),
             "image_path": image_path,
-            "tags": ai_content.get('tags', [])
+            "image_paths": image_paths,
+            "tags": ai_content.get('tags', []),
+            "variants": ai_content.get('variants', {})
         }
-        
-        publisher_manager.broadcast(content_bundle)
+
+        # 已经发布成功的渠道不再重复发布，每个渠道完成时立即记入运行日志
+        if journal:
+            journal.publish(publisher_manager, item_id, content_bundle)
+        else:
+            publisher_manager.broadcast(content_bundle)
+    elif journal:
+        journal.complete(item_id)
 
     logger.info("--- 全流程任务完成 ---")
 
+async def run_bot_async(config_path=None):
+    """
+    异步流水线：每条采集结果独立走 处理 -> 配图 -> 分发，
+    多条之间并发执行，网络 I/O 在各阶段和各条目之间重叠。
+    开启运行日志时先恢复上次未完成的条目，每条采集结果各自记录进度
+    """
+    import asyncio
+    from core.processor import Processor
+    from core.providers.base_adapter import is_error_result
+    from core.journal import RunJournal
+
+    config = load_config(config_path)
+    load_metrics(config)
+    logger.info("--- OpenContentBot 启动异步流程 ---")
+    pipeline = config['pipeline']
+
+    journal = load_journal(config)
+    # (条目, 运行日志记录)；手动种子提示不记入运行日志
+    work = [(entry['raw'], entry) for entry in journal.pending()] if journal else []
+    if work:
+        logger.info(f"恢复 {len(work)} 个未完成的任务")
+
+    items = ["Manual seed prompt"]
+    ingestor = None
+    if pipeline.get('enable_ingestor'):
+        logger.info("步骤 1: 正在采集数据...")
+        from core.ingestor import Ingestor
+        ingestor = Ingestor(config['modules']['ingestor'])
+        items = await asyncio.to_thread(ingestor.fetch)
+        if not items and not work:
+            logger.warning("未采集到有效数据，流程终止。")
+            return
+
+    resumed = {entry['item_id'] for _, entry in work}
+    for item in items:
+        if journal and ingestor:
+            item_id = journal.begin(item)
+            entry = journal.get(item_id)
+            if item_id in resumed or entry['stage'] in ('done', 'failed'):
+                continue
+            work.append((item, entry))
+        else:
+            work.append((item, None))
+
+    if not pipeline.get('enable_processor', True):
+        logger.info("AI 处理已关闭，流程结束。")
+        return
+
+    processor = Processor(config['modules']['processor'], publish_channels(config))
+    studio = None
+    image_config = config['modules']['media_studio'].get('image')
+    if pipeline.get('enable_image_gen') and image_config:
+        from core.media_studio import MediaStudio
+        studio = MediaStudio(image_config)
+    publisher_manager = None
+    if pipeline.get('enable_publisher'):
+        from core.publisher import PublishManager
+        publisher_manager = PublishManager(config)
+    derivative_builder = load_derivative_builder(config) if publisher_manager else None
+
+    # 限制同时在途的条目数，避免瞬间打满各个 API 的配额
+    semaphore = asyncio.Semaphore(pipeline.get('max_concurrency', 4))
+
+    async def handle(item, entry):
+        # 每个任务有独立的上下文，这里设置的关联 ID 只作用于该条目
+        item_id = entry['item_id'] if entry else RunJournal.item_id_for(item)
+        set_correlation_id(item_id)
+        async with semaphore:
+            ai_content = entry['content'] if entry else None
+            if not ai_content:
+                ai_content = await processor.aprocess(processor.prepare_input(item))
+                if not ai_content or 'caption' not in ai_content or is_error_result(ai_content):
+                    logger.error("AI 内容生成失败，缺少必要字段。")
+                    return
+                if entry:
+                    journal.record_processed(item_id, ai_content)
+            if ingestor:
+                # 同步流程的日志记录中 raw 是整批条目
+                ingestor.mark_processed(item if isinstance(item, list) else [item])
+            logger.info(f"生成文案概览: {ai_content.get('caption', '')[:30]}...")
+
+            image_path, image_paths = None, {}
+            if entry and entry['stage'] == 'image':
+                image_path, image_paths = entry['image_path'], entry['image_paths']
+            else:
+                if studio:
+                    image_path = await studio.acreate_visual(ai_content.get('image_prompt', ''))
+                if derivative_builder and image_path:
+                    image_paths = await asyncio.to_thread(derivative_builder.build, image_path)
+                if entry:
+                    journal.record_image(item_id, image_path, image_paths)
+
+            if publisher_manager:
+                content_bundle = {
+                    "caption": ai_content.get('caption', ''),
+                    "image_path": image_path,
+                    "image_paths": image_paths,
+                    "tags": ai_content.get('tags', []),
+                    "variants": ai_content.get('variants', {})
+                }
+                if entry:
+                    await journal.apublish(publisher_manager, item_id, content_bundle)
+                else:
+                    await publisher_manager.abroadcast(content_bundle)
+            elif entry:
+                journal.complete(item_id)
+
+    await asyncio.gather(*(handle(item, entry) for item, entry in work))
+    if studio:
+        studio.close()
+    if derivative_builder:
+        derivative_builder.close()
+    logger.info("--- 全流程任务完成 ---")
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OpenContentBot")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="使用异步流水线，每条新闻单独生成并发布")
+    parser.add_argument("--daemon", action="store_true",
+                        help="常驻模式：各阶段独立运行，按 daemon.poll_interval 周期采集")
+    parser.add_argument("--config", default=None, help="配置文件路径，默认 config/config.yaml")
+    args = parser.parse_args()
     try:
-        run_bot()
+        if args.daemon:
+            from core.daemon import PipelineDaemon
+            PipelineDaemon(load_config(args.config)).run()
+        elif args.use_async:
+            import asyncio
+            asyncio.run(run_bot_async(args.config))
+        else:
+            run_bot(args.config)
     except Exception as e:
-        logger.error(f"程序运行崩溃: {e}", exc_info=True)
\ No newline at end of file
+        logger.error(f"程序运行崩溃: {e}", exc_info=True)
+    finally:
+        # 无论成功与否都写出本次运行的指标 (未开启时不写)
+        from core.metrics import get_metrics
+        get_metrics().export()
\ No newline at end of file
@@ -0,0 +1,74 @@
+import os
+import sys
+import types
+
+import core.metrics as metrics_module
+from core.asset_cache import AssetCache
+
+
+def write_image(directory, name, size):
+    path = os.path.join(directory, name)
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    return path
+
+
+def test_asset_cache(tmp_path):
+    save_dir = str(tmp_path)
+    cache = AssetCache(save_dir, max_bytes=250)
+    index_path = os.path.join(save_dir, AssetCache.INDEX_NAME)
+
+    # 1. put 写索引，命中只更新内存中的 last_used，不重写索引
+    cache.put("a", write_image(save_dir, "a.png", 100))
+    cache.put("b", write_image(save_dir, "b.png", 100))
+    mtime = os.stat(index_path).st_mtime_ns
+    os.utime(index_path, ns=(0, 0))
+    assert cache.get("a") and cache.get("a")
+    assert os.stat(index_path).st_mtime_ns == 0
+    assert cache.get("missing") is None
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 1
+
+    # 2. flush 写出未保存的 last_used，重启后仍然有效
+    cache.flush()
+    assert os.stat(index_path).st_mtime_ns >= mtime
+    reloaded = AssetCache(save_dir, max_bytes=250)
+    assert reloaded._entries["a"]["last_used"] == cache._entries["a"]["last_used"]
+
+    # 3. 超出容量时淘汰最久未使用的条目 (b)，并写入索引
+    cache.put("c", write_image(save_dir, "c.png", 100))
+    assert sorted(cache._entries) == ["a", "c"]
+    assert not os.path.exists(os.path.join(save_dir, "b.png"))
+    assert sorted(AssetCache(save_dir, max_bytes=250)._entries) == ["a", "c"]
+    print("图片缓存测试通过。")
+
+
+class CountingImageAdapter:
+    calls = 0
+
+    def __init__(self, config):
+        self.save_dir = config['save_dir']
+
+    def generate(self, prompt, quality_enhancers):
+        CountingImageAdapter.calls += 1
+        return write_image(self.save_dir, f"img_{CountingImageAdapter.calls}.png", 10)
+
+
+def test_media_studio_cache_metrics(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, "core.providers.assettest_image_adapter",
+                        types.SimpleNamespace(ImageAdapter=CountingImageAdapter))
+    from core.media_studio import MediaStudio
+
+    metrics = metrics_module.configure({"enabled": True})
+    try:
+        studio = MediaStudio({"provider": "assettest", "save_dir": str(tmp_path), "asset_cache": {"enabled": True}})
+        first = studio.create_visual("A Cat  on the moon")
+        assert studio.create_visual("a cat on the moon") == first
+        studio.close()
+        assert CountingImageAdapter.calls == 1
+
+        counters = {c["name"]: c["value"] for c in metrics.snapshot()["counters"]}
+        assert counters["asset_cache_hits_total"] == 1
+        assert counters["asset_cache_misses_total"] == 1
+    finally:
+        metrics_module.configure(None)
+    print("图片缓存指标测试通过。")
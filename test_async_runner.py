@@ -0,0 +1,81 @@
+import asyncio
+import sys
+import types
+
+import yaml
+
+from benchmarks.feed_server import build_rss
+from core.providers.base_adapter import BaseAdapter
+from utils.logger import configure_logging
+
+CALLS = []
+
+
+class EchoAdapter(BaseAdapter):
+    def __init__(self, config):
+        pass
+
+    def generate_content(self, raw_data, system_prompt):
+        CALLS.append(raw_data)
+        return {"caption": raw_data.split("\n", 1)[0], "image_prompt": "", "tags": []}
+
+
+def write_config(tmp_path):
+    feed = tmp_path / "feed.xml"
+    feed.write_bytes(build_rss("async", 3))
+    config = {
+        "pipeline": {"enable_ingestor": True, "enable_processor": True, "enable_image_gen": False,
+                     "enable_publisher": False, "max_concurrency": 2},
+        "logging": {"mode": "sync"},
+        "paths": {"log_file": str(tmp_path / "bot.log")},
+        "modules": {
+            "ingestor": {
+                "enable_rss": True, "rss_urls": [str(feed)], "keywords": ["AI"], "max_entries_per_feed": 3,
+                "seen_index": {"enabled": True, "path": str(tmp_path / "seen.db")},
+            },
+            "processor": {"provider": "asynctest", "system_prompt": "Write a caption."},
+            "media_studio": {},
+        },
+    }
+    path = tmp_path / "config.yaml"
+    path.write_text(yaml.safe_dump(config), encoding="utf-8")
+    return str(path)
+
+
+def test_async_runner_twice(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, "core.providers.asynctest_adapter", types.SimpleNamespace(Adapter=EchoAdapter))
+    import main
+
+    config_path = write_config(tmp_path)
+    CALLS.clear()
+    try:
+        # 1. 第一次运行：3 条都进入生成阶段，并在事件循环线程中记录为已处理
+        asyncio.run(main.run_bot_async(config_path))
+        assert len(CALLS) == 3
+
+        # 2. 第二次运行：采集在工作线程中查询已处理索引 (布隆过滤器全部命中)，不会再次生成
+        asyncio.run(main.run_bot_async(config_path))
+        assert len(CALLS) == 3
+    finally:
+        configure_logging()
+    print("异步流水线测试通过。")
+
+
+def test_async_client_per_event_loop(monkeypatch):
+    try:
+        from core.providers.openai_adapter import Adapter
+    except ImportError:
+        print("未安装 openai，跳过异步客户端测试。")
+        return
+    from benchmarks.fake_services import FakeServices
+
+    monkeypatch.setenv("OPENAI_API_KEY", "test-loop")
+    with FakeServices() as services:
+        adapter = Adapter({"model": "gpt-4o-mini", "base_url": services.openai_base_url})
+
+        # 同一进程多次 asyncio.run：每个事件循环使用自己的客户端，连接不会跨循环复用
+        for _ in range(3):
+            content = asyncio.run(adapter.agenerate_content("AI news", "Write a caption."))
+            assert "error" not in content, content
+        assert services.counts["chat"] == 3
+    print("异步客户端按事件循环缓存测试通过。")
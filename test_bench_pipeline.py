@@ -0,0 +1,32 @@
+import argparse
+import json
+
+
+def test_bench_pipeline_smoke(monkeypatch):
+    try:
+        import openai  # noqa: F401
+        import tweepy  # noqa: F401
+    except ImportError:
+        print("未安装 openai / tweepy，跳过端到端基准冒烟测试。")
+        return
+    from benchmarks import bench_pipeline
+
+    # run() 用 setdefault 填入假凭证，先设置好以便测试结束后恢复
+    for name in ("OPENAI_API_KEY", "X_API_KEY", "X_API_SECRET", "X_ACCESS_TOKEN",
+                 "X_ACCESS_TOKEN_SECRET", "TG_BOT_TOKEN"):
+        monkeypatch.setenv(name, "smoke-" + name.lower())
+
+    args = argparse.Namespace(feeds=1, items_per_feed=3, max_items=0, concurrency=2, feed_delay=0.0,
+                              llm_delay=0.0, image_delay=0.0, publish_delay=0.0, image_format="b64_json",
+                              images=True, channels=["twitter", "telegram"], output=None)
+    report = bench_pipeline.run(args)
+
+    # 每条都走完 处理 -> 配图 -> 双平台发布，且没有错误
+    assert report["items"] == 3 and report["completed"] == 3
+    assert not any(report["errors"].values())
+    served = report["requests_served"]
+    assert served["chat"] == 3 and served["images"] == 3
+    assert served["x_media"] == 3 and served["x_tweet"] == 3 and served["telegram"] == 3
+    assert report["stages"]["item"]["count"] == 3 and report["stages"]["ingest"]["count"] == 1
+    json.dumps(report)  # 报告可以写成 JSON
+    print("端到端基准冒烟测试通过。")
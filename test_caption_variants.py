@@ -0,0 +1,48 @@
+from core.processor import Processor, enforce_length
+from core.publisher import PublishManager
+
+CHANNELS = {
+    "twitter": {"enabled": True, "style": "catchy", "max_length": 40},
+    "telegram": {"enabled": True, "style": "bold"},
+    "instagram": {"enabled": False, "style": "descriptive"},
+}
+
+
+def test_caption_variants():
+    # 1. 只为启用的渠道生成规格，未配置 max_length 时取平台默认值
+    specs = Processor.variant_specs_for(CHANNELS)
+    assert list(specs) == ["twitter", "telegram"]
+    assert specs["telegram"]["max_len"] == 1024
+
+    # 2. 占位符被填充，JSON 示例中的花括号保持原样
+    template = 'Platform: {platform}\nStyle: {style}\nUnder {max_len} chars.\n{"caption": "..."}'
+    prompt = Processor.render_prompt(template, specs)
+    assert "Platform: telegram, twitter" in prompt and "Under 40 chars." in prompt
+    assert '{"caption": "..."}' in prompt and '"variants": {"twitter": "...", "telegram": "..."}' in prompt
+
+    # 3. 本地强制长度，缺失的渠道用 caption 补齐
+    processor = Processor.__new__(Processor)
+    processor.variant_specs = specs
+    long_text = "The market rallied today as AI chip makers posted record earnings"
+    content = processor.finalize({"caption": long_text, "variants": {"telegram": long_text}})
+    assert len(content["caption"]) <= 40 and content["caption"].endswith("…")
+    assert content["variants"]["twitter"] == content["caption"]
+    assert content["variants"]["telegram"] == long_text
+    assert enforce_length("short", 40) == "short"
+
+    # 4. 发布时追加的 tags 也计入上限：正文 + "\n\n" + tags 不超过渠道上限
+    tags = ["#AI", "#Chips"]
+    content = processor.finalize({"caption": long_text, "tags": tags, "variants": {"telegram": long_text}})
+    twitter_post = content["variants"]["twitter"] + "\n\n" + " ".join(tags)
+    assert len(twitter_post) <= 40 and len(content["caption"] + "\n\n#AI #Chips") <= 40
+    assert content["variants"]["telegram"] == long_text
+
+    # 5. 每个渠道发布自己的版本，没有版本时使用通用 caption
+    bundle = {"caption": "generic", "variants": {"telegram": "tg text"}, "image_path": None}
+    assert PublishManager._bundle_for("telegram", bundle)["caption"] == "tg text"
+    assert PublishManager._bundle_for("twitter", bundle)["caption"] == "generic"
+    print("多平台文案测试通过。")
+
+
+if __name__ == "__main__":
+    test_caption_variants()
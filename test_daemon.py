@@ -0,0 +1,132 @@
+import threading
+import time
+
+from benchmarks.fake_services import FakeServices
+from benchmarks.feed_server import build_rss
+
+
+def daemon_config(tmp_path, services, feed, pipeline=None):
+    return {
+        "pipeline": dict({"enable_ingestor": True, "enable_processor": True,
+                          "enable_image_gen": True, "enable_publisher": True}, **(pipeline or {})),
+        "daemon": {"poll_interval": 0.05, "queue_size": 10, "batch_size": 5,
+                   "workers": {"process": 2, "image": 1, "publish": 1}},
+        "modules": {
+            "ingestor": {
+                "enable_rss": True, "rss_urls": [str(feed)], "keywords": [], "max_entries_per_feed": 3,
+                "seen_index": {"enabled": True, "path": str(tmp_path / "seen.db")},
+            },
+            "processor": {
+                "provider": "openai", "model": "gpt-4o-mini", "base_url": services.openai_base_url,
+                "system_prompt": "Return ONLY a JSON object with caption, image_prompt and tags.",
+                "rate_limit": {"max_retries": 0},
+            },
+            "media_studio": {
+                "image": {
+                    "provider": "openai", "model": "dall-e-3", "base_url": services.openai_base_url,
+                    "resolution": "1024x1024", "response_format": "b64_json",
+                    "save_dir": str(tmp_path / "images"), "rate_limit": {"max_retries": 0},
+                },
+            },
+            "publish_channels": {
+                "telegram": {"enabled": True, "chat_id": "@daemon", "api_base": services.base_url, "timeout": 10},
+            },
+        },
+    }
+
+
+def test_daemon_end_to_end(tmp_path, monkeypatch):
+    try:
+        import openai  # noqa: F401
+        import requests  # noqa: F401
+    except ImportError:
+        print("未安装 openai / requests，跳过常驻模式测试。")
+        return
+    from core.daemon import PipelineDaemon
+
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("TG_BOT_TOKEN", "123:test")
+    feed = tmp_path / "feed.xml"
+    feed.write_bytes(build_rss("daemon", 3))
+
+    # 生成较慢，期间会多次重新采集到同样的 3 条
+    with FakeServices({"chat": 0.3}) as services:
+        daemon = PipelineDaemon(daemon_config(tmp_path, services, feed))
+
+        def stop_when_published():
+            deadline = time.monotonic() + 15
+            while services.counts.get("telegram", 0) < 3 and time.monotonic() < deadline:
+                time.sleep(0.05)
+            time.sleep(0.3)  # 给可能的重复发布留出时间
+            daemon.stop()
+        threading.Thread(target=stop_when_published, daemon=True).start()
+        daemon.run()
+
+        # 每条只生成、配图、发布一次：在途条目去重，处理后写入已处理索引 (在工作线程中)
+        assert services.counts["chat"] == 3
+        assert services.counts["images"] == 3
+        assert services.counts["telegram"] == 3
+        assert len(daemon.ingestor.seen_index) == 6
+        assert not daemon._inflight
+
+    print("常驻模式端到端测试通过。")
+
+
+def test_daemon_resumes_from_journal(tmp_path, monkeypatch):
+    try:
+        import openai  # noqa: F401
+        import requests  # noqa: F401
+    except ImportError:
+        print("未安装 openai / requests，跳过常驻模式测试。")
+        return
+    from core.daemon import PipelineDaemon
+    from core.journal import RunJournal
+
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("TG_BOT_TOKEN", "123:test")
+    feed = tmp_path / "feed.xml"
+    feed.write_bytes(build_rss("daemon", 2))
+
+    # 上次运行已生成文案、尚未配图的条目
+    journal_path = str(tmp_path / "journal.db")
+    journal = RunJournal(journal_path)
+    resumed = {"title": "Resumed story", "link": "https://example.com/resumed", "summary": "AI"}
+    resumed_id = journal.begin(resumed)
+    journal.record_processed(resumed_id, {"caption": "Resumed", "image_prompt": "a cat", "tags": []})
+    journal.close()
+
+    with FakeServices() as services:
+        config = daemon_config(tmp_path, services, feed)
+        config["journal"] = {"enabled": True, "path": journal_path}
+        # 每个 chat 的限流器在进程内共享，换一个 chat 以免受上一个测试的发送记录影响
+        config["modules"]["publish_channels"]["telegram"]["chat_id"] = "@resume"
+        daemon = PipelineDaemon(config)
+
+        def stop_when_published():
+            deadline = time.monotonic() + 15
+            while services.counts.get("telegram", 0) < 3 and time.monotonic() < deadline:
+                time.sleep(0.05)
+            time.sleep(0.3)
+            daemon.stop()
+        threading.Thread(target=stop_when_published, daemon=True).start()
+        daemon.run()
+
+        # 恢复的条目跳过生成阶段；新条目逐阶段记录进度，发布后全部标记为 done
+        assert services.counts["chat"] == 2
+        assert services.counts["images"] == 3
+        assert services.counts["telegram"] == 3
+        assert daemon.journal.get(resumed_id)["stage"] == "done"
+        assert daemon.journal.pending() == []
+        assert daemon.journal.published_channels(resumed_id) == {"telegram"}
+
+    print("常驻模式断点续传测试通过。")
+
+
+def test_daemon_respects_pipeline_flags(tmp_path):
+    # 采集关闭时不创建任何客户端 (也就不需要 API Key)，run 直接返回
+    from core.daemon import PipelineDaemon
+    daemon = PipelineDaemon({"pipeline": {"enable_ingestor": False}, "modules": {}})
+    assert daemon.ingestor is None and daemon.processor is None
+    daemon.run()
+    daemon = PipelineDaemon({"pipeline": {"enable_ingestor": True, "enable_processor": False}, "modules": {}})
+    daemon.run()
@@ -0,0 +1,61 @@
+import os
+import threading
+
+from core.derivatives import DerivativeBuilder, encode_derivative
+
+
+def test_derivatives(tmp_path):
+    try:
+        from PIL import Image
+    except ImportError:
+        print("未安装 Pillow，跳过图片衍生版本测试。")
+        return
+
+    source = str(tmp_path / "source.png")
+    Image.new("RGB", (3000, 2000), (200, 30, 30)).save(source)
+    save_dir = str(tmp_path / "derivatives")
+    channels = {
+        "twitter": {"enabled": True},
+        "twitter_brand": {"enabled": True, "platform": "twitter"},
+        "telegram": {"enabled": True},
+        "instagram": {"enabled": True, "post_type": "story"},
+        "webp": {"enabled": True, "platform": "telegram", "image": {"format": "WEBP", "max_side": 500}},
+    }
+    builder = DerivativeBuilder(channels, {"save_dir": save_dir, "workers": 2})
+    try:
+        # 1. 每个渠道得到符合平台规格的版本，相同规格只编码一次
+        paths = builder.build(source)
+        assert paths["twitter"] == paths["twitter_brand"]
+        assert len(os.listdir(save_dir)) == 4
+        sizes = {channel: Image.open(path).size for channel, path in paths.items()}
+        assert sizes["twitter"] == (2048, 1365) and sizes["telegram"] == (1280, 853)
+        assert sizes["instagram"] == (1080, 1920) and sizes["webp"] == (500, 333)
+        assert Image.open(paths["webp"]).format == "WEBP"
+
+        # 2. 已存在的版本直接复用，不再编码
+        mtimes = {path: os.stat(path).st_mtime_ns for path in paths.values()}
+        assert builder.build(source) == paths
+        assert {path: os.stat(path).st_mtime_ns for path in paths.values()} == mtimes
+    finally:
+        builder.close()
+
+    # 3. 多个编码器同时写同一目标时各用各的临时文件，最终文件完整且不留 .part
+    target = str(tmp_path / "shared.jpg")
+    spec = {"format": "JPEG", "max_side": 800, "quality": 90}
+    errors = []
+
+    def encode():
+        try:
+            encode_derivative(source, target, spec)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=encode) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert Image.open(target).size == (800, 533)
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".part")]
+    print("图片衍生版本测试通过。")
@@ -0,0 +1,44 @@
+from benchmarks.feed_server import FeedServer
+from core.feed_cache import FeedCache
+
+
+def test_feed_cache(tmp_path):
+    try:
+        import requests  # noqa: F401
+    except ImportError:
+        print("未安装 requests，跳过条件请求缓存测试。")
+        return
+    from core.ingestor import Ingestor
+
+    with FeedServer() as server:
+        config = {
+            "enable_rss": True,
+            "rss_urls": [server.url(1, items=3), server.url(2, items=3)],
+            "keywords": ["AI"],
+            "feed_cache": {"enabled": True, "path": str(tmp_path / "feeds.db")},
+        }
+        ingestor = Ingestor(config)
+
+        # 1. 首次抓取：没有校验头，全部完整下载并写入缓存
+        first = ingestor.fetch()
+        assert len(first) == 6
+        assert ingestor.feed_cache.stats()["not_modified"] == 0
+
+        # 2. 再次抓取：带上 If-None-Match，服务器返回 304，直接复用缓存的条目
+        second = ingestor.fetch()
+        stats = ingestor.feed_cache.stats()
+        assert stats["not_modified"] == 2 and stats["cache_hits"] == 2
+        assert [item["title"] for item in second] == [item["title"] for item in first]
+
+    # 3. 缓存持久化：新实例从磁盘读取校验头和条目
+    cache = FeedCache(str(tmp_path / "feeds.db"))
+    assert "If-None-Match" in cache.request_headers(config["rss_urls"][0])
+    assert len(cache.lookup(config["rss_urls"][0])) == 3
+    print("条件请求缓存测试通过。")
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    with tempfile.TemporaryDirectory() as d:
+        test_feed_cache(pathlib.Path(d))
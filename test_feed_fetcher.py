@@ -0,0 +1,46 @@
+import time
+
+from benchmarks.feed_server import FeedServer, build_rss
+from core.feed_fetcher import FeedFetcher
+
+
+def test_feed_fetcher(tmp_path):
+    try:
+        import requests  # noqa: F401
+    except ImportError:
+        print("未安装 requests，跳过抓取器测试。")
+        return
+
+    with FeedServer() as server:
+        fetcher = FeedFetcher({"feed_timeout": 0.5, "per_host_limit": 2})
+        slow = server.url(1, drip=0.1, items=50)   # 完整发送需要约 8 秒
+        fast = server.url(2, items=3)
+        missing = str(tmp_path / "missing.xml")
+        local = tmp_path / "local.xml"
+        local.write_bytes(build_rss("local", 2))
+
+        start = time.monotonic()
+        results = fetcher.fetch_all([slow, fast, str(local), "file://" + str(local), missing],
+                                    lambda url, response, body: body)
+        elapsed = time.monotonic() - start
+
+        # 1. 正常的源不受慢速源影响
+        assert b"Feed 2 AI story 2" in results[fast]
+
+        # 2. 每次都能读到数据的慢速源也会在总截止时间后被放弃
+        assert slow not in results and fetcher.failures[slow].startswith("FeedTimeout")
+        assert elapsed < 4
+
+        # 3. 本地路径和 file:// URL 直接读取，不存在的文件记录为失败而不是被忽略
+        assert b"Feed local AI story 1" in results[str(local)]
+        assert results["file://" + str(local)] == results[str(local)]
+        assert fetcher.failures[missing].startswith("FileNotFoundError")
+        fetcher.close()
+    print("抓取器测试通过。")
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    with tempfile.TemporaryDirectory() as d:
+        test_feed_fetcher(pathlib.Path(d))
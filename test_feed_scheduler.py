@@ -0,0 +1,44 @@
+import os
+import tempfile
+
+from core.feed_scheduler import FeedScheduler
+
+HOUR = 3600.0
+
+
+def test_feed_scheduler():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "schedule.db")
+        scheduler = FeedScheduler(path, min_interval=300, max_interval=86400, jitter=0.0, smoothing=1.0)
+        fast, slow = "https://fast.example/rss", "https://slow.example/rss"
+        now = 1_000_000.0
+
+        # 1. 新源立即到期
+        assert scheduler.due([fast, slow], now=now) == [fast, slow]
+
+        # 2. 按条目发布间隔的中位数安排下次抓取，并限制在 [min, max] 内
+        scheduler.record(fast, [now - 600 * i for i in range(5)], now=now)        # 每 10 分钟一条
+        scheduler.record(slow, [now - 2 * 86400 * i for i in range(3)], now=now)  # 每 2 天一条
+        assert scheduler.interval(fast) == 600
+        assert scheduler.interval(slow) == 86400
+
+        # 3. 只有到期的源会被返回，其余计为省下的抓取
+        assert scheduler.due([fast, slow], now=now + 700) == [fast]
+        assert scheduler.stats()["avoided"] == 1
+
+        # 4. 没有发布时间也没有新条目时逐步放慢
+        scheduler.record(fast, [], now=now + 700)
+        assert scheduler.interval(fast) == 900
+        scheduler.close()
+
+        # 5. 状态持久化，重启后沿用学到的间隔和累计计数
+        restored = FeedScheduler(path, min_interval=300, max_interval=86400, jitter=0.0)
+        assert restored.interval(slow) == 86400
+        assert restored.due([fast, slow], now=now + 1000) == []
+        assert restored.stats()["avoided_total"] == 3
+        restored.close()
+    print("FeedScheduler 测试通过。")
+
+
+if __name__ == "__main__":
+    test_feed_scheduler()
@@ -0,0 +1,48 @@
+import base64
+import os
+
+from benchmarks.fake_services import FakeServices, TINY_PNG
+
+
+def test_image_adapter_save(tmp_path, monkeypatch):
+    try:
+        from core.providers.openai_image_adapter import CHUNK_SIZE, ImageAdapter
+    except ImportError:
+        print("未安装 openai / requests，跳过图片适配器测试。")
+        return
+
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    with FakeServices() as services:
+        config = {"base_url": services.openai_base_url, "save_dir": str(tmp_path),
+                  "rate_limit": {"max_retries": 0}}
+
+        # 1. url 模式流式下载，b64_json 模式直接解码，两者落盘内容相同、文件名相同
+        url_path = ImageAdapter(config).generate("a cat", "hd")
+        b64_path = ImageAdapter(dict(config, response_format="b64_json")).generate("a cat", "hd")
+        assert services.counts["images"] == 2 and services.counts["download"] == 1
+        assert url_path == b64_path
+        with open(url_path, "rb") as f:
+            assert f.read() == TINY_PNG
+
+    adapter = ImageAdapter(dict(config, response_format="b64_json"))
+
+    # 2. 超过一个分片的 b64 数据逐片解码，结果与整体解码一致
+    payload = os.urandom(CHUNK_SIZE * 2 + 123)
+    path = adapter._decode(base64.b64encode(payload).decode("ascii"))
+    with open(path, "rb") as f:
+        assert f.read() == payload
+
+    # 3. 写入中途失败时不留下临时文件，也不产生半截的图片
+    def broken():
+        yield b"partial"
+        raise ConnectionError("reset")
+
+    before = sorted(os.listdir(tmp_path))
+    try:
+        adapter._write_atomic(broken())
+        raise AssertionError("写入失败时应抛出异常")
+    except ConnectionError:
+        pass
+    assert sorted(os.listdir(tmp_path)) == before
+    assert not [name for name in before if name.endswith(".part")]
+    print("图片适配器测试通过。")
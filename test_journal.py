@@ -0,0 +1,228 @@
+import asyncio
+import sqlite3
+import sys
+import threading
+import time
+import types
+
+import yaml
+
+from benchmarks.feed_server import build_rss
+from core.journal import RunJournal
+from core.providers.base_adapter import BaseAdapter
+from core.publishers.base_publisher import BasePublisher
+from utils.logger import configure_logging, correlation
+
+CALLS = []
+POSTS = []
+FAILING = set()
+
+
+class EchoAdapter(BaseAdapter):
+    def __init__(self, config):
+        pass
+
+    def generate_content(self, raw_data, system_prompt):
+        CALLS.append(raw_data)
+        return {"caption": raw_data.split("\n", 1)[0][:50], "image_prompt": "", "tags": []}
+
+
+class FlakyPublisher(BasePublisher):
+    """渠道名在 FAILING 中时发布失败"""
+    def post(self, content_bundle):
+        time.sleep(self.config.get('delay', 0))
+        channel = self.config['name']
+        if channel in FAILING:
+            raise RuntimeError(f"{channel} down")
+        POSTS.append(channel)
+        return {"id": len(POSTS)}
+
+
+def fake_modules(monkeypatch):
+    monkeypatch.setitem(sys.modules, "core.providers.journaltest_adapter", types.SimpleNamespace(Adapter=EchoAdapter))
+    monkeypatch.setitem(sys.modules, "core.publishers.journaltest_pub", types.SimpleNamespace(Publisher=FlakyPublisher))
+    CALLS.clear()
+    POSTS.clear()
+    FAILING.clear()
+
+
+def channels(*names, **extra):
+    return {name: dict({"enabled": True, "platform": "journaltest", "name": name}, **extra.get(name, {}))
+            for name in names}
+
+
+def test_journal_records(tmp_path):
+    journal = RunJournal(str(tmp_path / "journal.db"))
+
+    # 1. 采集时间等易变字段不影响 item_id
+    item = {"title": "AI", "link": "https://example.com/a", "timestamp": "2026-01-01T00:00:00"}
+    assert RunJournal.item_id_for(item) == RunJournal.item_id_for(dict(item, timestamp="later", item_id="x"))
+
+    # 2. 发布意图 -> 成功 / 确认失败 / 结果未知
+    item_id = journal.begin(item)
+    for channel in ("a", "b", "c"):
+        journal.record_intent(item_id, channel)
+    journal.record_published(item_id, "a", {"id": 1})
+    journal.clear_intent(item_id, "b")
+    assert journal.published_channels(item_id) == {"a"}
+    assert journal.uncertain_channels(item_id) == {"c"}
+
+    # 3. 可以在其他线程中使用 (常驻模式各阶段、异步流程)
+    errors = []
+
+    def worker(n):
+        try:
+            journal.record_processed(journal.begin({"title": f"t{n}"}), {"caption": str(n)})
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert len(journal.pending()) == 9
+    journal.close()
+
+    # 4. 旧版本没有 status 列的日志库自动升级，原有记录视为已发布
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE publications (item_id TEXT NOT NULL, channel TEXT NOT NULL, result TEXT,"
+                 " published_at REAL NOT NULL, PRIMARY KEY (item_id, channel))")
+    conn.execute("INSERT INTO publications VALUES ('old', 'twitter', NULL, 0)")
+    conn.commit()
+    conn.close()
+    assert RunJournal(path).published_channels("old") == {"twitter"}
+    print("运行日志记录测试通过。")
+
+
+def test_journal_publish_resume(tmp_path, monkeypatch):
+    fake_modules(monkeypatch)
+    from core.publisher import PublishManager
+
+    journal = RunJournal(str(tmp_path / "journal.db"))
+    item_id = journal.begin({"title": "AI"})
+
+    # 1. 快的渠道一完成就记入日志，不等慢渠道
+    seen_by_slow = []
+
+    class SlowPublisher(FlakyPublisher):
+        def post(self, content_bundle):
+            deadline = time.monotonic() + 2
+            while "fast" not in journal.published_channels(item_id) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            seen_by_slow.append(journal.published_channels(item_id))
+            return super().post(content_bundle)
+
+    monkeypatch.setitem(sys.modules, "core.publishers.journalslow_pub", types.SimpleNamespace(Publisher=SlowPublisher))
+    manager = PublishManager({"modules": {"publish_channels": dict(
+        channels("fast", "flaky"), slow={"enabled": True, "platform": "journalslow", "name": "slow"})}})
+    FAILING.add("flaky")
+    results = journal.publish(manager, item_id, {"caption": "hi"})
+    assert seen_by_slow == [{"fast"}]
+    assert {c: r["success"] for c, r in results.items()} == {"fast": True, "flaky": False, "slow": True}
+    assert journal.get(item_id)["stage"] != "done"
+    assert journal.uncertain_channels(item_id) == set()
+
+    # 2. 断点续发：只重试失败的渠道，全部成功后标记为 done
+    FAILING.clear()
+    POSTS.clear()
+    results = journal.publish(manager, item_id, {"caption": "hi"})
+    assert list(results) == ["flaky"] and POSTS == ["flaky"]
+    assert journal.get(item_id)["stage"] == "done"
+
+    # 3. 发布中途崩溃 (只写了意图) 的渠道结果未知，恢复时不自动重发
+    other = journal.begin({"title": "other"})
+    journal.record_intent(other, "fast")
+    POSTS.clear()
+    journal.publish(manager, other, {"caption": "other"})
+    assert sorted(POSTS) == ["flaky", "slow"]
+    assert journal.uncertain_channels(other) == {"fast"}
+    print("断点续发测试通过。")
+
+
+def write_config(tmp_path, enable_ingestor=True):
+    feed = tmp_path / "feed.xml"
+    feed.write_bytes(build_rss("journal", 2))
+    config = {
+        "pipeline": {"enable_ingestor": enable_ingestor, "enable_processor": True, "enable_image_gen": False,
+                     "enable_publisher": True, "max_concurrency": 2},
+        "logging": {"mode": "sync"},
+        "paths": {"log_file": str(tmp_path / "bot.log")},
+        "journal": {"enabled": True, "path": str(tmp_path / "journal.db")},
+        "modules": {
+            "ingestor": {
+                "enable_rss": True, "rss_urls": [str(feed)], "keywords": [], "max_entries_per_feed": 2,
+                "seen_index": {"enabled": True, "path": str(tmp_path / "seen.db")},
+            },
+            "processor": {"provider": "journaltest", "system_prompt": "Write a caption."},
+            "media_studio": {},
+            "publish_channels": channels("a", "b"),
+        },
+    }
+    path = tmp_path / "config.yaml"
+    path.write_text(yaml.safe_dump(config), encoding="utf-8")
+    return str(path)
+
+
+def run_bot(config_path):
+    import main
+    # run_bot 会设置当前线程的关联 ID，退出后恢复，避免影响后续测试的日志
+    with correlation(None):
+        main.run_bot(config_path)
+
+
+def test_run_bot_resumes_partial_publish(tmp_path, monkeypatch):
+    fake_modules(monkeypatch)
+    config_path = write_config(tmp_path)
+    try:
+        # 1. 第一次运行 b 发布失败
+        FAILING.add("b")
+        run_bot(config_path)
+        assert len(CALLS) == 1 and POSTS == ["a"]
+
+        # 2. 第二次运行从日志恢复：不再生成，只向 b 发布
+        FAILING.clear()
+        run_bot(config_path)
+        assert len(CALLS) == 1 and POSTS == ["a", "b"]
+
+        # 3. 任务已完成，再次运行没有新内容也不重复发布
+        run_bot(config_path)
+        assert len(CALLS) == 1 and POSTS == ["a", "b"]
+    finally:
+        configure_logging()
+    print("单次运行断点续发测试通过。")
+
+
+def test_async_runner_resumes_partial_publish(tmp_path, monkeypatch):
+    fake_modules(monkeypatch)
+    import main
+
+    config_path = write_config(tmp_path)
+    try:
+        # 1. 每条采集结果各自记入日志，b 全部失败
+        FAILING.add("b")
+        asyncio.run(main.run_bot_async(config_path))
+        assert len(CALLS) == 2 and sorted(POSTS) == ["a", "a"]
+
+        # 2. 两条都从日志恢复，只向 b 补发
+        FAILING.clear()
+        asyncio.run(main.run_bot_async(config_path))
+        assert len(CALLS) == 2 and sorted(POSTS) == ["a", "a", "b", "b"]
+    finally:
+        configure_logging()
+    print("异步流程断点续发测试通过。")
+
+
+def test_seed_prompt_skips_journal(tmp_path, monkeypatch):
+    fake_modules(monkeypatch)
+    config_path = write_config(tmp_path, enable_ingestor=False)
+    try:
+        # 手动种子提示每次内容相同，不能因为日志中已有 done 记录而被跳过
+        run_bot(config_path)
+        run_bot(config_path)
+        assert CALLS == ["Manual seed prompt"] * 2 and POSTS.count("a") == 2
+    finally:
+        configure_logging()
+    print("手动种子提示测试通过。")
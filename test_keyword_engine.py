@@ -0,0 +1,32 @@
+from core.keyword_engine import KeywordEngine
+
+def test_keyword_engine():
+    engine = KeywordEngine({"AI": 3, "Market": 1, "market cap": 2, "Tesla": 1}, title_weight=2.0)
+
+    # 1. 整词匹配，不会命中 "OpenAI" / "said"
+    assert engine.matches("OpenAI said the AI market cap grew") == {"ai", "market cap"}
+
+    # 2. 标题和摘要分别打分，标题乘以 title_weight
+    items = [
+        {"title": "Tesla shares rise", "summary": "AI driven rally"},    # 1*2 + 3 = 5
+        {"title": "Weather today", "summary": "Sunny"},                   # 0，被过滤
+        {"title": "AI boom", "summary": "Market cap hits record"},       # 3*2 + 2 = 8
+    ]
+    ranked = engine.rank(items)
+    assert [item["score"] for item in ranked] == [8.0, 5.0]
+
+    # 3. top_k 只保留得分最高的条目
+    assert engine.rank(items, top_k=1)[0]["title"] == "AI boom"
+
+    # 4. 列表写法的关键词权重均为 1
+    assert KeywordEngine(["AI"]).score({"title": "", "summary": "ai"}) == 1.0
+
+    # 5. 中文关键词在中文正文中也能命中；英文关键词紧挨汉字时仍然整词匹配
+    cjk = KeywordEngine({"人工智能": 2, "芯片": 1, "AI": 1})
+    assert cjk.matches("英伟达发布新一代人工智能芯片") == {"人工智能", "芯片"}
+    assert cjk.matches("公司发布AI芯片，OpenAI 回应") == {"ai", "芯片"}
+    assert cjk.score({"title": "人工智能芯片", "summary": ""}) == 6.0
+    print("KeywordEngine 测试通过。")
+
+if __name__ == "__main__":
+    test_keyword_engine()
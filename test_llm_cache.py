@@ -0,0 +1,59 @@
+import os
+import tempfile
+
+import core.metrics as metrics_module
+from core.providers.base_adapter import BaseAdapter, error_result
+from core.providers.cached_adapter import CachedAdapter
+
+
+class CountingAdapter(BaseAdapter):
+    def __init__(self):
+        self.calls = 0
+
+    def generate_content(self, raw_data, system_prompt):
+        self.calls += 1
+        if raw_data == "fail":
+            return error_result("boom")
+        return {"caption": f"caption for {raw_data}", "tags": []}
+
+
+def test_llm_cache():
+    metrics = metrics_module.configure({"enabled": True})
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            cache_config = {"path": os.path.join(tmp, "llm.db"), "memory_size": 2, "max_entries": 10}
+            inner = CountingAdapter()
+            cached = CachedAdapter(inner, "openai", {"model": "gpt-4o-mini"}, cache_config)
+
+            # 1. 相同输入只调用一次，失败结果不缓存
+            assert cached.generate_content("a", "prompt") == cached.generate_content("a", "prompt")
+            cached.generate_content("fail", "prompt")
+            cached.generate_content("fail", "prompt")
+            assert inner.calls == 3
+
+            # 2. 重启后从 SQLite 命中
+            restarted = CachedAdapter(CountingAdapter(), "openai", {"model": "gpt-4o-mini"}, cache_config)
+            assert restarted.generate_content("a", "prompt")["caption"] == "caption for a"
+            assert restarted.adapter.calls == 0 and restarted.stats()["disk_hits"] == 1
+
+            # 3. 命中 / 未命中导出到 metrics
+            counters = {}
+            for counter in metrics.snapshot()["counters"]:
+                name = (counter["name"], counter["labels"].get("tier"))
+                counters[name] = counters.get(name, 0) + counter["value"]
+            assert counters[("llm_cache_hits_total", "memory")] == 1
+            assert counters[("llm_cache_hits_total", "disk")] == 1
+            assert counters[("llm_cache_misses_total", None)] == 3
+
+            # 4. 超过 max_entries 时淘汰最久未使用的记录，计数与磁盘一致
+            for i in range(15):
+                restarted.generate_content(f"item {i}", "prompt")
+            on_disk = restarted._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            assert on_disk <= 10 and on_disk == restarted._count
+    finally:
+        metrics_module.configure(None)
+    print("LLM 缓存测试通过。")
+
+
+if __name__ == "__main__":
+    test_llm_cache()
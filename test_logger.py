@@ -0,0 +1,35 @@
+import json
+import os
+import tempfile
+
+from utils.logger import configure_logging, correlation, logger, shutdown_logging
+
+
+def test_logger():
+    with tempfile.TemporaryDirectory() as tmp:
+        log_file = os.path.join(tmp, "bot.log")
+        configure_logging({"mode": "queue", "format": "json", "console": False, "file": log_file,
+                           "rate_limit": {"window": 60, "burst": 2}})
+
+        # 1. 队列模式下记录带上调用方的关联 ID
+        with correlation("item-42"):
+            logger.info("hello %s", "world")
+        logger.info("outside")
+
+        # 2. 相同内容在窗口内最多输出 burst 条
+        for _ in range(5):
+            logger.warning("feed timeout")
+
+        shutdown_logging()
+        with open(log_file, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+
+    configure_logging()
+    assert records[0]["message"] == "hello world" and records[0]["correlation_id"] == "item-42"
+    assert records[1]["correlation_id"] == "-"
+    assert [r["message"] for r in records].count("feed timeout") == 2
+    print("Logger 测试通过。")
+
+
+if __name__ == "__main__":
+    test_logger()
@@ -0,0 +1,55 @@
+import json
+import os
+import tempfile
+
+from core.metrics import Metrics
+
+
+def test_metrics():
+    with tempfile.TemporaryDirectory() as tmp:
+        metrics = Metrics({
+            "enabled": True,
+            "path": os.path.join(tmp, "bot.prom"),
+            "prices": {"gpt-4o-mini": {"prompt": 1.0, "completion": 2.0}},
+            "image_prices": {"dall-e-3": 0.04},
+        })
+
+        # 1. 阶段耗时进入直方图，异常时 outcome=error
+        with metrics.timer("process", provider="openai"):
+            pass
+        try:
+            with metrics.timer("process", provider="openai"):
+                raise RuntimeError("boom")
+        except RuntimeError:
+            pass
+        histograms = {h["labels"]["outcome"]: h for h in metrics.snapshot()["histograms"]}
+        assert histograms["ok"]["count"] == 1 and histograms["error"]["count"] == 1
+
+        # 2. usage 可以是对象或字典，费用按每 1K tokens 计算
+        metrics.record_usage("openai", "gpt-4o-mini", {"prompt_tokens": 1000, "completion_tokens": 500})
+        metrics.record_images("openai", "dall-e-3", count=2)
+        counters = {(c["name"], c["labels"].get("kind")): c["value"] for c in metrics.snapshot()["counters"]}
+        assert counters[("llm_tokens_total", "prompt")] == 1000
+        assert counters[("llm_tokens_total", "completion")] == 500
+        cost = sum(c["value"] for c in metrics.snapshot()["counters"] if c["name"] == "cost_usd_total")
+        assert abs(cost - (1.0 + 1.0 + 0.08)) < 1e-9
+
+        # 3. Prometheus textfile 和 JSON 快照
+        text = open(metrics.export()).read()
+        assert '# TYPE opencontentbot_stage_duration_seconds histogram' in text
+        assert 'le="+Inf"' in text and 'opencontentbot_cost_usd_total' in text
+        metrics.format = "json"
+        snapshot = json.load(open(metrics.export(os.path.join(tmp, "bot.json"))))
+        assert len(snapshot["histograms"]) == 2
+
+    # 4. 关闭时不记录也不写文件
+    disabled = Metrics({})
+    with disabled.timer("process"):
+        pass
+    disabled.inc("items_total", 3)
+    assert disabled.snapshot()["histograms"] == [] and disabled.export() is None
+    print("Metrics 测试通过。")
+
+
+if __name__ == "__main__":
+    test_metrics()
@@ -0,0 +1,50 @@
+import json
+import sys
+import types
+
+from core.providers.base_adapter import BaseAdapter
+
+CALLS = []
+
+
+class PackAdapter(BaseAdapter):
+    """打包请求按 id 返回结果 (id 为字符串)，并故意漏掉最后一条；单条请求直接返回"""
+    def __init__(self, config):
+        pass
+
+    def generate_content(self, raw_data, system_prompt):
+        if '"results"' in system_prompt:
+            entries = json.loads(raw_data)
+            CALLS.append(("pack", len(entries)))
+            return {"results": [{"id": str(e["id"]), "caption": "x" * 300, "tags": []} for e in entries[:-1]]}
+        CALLS.append(("single", raw_data))
+        return {"caption": f"single {raw_data}", "tags": []}
+
+
+def test_process_batch(monkeypatch):
+    monkeypatch.setitem(sys.modules, "core.providers.packtest_adapter", types.SimpleNamespace(Adapter=PackAdapter))
+    from core.processor import Processor
+
+    processor = Processor({"provider": "packtest", "system_prompt": "Write a caption.", "pack_size": 3},
+                          {"twitter": {"enabled": True, "max_length": 100}})
+    finalized = []
+    finalize = processor.finalize
+    monkeypatch.setattr(processor, "finalize", lambda content: finalized.append(1) or finalize(content))
+
+    CALLS.clear()
+    results = processor.process_batch(["story a", "story b", "story c"], packed=True)
+
+    # 1. 字符串 id 与输入 id 匹配，只有模型漏掉的一条单独重试
+    assert CALLS == [("pack", 3), ("single", "story c")]
+    assert [r["ok"] for r in results] == [True, True, True]
+    assert results[2]["content"]["caption"] == "single story c"
+
+    # 2. 每条结果只校正一次长度
+    assert len(finalized) == 3
+    assert len(results[0]["content"]["caption"]) <= 100
+
+    # 3. 非打包模式逐条处理，顺序与输入一致
+    CALLS.clear()
+    results = processor.process_batch(["one", "two"])
+    assert [r["content"]["caption"] for r in results] == ["single one", "single two"]
+    print("批量处理测试通过。")
@@ -0,0 +1,49 @@
+from core.prompt_builder import PromptBuilder, count_tokens, strip_html
+
+
+def test_prompt_builder():
+    # 1. 去掉 HTML 标签和实体
+    assert strip_html("<p>AI&amp;Chips <script>x()</script><b>rally</b></p>") == "AI&Chips rally"
+
+    items = [
+        {"title": "Chip stocks rally", "link": "https://example.com/1", "source_type": "rss", "score": 2.0,
+         "summary": "<p>Chip stocks rally. Nvidia rose 5%. Subscribe to our newsletter.</p>",
+         "timestamp": "2025-01-06T10:00:00"},
+        {"title": "Tesla unveils robot", "link": "https://example.com/2", "source_type": "rss", "score": 5.0,
+         "summary": "Optimus moves parts in factories. Subscribe to our newsletter.",
+         "timestamp": "2025-01-06T10:00:00"},
+        {"title": "chip stocks rally", "summary": "duplicate story", "score": 1.0},
+    ]
+    builder = PromptBuilder({"default_budget": 1000})
+    prompt, stats = builder.build(items)
+
+    # 2. 高分在前，只保留标题和摘要，重复的标题和句子只出现一次
+    assert prompt.index("Tesla unveils robot") < prompt.index("Chip stocks rally")
+    assert "https://" not in prompt and "source_type" not in prompt and "<p>" not in prompt
+    assert prompt.count("Subscribe to our newsletter.") == 1
+    assert stats["items"] == 2 and stats["dropped"] == 1
+    assert stats["saved"] > 0 and stats["tokens"] < stats["raw_tokens"]
+
+    # 3. 按模型预算截断，超出预算的条目被丢弃
+    small = PromptBuilder({"default_budget": 1000, "budgets": {"tiny-model": 12}}, model="tiny-model")
+    prompt, stats = small.build(items)
+    assert count_tokens(prompt) <= 12 and stats["items"] == 1
+
+    # 4. 聚类合并的其他报道以标题和来源附在条目后，并计入预算
+    clustered = [{"title": "Tesla robot", "summary": "a", "related": [
+        {"title": "Tesla Optimus shown", "link": "https://www.electrek.co/optimus"},
+        {"title": "Tesla robot", "link": "https://example.com/dup"},
+    ]}]
+    prompt, stats = builder.build(clustered)
+    assert prompt == "[1] Tesla robot\na\nAlso reported:\n- Tesla Optimus shown (electrek.co)"
+    assert stats["tokens"] == count_tokens(prompt)
+    tight = PromptBuilder({"default_budget": count_tokens("[1] Tesla robot\na") + 1})
+    assert tight.build(clustered)[0] == "[1] Tesla robot\na"  # 放不下时只去掉 related
+
+    # 5. 字符串原样返回
+    assert builder.build("Manual seed prompt")[0] == "Manual seed prompt"
+    print("PromptBuilder 测试通过。")
+
+
+if __name__ == "__main__":
+    test_prompt_builder()
@@ -0,0 +1,68 @@
+import sys
+import threading
+import time
+import types
+
+from core.publishers.base_publisher import BasePublisher
+
+UPLOADS = []
+_lock = threading.Lock()
+
+
+class FakePublisher(BasePublisher):
+    """按配置的 delay 模拟发布耗时，记录每次图片上传"""
+    def prepare_media(self, image_path):
+        with _lock:
+            UPLOADS.append((self.config['platform'], image_path))
+        return f"media:{self.config['platform']}"
+
+    def post(self, content_bundle):
+        time.sleep(self.config.get('delay', 0))
+        if self.config.get('fail'):
+            raise RuntimeError("boom")
+        return {"caption": content_bundle['caption'], "media": content_bundle.get('media')}
+
+
+def test_publish_manager(monkeypatch):
+    module = types.SimpleNamespace(Publisher=FakePublisher)
+    monkeypatch.setitem(sys.modules, "core.publishers.fakea_pub", module)
+    monkeypatch.setitem(sys.modules, "core.publishers.fakeb_pub", module)
+    from core.publisher import PublishManager
+
+    manager = PublishManager({"modules": {"publish_channels": {
+        "a1": {"enabled": True, "platform": "fakea"},
+        "a2": {"enabled": True, "platform": "fakea"},
+        "b1": {"enabled": True, "platform": "fakeb", "fail": True},
+        "slow": {"enabled": True, "platform": "fakeb", "delay": 2, "timeout": 0.2},
+    }}})
+
+    UPLOADS.clear()
+    reported = []
+    start = time.monotonic()
+    results = manager.broadcast({"caption": "hi", "image_path": "image.png", "variants": {"a2": "hi a2"}},
+                                on_result=lambda channel, result: reported.append((channel, time.monotonic())))
+
+    # 1. 慢渠道按自己的 timeout 结束，不拖住整个广播，超时标记为结果未知
+    assert time.monotonic() - start < 1.5
+    assert results["slow"]["success"] is False and results["slow"]["error"] == "timeout after 0.2s"
+    assert results["slow"]["timed_out"] is True and results["b1"]["timed_out"] is False
+
+    # 2. 每个渠道都有结构化结果，并且一完成就回调，不等慢渠道
+    assert set(results) == {"a1", "a2", "b1", "slow"}
+    for result in results.values():
+        assert set(result) == {"success", "latency", "error", "result", "timed_out"}
+    assert [channel for channel, _ in reported][-1] == "slow"
+    assert sorted(channel for channel, _ in reported) == ["a1", "a2", "b1", "slow"]
+    assert all(at - start < 0.15 for channel, at in reported if channel != "slow")
+    assert results["a1"]["success"] and results["a1"]["result"] == {"caption": "hi", "media": "media:fakea"}
+    assert results["a2"]["result"]["caption"] == "hi a2"
+    assert results["b1"]["success"] is False and results["b1"]["error"] == "boom"
+
+    # 3. 每个平台只上传一次图片
+    assert sorted(UPLOADS) == [("fakea", "image.png"), ("fakeb", "image.png")]
+
+    # 4. 没有图片时不上传
+    UPLOADS.clear()
+    manager.broadcast({"caption": "text"}, channels=["a1", "a2"])
+    assert UPLOADS == []
+    print("发布管理器测试通过。")
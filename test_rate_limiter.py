@@ -0,0 +1,208 @@
+import asyncio
+import email.utils
+import threading
+import types
+
+import core.rate_limiter as rate_limiter
+from core.rate_limiter import AdaptiveConcurrency, RateLimiter, TokenBucket, retry_after
+
+
+class FakeClock:
+    """替换 rate_limiter 模块中的 time：sleep 只推进时间，测试结果与机器快慢无关"""
+    def __init__(self):
+        self.now = 1000.0
+        self.wall = 1_700_000_000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def time(self):
+        return self.wall + self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class HTTPError(Exception):
+    def __init__(self, status, headers=None):
+        super().__init__(f"HTTP {status}")
+        self.response = types.SimpleNamespace(status_code=status, headers=headers or {})
+
+
+class ReadTimeout(Exception):
+    pass
+
+
+def test_token_bucket(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, "time", clock)
+
+    # 1. 突发容量用完后按 rate 等待
+    bucket = TokenBucket(rate=1.0, capacity=2)
+    assert [bucket.reserve() for _ in range(4)] == [0.0, 0.0, 1.0, 2.0]
+
+    # 2. 时间流逝补充令牌，且不超过容量
+    clock.now += 10
+    assert bucket.reserve() == 0.0 and bucket.tokens == 1
+
+    # 3. 超过容量的请求按容量计算；adjust 按实际用量退还
+    assert bucket.reserve(5) == 1.0
+    bucket.adjust(3)
+    assert bucket.tokens == 2
+
+    # 4. Retry-After 让共享该桶的调用方一起暂停
+    bucket.pause(5)
+    assert bucket.reserve() == 5.0
+    print("令牌桶测试通过。")
+
+
+def test_adaptive_concurrency():
+    # 1. 限流时乘性下降，不低于下限
+    concurrency = AdaptiveConcurrency(initial=4, minimum=1, maximum=6)
+    for _ in range(4):
+        assert concurrency.try_acquire()
+    assert not concurrency.try_acquire()
+    concurrency.release(throttled=True)
+    assert concurrency.limit == 2.0
+    concurrency.release(throttled=True)
+    concurrency.release(throttled=True)
+    assert concurrency.limit == 1.0
+
+    # 2. 成功时加性增长 (每次 +1/limit)，不超过上限
+    concurrency.release()
+    assert concurrency.limit == 2.0 and concurrency.in_flight == 0
+    for _ in range(50):
+        concurrency.try_acquire()
+        concurrency.release()
+    assert concurrency.limit == 6
+    print("AIMD 并发控制测试通过。")
+
+
+def test_async_acquire_waits_for_release():
+    concurrency = AdaptiveConcurrency(initial=1, maximum=1)
+
+    async def main():
+        await concurrency.aacquire()
+        waiter = asyncio.ensure_future(concurrency.aacquire())
+        await asyncio.sleep(0)
+        assert not waiter.done() and concurrency._waiters
+
+        # 其他线程 (同步调用方) 释放时唤醒等待的协程
+        thread = threading.Thread(target=concurrency.release)
+        thread.start()
+        await asyncio.wait_for(waiter, timeout=1)
+        thread.join()
+        assert concurrency.in_flight == 1
+
+        # 被取消的等待者不会留在队列中
+        cancelled = asyncio.ensure_future(concurrency.aacquire())
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.gather(cancelled, return_exceptions=True)
+        assert not concurrency._waiters
+
+    asyncio.run(main())
+    print("异步并发等待测试通过。")
+
+
+def test_retry_after(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, "time", clock)
+
+    assert retry_after(HTTPError(429, {"Retry-After": "7"})) == 7.0
+    assert retry_after(HTTPError(429, {"retry-after": "-3"})) == 0.0
+    date = email.utils.formatdate(clock.time() + 30, usegmt=True)
+    assert abs(retry_after(HTTPError(503, {"Retry-After": date})) - 30) < 1
+    assert retry_after(HTTPError(429, {"x-rate-limit-reset": str(clock.time() + 12)})) == 12.0
+    assert retry_after(types.SimpleNamespace(retry_after=4)) == 4.0  # Telegram 错误体
+    assert retry_after(HTTPError(500)) is None
+    print("Retry-After 解析测试通过。")
+
+
+def test_retry_policy(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, "time", clock)
+    limiter = RateLimiter({"max_retries": 3, "base_delay": 1.0})
+
+    def failing(*errors):
+        calls = []
+
+        def fn():
+            calls.append(1)
+            if len(calls) <= len(errors):
+                raise errors[len(calls) - 1]
+            return "ok"
+        return fn, calls
+
+    # 1. 幂等请求：超时和 5xx 都会退避重试，Retry-After 优先于指数退避
+    fn, calls = failing(ReadTimeout(), HTTPError(503, {"Retry-After": "2"}))
+    assert limiter.call(fn) == "ok" and len(calls) == 3
+    assert clock.sleeps[-2] == 2.0  # 最后一次是下一轮的令牌等待 (0)
+
+    # 2. 非幂等请求 (发帖)：超时可能已经发出，不重试
+    fn, calls = failing(ReadTimeout())
+    try:
+        limiter.call(fn, idempotent=False)
+        raise AssertionError("超时应直接抛出")
+    except ReadTimeout:
+        pass
+    assert len(calls) == 1
+
+    # 3. 非幂等请求：429 和连接被拒绝 (包括被包装的) 确定没有生效，可以重试
+    wrapped = ConnectionError("Max retries exceeded")
+    wrapped.__cause__ = ConnectionRefusedError(111, "Connection refused")
+    fn, calls = failing(HTTPError(429), wrapped)
+    assert limiter.call(fn, idempotent=False) == "ok" and len(calls) == 3
+    print("重试策略测试通过。")
+
+
+def test_token_reconcile(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, "time", clock)
+    limiter = RateLimiter({"tpm": 6000, "max_retries": 1})  # 容量 1000 tokens
+    response = types.SimpleNamespace(usage=types.SimpleNamespace(total_tokens=100))
+
+    # 1. 预估 800，实际只用了 100：退还 700
+    limiter.call(lambda: response, tokens=800)
+    assert limiter.tokens.tokens == 900
+
+    # 2. 实际用量超过预估时补扣
+    limiter.call(lambda: {"usage": {"total_tokens": 300}}, tokens=200)
+    assert limiter.tokens.tokens == 600
+
+    # 3. 被限流的请求没有消耗 token，预占全部退还
+    def throttled():
+        raise HTTPError(429, {"Retry-After": "0"})
+    try:
+        limiter.call(throttled, tokens=50)
+    except HTTPError:
+        pass
+    assert limiter.tokens.tokens == 600
+    print("token 用量修正测试通过。")
+
+
+def test_cancelled_acall_releases_slot():
+    limiter = RateLimiter({"tpm": 6000, "initial_concurrency": 2, "max_concurrency": 2})
+
+    async def hang():
+        await asyncio.sleep(10)
+
+    async def ok():
+        return {"usage": {"total_tokens": 0}}
+
+    async def main():
+        # 对冲请求的落败方会被取消：取消后空位和预占的 token 都要归还
+        for _ in range(3):
+            task = asyncio.ensure_future(limiter.acall(hang, tokens=100))
+            await asyncio.sleep(0.01)
+            assert limiter.concurrency.in_flight == 1
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            assert limiter.concurrency.in_flight == 0
+        assert limiter.concurrency.limit == 2 and limiter.tokens.tokens > 999
+        assert await asyncio.wait_for(limiter.acall(ok), timeout=1) == {"usage": {"total_tokens": 0}}
+
+    asyncio.run(main())
+    print("取消请求归还并发空位测试通过。")
@@ -0,0 +1,84 @@
+import asyncio
+import sys
+import time
+import types
+
+from core.providers.base_adapter import error_result, is_error_result
+
+CALLS = []
+
+
+class FakeAdapter:
+    """按配置的 behavior 模拟服务商：ok / error / slow"""
+    def __init__(self, config):
+        self.name = config['model']
+        self.behavior = config['behavior']
+        self.delay = config.get('delay', 0)
+        self.rate_limit = config.get('rate_limit')
+
+    def generate_content(self, raw_data, system_prompt):
+        CALLS.append(self.name)
+        time.sleep(self.delay)
+        if self.behavior == "error":
+            return error_result("invalid JSON")
+        return {"caption": f"from {self.name}", "image_prompt": "", "tags": []}
+
+    async def agenerate_content(self, raw_data, system_prompt):
+        CALLS.append(self.name)
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            CALLS.append(f"{self.name}:cancelled")
+            raise
+        if self.behavior == "error":
+            return error_result("invalid JSON")
+        return {"caption": f"from {self.name}", "image_prompt": "", "tags": []}
+
+
+def router(monkeypatch, providers, rate_limit=None, **router_config):
+    from core.providers.router_adapter import Adapter
+    monkeypatch.setitem(sys.modules, "core.providers.fake_adapter", types.SimpleNamespace(Adapter=FakeAdapter))
+    router_config["providers"] = [dict(p, provider="fake", name=p["model"]) for p in providers]
+    return Adapter({"model": "unused", "rate_limit": rate_limit or {}, "router": router_config})
+
+
+def test_router_adapter(monkeypatch):
+    # 1. 故障转移：第一个服务商返回错误时改用下一个；各服务商不自行重试，失败后立即转移
+    CALLS.clear()
+    r = router(monkeypatch, [{"model": "a", "behavior": "error"}, {"model": "b", "behavior": "ok"}],
+               rate_limit={"rpm": 60, "max_retries": 4}, hedge={"enabled": False})
+    assert r.generate_content("news", "prompt")["caption"] == "from b"
+    assert CALLS == ["a", "b"] and r.health["a"].error_rate() == 1.0
+    assert r.adapters["a"].rate_limit == {"rpm": 60, "max_retries": 0}
+
+    # 2. 全部失败时才返回占位结果
+    r = router(monkeypatch, [{"model": "a", "behavior": "error"}, {"model": "b", "behavior": "error"}],
+               hedge={"enabled": False})
+    assert is_error_result(r.generate_content("news", "prompt"))
+
+    # 3. 对冲：首个请求超过阈值后向下一个服务商再发一次，先返回的结果胜出
+    hedge = {"initial_delay": 0.05, "min_samples": 100}
+    r = router(monkeypatch, [{"model": "slow", "behavior": "ok", "delay": 1.0}, {"model": "fast", "behavior": "ok"}],
+               hedge=hedge)
+    start = time.monotonic()
+    assert r.generate_content("news", "prompt")["caption"] == "from fast"
+    assert time.monotonic() - start < 0.5
+
+    # 4. 异步版本会取消落败的请求
+    CALLS.clear()
+    result = asyncio.run(r.agenerate_content("news", "prompt"))
+    assert result["caption"] == "from fast" and "slow:cancelled" in CALLS
+
+    # 5. 健康度：错误率高的服务商被排到最后
+    r = router(monkeypatch, [{"model": "a", "behavior": "error"}, {"model": "b", "behavior": "ok"}],
+               hedge={"enabled": False})
+    for _ in range(3):
+        r.generate_content("news", "prompt")
+    assert r.ranked() == ["b", "a"]
+    weighted = router(monkeypatch, [{"model": "a", "behavior": "ok"}, {"model": "b", "behavior": "ok"}],
+                      strategy="weighted")
+    for _ in range(5):
+        weighted.health["a"].record(0.1, False)
+    assert sum(weighted.ranked()[0] == "b" for _ in range(200)) > 150
+    print("路由适配器测试通过。")
+
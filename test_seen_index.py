@@ -0,0 +1,79 @@
+import os
+import tempfile
+import threading
+import time
+from core.seen_index import SeenIndex, normalize_link
+
+def test_seen_index():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "seen.db")
+        items = [
+            {"title": "Tesla unveils robot", "link": "https://www.example.com/a/?utm_source=rss", "summary": "..."},
+            {"title": "Crypto market rallies", "link": "https://example.com/b", "summary": "..."},
+        ]
+
+        # 1. 新索引中所有条目都是未见过的
+        index = SeenIndex(path, ttl_days=1, bloom_capacity=1000)
+        assert index.filter_unseen(items) == items
+
+        # 2. 标记后，同一链接 (即使追踪参数不同) 会被过滤
+        index.mark_seen(items[:1])
+        again = {"title": "Tesla unveils robot (updated)", "link": "http://WWW.example.com/a#top", "summary": "new"}
+        assert normalize_link(again["link"]) == normalize_link("https://example.com/a/")
+        assert index.filter_unseen([again, items[1]]) == [items[1]]
+        index.close()
+
+        # 3. 重启后索引仍然有效
+        index = SeenIndex(path, ttl_days=1, bloom_capacity=1000)
+        assert index.is_seen(items[0])
+        assert len(index) == 2
+
+        # 4. 过期记录会被清理
+        index.ttl = 0
+        time.sleep(0.01)
+        assert not index.is_seen(items[0])
+        assert index.prune() == 2
+        index.close()
+        print("SeenIndex 测试通过。")
+
+def test_ingestor_marks_seen_on_empty_index():
+    from core.ingestor import Ingestor
+    with tempfile.TemporaryDirectory() as tmp:
+        # SeenIndex 定义了 __len__，空索引为假值；Ingestor 不能因此跳过记录和过滤
+        ingestor = Ingestor({"seen_index": {"enabled": True, "path": os.path.join(tmp, "seen.db")}})
+        item = {"title": "Tesla unveils robot", "link": "https://example.com/a"}
+        ingestor.mark_processed([item])
+        assert ingestor.seen_index.is_seen(item)
+        ingestor.seen_index.close()
+        print("Ingestor 已处理记录测试通过。")
+
+def test_seen_index_threads():
+    with tempfile.TemporaryDirectory() as tmp:
+        index = SeenIndex(os.path.join(tmp, "seen.db"), bloom_capacity=1000)
+        index.mark_seen([{"title": "seed", "link": "https://example.com/seed"}])
+
+        # 在创建索引以外的多个线程中同时标记和查询 (常驻模式 / 异步模式的工作线程)
+        errors = []
+        def worker(n):
+            try:
+                for i in range(20):
+                    item = {"title": f"story {n}-{i}", "link": f"https://example.com/{n}/{i}"}
+                    index.filter_unseen([item, {"title": "seed", "link": "https://example.com/seed"}])
+                    index.mark_seen([item])
+            except Exception as e:
+                errors.append(e)
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert not errors, errors
+        assert len(index) == 2 * (1 + 4 * 20)  # 每个条目记录链接和内容指纹两个键
+        index.close()
+        print("SeenIndex 跨线程测试通过。")
+
+if __name__ == "__main__":
+    test_seen_index()
+    test_ingestor_marks_seen_on_empty_index()
+    test_seen_index_threads()
@@ -0,0 +1,39 @@
+import os
+import subprocess
+import sys
+
+from benchmarks.bench_startup import ROOT, run_once, run_reference, write_noop_config
+
+# 关闭所有阶段时，启动 + 退出的墙钟时间最多是参照进程 (解释器 + dotenv + yaml + logging) 的几倍。
+# 按比例而不是固定秒数，CI 机器较慢时不会误报；误导入 openai 等重依赖会超出好几倍
+STARTUP_BUDGET_RATIO = 3.0
+
+# 这些依赖只应在对应阶段启用时才被导入 (dotenv 很轻，启动时统一读取 .env)
+HEAVY_MODULES = ["openai", "tweepy", "feedparser", "requests", "PIL",
+                 "core.processor", "core.ingestor", "core.publisher", "core.media_studio"]
+
+
+def test_startup_budget(tmp_path):
+    config_path = write_noop_config(str(tmp_path))
+    run_once(config_path)  # 预热 .pyc 缓存
+    # 取多次中的最小值，排除调度抖动
+    elapsed = min(run_once(config_path)[0] for _ in range(5))
+    reference = min(run_reference() for _ in range(5))
+    assert elapsed < reference * STARTUP_BUDGET_RATIO, \
+        f"启动耗时 {elapsed:.2f}s 超出预算 (参照进程 {reference:.2f}s 的 {STARTUP_BUDGET_RATIO} 倍)"
+    # 日志写到临时目录
+    assert os.path.exists(tmp_path / "bot.log")
+
+
+def test_noop_run_skips_heavy_imports(tmp_path):
+    config_path = write_noop_config(str(tmp_path))
+    script = (
+        "import sys, main\n"
+        f"main.run_bot({config_path!r})\n"
+        f"print('LOADED=' + ','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+    )
+    proc = subprocess.run([sys.executable, "-c", script], cwd=ROOT,
+                          capture_output=True, text=True, check=True)
+    loaded = proc.stdout.rsplit("LOADED=", 1)[1].strip()
+    assert loaded == "", f"空跑时导入了: {loaded}"
+    print("启动耗时测试通过。")
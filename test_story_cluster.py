@@ -0,0 +1,56 @@
+from core.ingestor import Ingestor
+from core.story_cluster import StoryClusterer
+
+
+def rss(items):
+    body = "".join(f"<item><title>{title}</title><link>{link}</link><description>{summary}</description></item>"
+                   for title, link, summary in items)
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>t</title>{body}</channel></rss>'
+
+
+TESLA = "Tesla unveils Optimus humanoid robot at AI day event in California"
+TESLA_SUMMARY = "The humanoid robot walked on stage and sorted battery cells during the AI day event."
+
+
+def test_story_cluster(tmp_path):
+    # 1. 不同来源对同一事件的报道归为一簇，分数最高的作为代表
+    clusterer = StoryClusterer(threshold=0.5)
+    items = [
+        {"title": TESLA, "summary": TESLA_SUMMARY, "score": 1},
+        {"title": "Nvidia launches new AI chip for data centers", "summary": "Faster inference.", "score": 2},
+        {"title": TESLA + " today", "summary": TESLA_SUMMARY, "score": 3},
+    ]
+    collapsed = clusterer.collapse(items)
+    assert [item["score"] for item in collapsed] == [2, 3]
+    assert collapsed[1]["related"] == [items[0]]
+
+    # 2. 先聚类再截断 top_k：重复报道不占名额
+    feed_a = tmp_path / "a.xml"
+    feed_b = tmp_path / "b.xml"
+    feed_a.write_text(rss([
+        (TESLA, "https://a.example/tesla", TESLA_SUMMARY),
+        ("Nvidia launches new AI chip for data centers", "https://a.example/nvidia", "AI inference."),
+    ]))
+    feed_b.write_text(rss([
+        (TESLA + " today", "https://b.example/tesla", TESLA_SUMMARY),
+        ("Tesla AI robot Optimus shown at AI day in California", "https://c.example/tesla", TESLA_SUMMARY),
+        ("OpenAI ships a new AI model", "https://b.example/model", "Reasoning AI model."),
+    ]))
+    ingestor = Ingestor({
+        "enable_rss": True, "rss_urls": [str(feed_a), str(feed_b)],
+        "keywords": {"AI": 1, "Tesla": 2}, "top_k": 3,
+        "clustering": {"enabled": True, "threshold": 0.5},
+    })
+    stories = ingestor.fetch()
+    titles = [item["title"] for item in stories]
+    assert len(stories) == 3
+    assert sum("Tesla" in title for title in titles) == 1
+    assert any("Nvidia" in title for title in titles) and any("OpenAI" in title for title in titles)
+    print("聚类测试通过。")
+
+
+if __name__ == "__main__":
+    import pathlib
+    import tempfile
+    with tempfile.TemporaryDirectory() as d:
+        test_story_cluster(pathlib.Path(d))
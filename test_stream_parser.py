@@ -0,0 +1,53 @@
+from core.stream_parser import StreamParseError, parse_stream
+
+RSS = b"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0"><channel><title>Feed</title>
+<item><title>AI story 1</title><link>https://example.com/1</link>
+<description><![CDATA[<p>First</p>]]></description><pubDate>Mon, 06 Jan 2025 10:00:00 GMT</pubDate></item>
+<item><title>AI story 2</title><guid>https://example.com/2</guid><description>Second</description></item>
+<item><title>AI story 3</title><link>https://example.com/3</link></item>
+</channel></rss>"""
+
+ATOM = b"""<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom"><title>Atom</title>
+<entry><title>Tesla news</title><link rel="alternate" href="https://example.com/t"/>
+<summary>Robots</summary><updated>2025-01-06T10:00:00Z</updated></entry>
+</feed>"""
+
+
+def chunks(data, size=40):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+def test_stream_parser():
+    # 1. RSS 2.0：只取需要的字段，guid 可作为链接
+    entries = parse_stream(chunks(RSS), 5)
+    assert [e["title"] for e in entries] == ["AI story 1", "AI story 2", "AI story 3"]
+    assert entries[0]["summary"] == "<p>First</p>"
+    assert entries[0]["published"] == "2025-01-06T10:00:00+00:00"
+    assert entries[1]["link"] == "https://example.com/2" and entries[1]["published"] is None
+
+    # 2. 取够条数后停止读取剩余内容
+    stream = chunks(RSS)
+    assert len(parse_stream(stream, 1)) == 1
+    assert len(list(stream)) > 0
+
+    # 3. Atom
+    entry = parse_stream(chunks(ATOM), 5)[0]
+    assert entry["link"] == "https://example.com/t" and entry["summary"] == "Robots"
+    assert entry["published"] == "2025-01-06T10:00:00+00:00"
+
+    # 4. 格式错误时抛出异常并带回已读取的字节，供 feedparser 回退使用
+    broken = b"<rss><channel><item><title>A &nbsp; B</title></item></channel></rss>"
+    stream = chunks(broken)
+    try:
+        parse_stream(stream, 5)
+        assert False, "should fail"
+    except StreamParseError as e:
+        assert e.data + b"".join(stream) == broken
+    print("流式解析测试通过。")
+
+
+if __name__ == "__main__":
+    test_stream_parser()
@@ -0,0 +1,100 @@
+import os
+
+from benchmarks.fake_services import FakeServices, TINY_PNG
+
+
+def write_image(directory, name, content=TINY_PNG):
+    path = os.path.join(directory, name)
+    with open(path, "wb") as f:
+        f.write(content)
+    return path
+
+
+def test_telegram_publisher(tmp_path, monkeypatch):
+    try:
+        from core.publishers.telegram_pub import Publisher
+    except ImportError:
+        print("未安装 requests，跳过 Telegram 发布器测试。")
+        return
+
+    monkeypatch.setenv("TG_BOT_TOKEN", "123:test")
+    chats = ["@a", "@b", "@c", "@d"]
+    with FakeServices({"telegram": 0.05}) as services:
+        image_path = write_image(tmp_path, "image.png")
+        publisher = Publisher({"chat_id": chats[0], "chat_ids": chats[1:], "api_base": services.base_url})
+
+        # 1. 并发发往 4 个 chat，图片只上传一次，其余 chat 复用 file_id
+        result = publisher.post({"caption": "Hello", "tags": ["#AI"], "image_path": image_path})
+        assert sorted(result["sent"]) == sorted(chats) and not result["failed"]
+        assert services.counts["telegram.sendPhoto"] == 4 and services.counts["telegram.upload"] == 1
+
+        # 2. 再次发布同一张图片时不再上传
+        publisher.post({"caption": "Again", "image_path": image_path})
+        assert services.counts["telegram.sendPhoto"] == 8 and services.counts["telegram.upload"] == 1
+
+        # 3. 纯文字使用 sendMessage
+        publisher.post({"caption": "Text only"})
+        assert services.counts["telegram.sendMessage"] == 4
+    print("Telegram 发布器测试通过。")
+
+
+def test_telegram_file_id_cache_is_bounded(tmp_path, monkeypatch):
+    try:
+        from core.publishers.telegram_pub import Publisher
+    except ImportError:
+        print("未安装 requests，跳过 Telegram 发布器测试。")
+        return
+
+    monkeypatch.setenv("TG_BOT_TOKEN", "123:test")
+    with FakeServices() as services:
+        first = write_image(tmp_path, "first.png")
+        second = write_image(tmp_path, "second.png", TINY_PNG + b"\0")
+        publisher = Publisher({"chat_id": "@lru", "api_base": services.base_url, "file_id_cache_size": 1,
+                               "rate_limit": {"per_chat_rpm": 6000}})
+
+        # 只保留最近一张图片的 file_id，旧的被淘汰后需要重新上传
+        for path in (first, first, second, first):
+            publisher.post({"caption": "x", "image_path": path})
+        assert services.counts["telegram.upload"] == 3
+        assert len(publisher._file_ids) == 1 and not publisher._upload_locks
+
+        # 每个发布器各自持有缓存
+        other = Publisher({"chat_id": "@lru", "api_base": services.base_url})
+        assert not other._file_ids
+    print("Telegram file_id 缓存测试通过。")
+
+
+def test_telegram_timeout_is_not_retried(tmp_path, monkeypatch):
+    try:
+        from core.publishers.telegram_pub import Publisher
+    except ImportError:
+        print("未安装 requests，跳过 Telegram 发布器测试。")
+        return
+
+    monkeypatch.setenv("TG_BOT_TOKEN", "123:test")
+    # 服务端处理慢于客户端超时：消息可能已经发出，重试会重复发布
+    with FakeServices({"telegram": 0.5}) as services:
+        publisher = Publisher({"chat_id": "@timeout", "api_base": services.base_url, "request_timeout": 0.1,
+                               "rate_limit": {"max_retries": 3, "base_delay": 0}})
+        try:
+            publisher.post({"caption": "Once"})
+            raise AssertionError("所有 chat 超时时应抛出异常")
+        except Exception as e:
+            assert "所有 chat 均发送失败" in str(e)
+        assert services.counts["telegram.sendMessage"] == 1
+    print("Telegram 超时不重试测试通过。")
+
+
+def test_missing_token_skips_channel(monkeypatch):
+    try:
+        import core.publishers.telegram_pub  # noqa: F401
+    except ImportError:
+        print("未安装 requests，跳过 Telegram 发布器测试。")
+        return
+    from core.publisher import PublishManager
+
+    # 缺少 token 的渠道被跳过，不影响流程启动
+    monkeypatch.delenv("TG_BOT_TOKEN", raising=False)
+    manager = PublishManager({"modules": {"publish_channels": {"telegram": {"enabled": True, "chat_id": "@a"}}}})
+    assert manager.active_publishers == {}
+    print("缺少 Telegram token 跳过渠道测试通过。")
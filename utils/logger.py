@@ -1,34 +1,190 @@
+import atexit
+import contextvars
+import json
 import logging
+import queue
 import sys
-from logging.handlers import RotatingFileHandler
+import threading
+import time
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 import os
 
-# 确保日志目录存在
-log_dir = "logs"
-if not os.path.exists(log_dir):
-    os.makedirs(log_dir)
+DEFAULT_LOG_FILE = os.path.join("logs", "bot.log")
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - [%(correlation_id)s] %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# 当前处理条目的关联 ID；asyncio 任务各自继承一份上下文
+_correlation_id = contextvars.ContextVar("correlation_id", default=None)
+
+
+def set_correlation_id(value):
+    return _correlation_id.set(value)
+
+
+@contextmanager
+def correlation(value):
+    """with correlation(item_id): 其中的日志都带上这个 ID"""
+    token = _correlation_id.set(value)
+    try:
+        yield
+    finally:
+        _correlation_id.reset(token)
+
+
+class CorrelationFilter(logging.Filter):
+    """在调用方线程中取出关联 ID，写入队列后的监听线程拿不到调用方的上下文"""
+    def filter(self, record):
+        record.correlation_id = _correlation_id.get() or "-"
+        return True
+
+
+class RepeatFilter(logging.Filter):
+    """
+    重复日志限流：同一级别、同一内容在 window 秒内最多输出 burst 条，
+    其余丢弃；窗口过后再次出现时附上被抑制的条数
+    """
+    def __init__(self, window=10.0, burst=5, max_keys=1000):
+        super().__init__()
+        self.window = window
+        self.burst = burst
+        self.max_keys = max_keys
+        self._seen = {}  # key -> [窗口开始时间, 已输出条数, 已抑制条数]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        key = (record.levelno, record.getMessage())
+        now = time.monotonic()
+        with self._lock:
+            entry = self._seen.get(key)
+            if entry is None or now - entry[0] >= self.window:
+                suppressed = entry[2] if entry else 0
+                self._seen.pop(key, None)
+                self._seen[key] = [now, 1, 0]
+                if len(self._seen) > self.max_keys:
+                    # dict 按插入顺序排列，最早的窗口在前
+                    del self._seen[next(iter(self._seen))]
+                if suppressed:
+                    record.msg = f"{record.getMessage()} (已抑制 {suppressed} 条重复日志)"
+                    record.args = None
+                return True
+            if entry[1] < self.burst:
+                entry[1] += 1
+                return True
+            entry[2] += 1
+            return False
+
+
+class JsonFormatter(logging.Formatter):
+    """JSON lines：每条日志一行，方便日志系统按字段检索"""
+    def format(self, record):
+        payload = {
+            "ts": self.formatTime(record, DATE_FORMAT),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "correlation_id": getattr(record, "correlation_id", None),
+            "thread": record.threadName,
+        }
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False)
+
+
+class _QueueHandler(QueueHandler):
+    """
+    默认的 prepare 会在调用方线程完整格式化一次并复制记录；
+    这里只合并消息参数 (参数对象之后可能被修改)，格式化全部交给监听线程
+    """
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def _build_handlers(config):
+    if config.get('format') == 'json':
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(TEXT_FORMAT, datefmt=DATE_FORMAT, defaults={"correlation_id": "-"})
+
+    handlers = []
+    # 1. 控制台输出
+    if config.get('console', True):
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(formatter)
+        handlers.append(console_handler)
+
+    # 2. 文件输出 (保留最近 5 个文件，每个最大 5MB)
+    log_file = config.get('file', DEFAULT_LOG_FILE)
+    if log_file:
+        log_dir = os.path.dirname(log_file)
+        # 确保日志目录存在
+        if log_dir and not os.path.exists(log_dir):
+            os.makedirs(log_dir)
+        file_handler = RotatingFileHandler(
+            log_file,
+            maxBytes=config.get('max_bytes', 5*1024*1024),
+            backupCount=config.get('backup_count', 5),
+            encoding='utf-8',
+            delay=True  # 第一条日志写入时才打开文件，不拖慢启动
+        )
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
+    return handlers
+
 
 # 创建日志记录器
 logger = logging.getLogger("OpenContentBot")
 logger.setLevel(logging.INFO)
+logger.addFilter(CorrelationFilter())
+
+_listener = None
+_repeat_filter = None
+
+
+def shutdown_logging():
+    """停止监听线程，队列中剩余的日志全部写出后返回"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def configure_logging(config=None):
+    """
+    按 config.yaml 的 logging 部分重新安装处理器:
+    - mode: queue 时调用方只把记录放进队列，由一个监听线程格式化并写出；sync 为直接写
+    - format: text 或 json
+    - rate_limit: {window, burst} 重复日志限流，不填则不限流
+    """
+    global _listener, _repeat_filter
+    config = config or {}
+    shutdown_logging()
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+    if _repeat_filter is not None:
+        logger.removeFilter(_repeat_filter)
+        _repeat_filter = None
+
+    rate_limit = config.get('rate_limit')
+    if rate_limit:
+        _repeat_filter = RepeatFilter(rate_limit.get('window', 10.0), rate_limit.get('burst', 5))
+        logger.addFilter(_repeat_filter)
+
+    handlers = _build_handlers(config)
+    if config.get('mode', 'sync') == 'queue':
+        log_queue = queue.SimpleQueue()
+        logger.addHandler(_QueueHandler(log_queue))
+        _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+    else:
+        for handler in handlers:
+            logger.addHandler(handler)
+    return logger
+
 
-# 定义日志格式
-formatter = logging.Formatter(
-    '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
-
-# 1. 控制台输出
-console_handler = logging.StreamHandler(sys.stdout)
-console_handler.setFormatter(formatter)
-logger.addHandler(console_handler)
-
-# 2. 文件输出 (保留最近 5 个文件，每个最大 5MB)
-file_handler = RotatingFileHandler(
-    os.path.join(log_dir, "bot.log"), 
-    maxBytes=5*1024*1024, 
-    backupCount=5,
-    encoding='utf-8'
-)
-file_handler.setFormatter(formatter)
-logger.addHandler(file_handler)
\ No newline at end of file
+# 导入时先按同步模式安装默认处理器，main 读取配置后再调用 configure_logging
+configure_logging()
+atexit.register(shutdown_logging)